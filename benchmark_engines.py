@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Engine benchmark: import time, memory and login latency
+
+Each engine runs in a fresh interpreter that imports it, then logs in to
+the local mock portal a number of times (a new automator each time, as a
+CLI run would). Reported per engine:
+
+  import  - time to import the engine module
+  RSS     - resident memory after import and after the logins
+  login   - median and p95 of automate_login() against the mock portal
+
+    python benchmark_engines.py [--logins 20] [--delay 0.0]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from mock_portal import MockPortal
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import json, statistics, sys, time
+
+def rss_kb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+
+baseline = rss_kb()
+start = time.perf_counter()
+if {engine!r} == 'lite':
+    from iitm_login_manager.lite import LiteAutomator as Engine
+else:
+    from iitm_login_manager.automator import IITMNetAccessAutomator as Engine
+import_time = time.perf_counter() - start
+after_import = rss_kb()
+
+from iitm_login_manager.rtt import RTTEstimator
+latencies = []
+for _ in range({logins}):
+    automator = Engine('test_user', 'test_pass')
+    automator.base_url = {base_url!r}
+    automator.login_url = {base_url!r} + '/account/login'
+    automator.internet_test_urls = [automator.login_url]
+    automator.rtt = RTTEstimator()
+    automator.skip_off_campus = False
+    automator.activation_wait = 0
+    automator.log = lambda message: None
+    start = time.perf_counter()
+    assert automator.automate_login(timeout=30)
+    latencies.append(time.perf_counter() - start)
+
+latencies.sort()
+print(json.dumps({{
+    'import': import_time,
+    'rss_baseline': baseline,
+    'rss_import': after_import,
+    'rss_login': rss_kb(),
+    'median': statistics.median(latencies),
+    'p95': latencies[int(0.95 * (len(latencies) - 1))],
+}}))
+"""
+
+
+def run(engine, base_url, logins):
+    script = CHILD.format(engine=engine, base_url=base_url, logins=logins)
+    result = subprocess.run([sys.executable, "-c", script], cwd=HERE, capture_output=True, text=True, timeout=300)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the requests and standard-library engines")
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.0, help="mock portal response delay in seconds")
+    args = parser.parse_args()
+
+    with MockPortal(delay=args.delay) as portal:
+        results = {engine: run(engine, portal.base_url, args.logins) for engine in ("requests", "lite")}
+
+    print(f"{'engine':10}{'import':>10}{'RSS import':>12}{'RSS login':>12}{'login p50':>12}{'login p95':>12}")
+    for engine, r in results.items():
+        print(f"{engine:10}{r['import'] * 1000:>8.1f}ms"
+              f"{(r['rss_import'] - r['rss_baseline']) / 1024:>9.1f} MB"
+              f"{(r['rss_login'] - r['rss_baseline']) / 1024:>9.1f} MB"
+              f"{r['median'] * 1000:>10.1f}ms{r['p95'] * 1000:>10.1f}ms")
+    print("(RSS is growth over the bare interpreter)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: time from process start to the first accurate status
+
+warm  - a fresh process reads the state snapshot (what the tray now does
+        before creating its icon)
+cold  - a fresh process builds the automator and probes, as the tray used
+        to before it knew anything; the probe hits the local mock portal,
+        so this is a best case for the real network
+
+Both are measured from before the interpreter starts, with a subprocess
+each run. The tray itself needs GTK, so the icon drawing is not included.
+
+    python benchmark_startup.py [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from iitm_login_manager.state import StateStore
+from mock_portal import MockPortal
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WARM = """
+from iitm_login_manager.state import StateStore
+status, message = StateStore({path!r}).load().warm_status()
+print(status)
+"""
+
+COLD = """
+from iitm_login_manager.automator import IITMNetAccessAutomator
+automator = IITMNetAccessAutomator()
+automator.prober.targets = [{target!r}]
+print(automator.prober.probe().state)
+"""
+
+
+def time_process(script):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", script], cwd=HERE,
+                            capture_output=True, text=True, timeout=60)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    return elapsed, result.stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first accurate status, warm vs cold")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, MockPortal() as portal:
+        path = os.path.join(directory, "state.json")
+        StateStore(path).record_status("success", "Already connected")
+        portal.authorized_ips.add("127.0.0.1")
+
+        baseline = [time_process("pass")[0] for _ in range(args.runs)]
+        warm = [time_process(WARM.format(path=path)) for _ in range(args.runs)]
+        cold = [time_process(COLD.format(target=f"{portal.base_url}/generate_204")) for _ in range(args.runs)]
+
+    print(f"{'':8}{'median':>10}{'min':>10}  status")
+    print(f"{'python':8}{statistics.median(baseline) * 1000:>8.1f}ms{min(baseline) * 1000:>8.1f}ms")
+    for name, runs in (("warm", warm), ("cold", cold)):
+        times = [t for t, _ in runs]
+        print(f"{name:8}{statistics.median(times) * 1000:>8.1f}ms{min(times) * 1000:>8.1f}ms  {runs[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
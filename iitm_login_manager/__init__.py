@@ -7,11 +7,19 @@ __version__ = "1.0.0"
 __author__ = "IITM Student"
 __email__ = "your.email@example.com"
 
-from .automator import IITMNetAccessAutomator, LoginStatus
+__all__ = ['IITMNetAccessAutomator', 'LoginStatus']
 
-# Try to import tray app, but don't fail if GTK is not available
-try:
-    from .tray import IITMTrayApp
-    __all__ = ['IITMNetAccessAutomator', 'LoginStatus', 'IITMTrayApp']
-except ImportError:
-    __all__ = ['IITMNetAccessAutomator', 'LoginStatus']
\ No newline at end of file
+
+def __getattr__(name):
+    # Imported lazily so light entry points (the single-instance handoff in
+    # instance.py) start without loading requests or GTK
+    if name in ('IITMNetAccessAutomator', 'LoginStatus'):
+        from . import automator
+        return getattr(automator, name)
+    if name == 'IITMTrayApp':
+        try:
+            from .tray import IITMTrayApp
+        except ImportError as e:
+            raise AttributeError(f"IITMTrayApp is unavailable: {e}") from e
+        return IITMTrayApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - asyncio on the GLib main loop
+
+In the tray's integrated mode (config "event_loop": "asyncio") asyncio runs
+on top of the GLib main context, so the scheduler, the heartbeat and status
+probes are coroutines on the GTK thread and talk to GTK directly. The
+thread-per-service model needed a scheduler thread that woke every minute,
+a heartbeat thread and probe jobs on the worker pool, all handing results
+back through GLib.idle_add.
+
+Logins still run on one worker thread: the login engines are built on
+blocking HTTP clients. Their results come back to the loop as awaited
+futures.
+
+Nothing here imports GTK; the coroutines run on any asyncio loop.
+"""
+
+import asyncio
+import functools
+import socket
+import ssl
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .probe import ConnectivityProber, ProbeResult, ProbeState, classify_probe, combine_attempts
+from .resolver import device_options
+
+
+def install_glib_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Make asyncio run on the GLib main context; None if PyGObject is too old
+
+    The loop runs while a GLib.MainLoop (not Gtk.main()) is running.
+    PyGObject 3.50 added the event loop policy this relies on.
+    """
+    try:
+        from gi.events import GLibEventLoopPolicy
+    except ImportError:
+        return None
+    policy = GLibEventLoopPolicy()
+    asyncio.set_event_loop_policy(policy)
+    return policy.get_event_loop()
+
+
+class AsyncProber:
+    """generate_204 probes as coroutines, configured by a ConnectivityProber
+
+    Targets, timeout, portal host and RTT estimator are read from prober
+    on every call, so apply_probe_settings() covers both. Connections go
+    through the prober's Resolver (DNS cache, Happy Eyeballs) and source
+    address or device, like its requests session; the blocking connect
+    runs on the loop's default executor.
+    """
+
+    MAX_BODY = 16384  # enough to recognise a portal page
+
+    def __init__(self, prober: ConnectivityProber):
+        self.prober = prober
+        self._tls = None
+
+    async def probe(self, url: Optional[str] = None, timeout: Optional[float] = None) -> ProbeResult:
+        prober = self.prober
+        url = url or prober.targets[0]
+        host = urlsplit(url).hostname
+        if timeout is None:
+            timeout = prober.rtt.timeout(host, prober.timeout) if prober.rtt else prober.timeout
+        start = time.monotonic()
+        try:
+            status, headers, body, size = await asyncio.wait_for(self._get(url, timeout), timeout)
+        except (OSError, EOFError, ValueError, asyncio.TimeoutError) as e:
+            if prober.rtt and isinstance(e, asyncio.TimeoutError):
+                prober.rtt.on_timeout(host)
+            return ProbeResult(ProbeState.OFFLINE, time.monotonic() - start,
+                               prober.REQUEST_OVERHEAD, url, str(e) or type(e).__name__)
+
+        latency = time.monotonic() - start
+        if prober.rtt:
+            prober.rtt.observe(host, latency)
+            prober.rtt.save(min_interval=300)
+        return classify_probe(url, status, headers.get('location', ''), body.decode('utf-8', errors='replace'),
+                              prober.portal_host, latency, prober.REQUEST_OVERHEAD + size)
+
+    async def probe_any(self, timeout: Optional[float] = None) -> ProbeResult:
+        """Try each target in turn until one gives a definite answer
+
+        The result counts the probes and bytes of every target tried.
+        """
+        results = []
+        for url in list(self.prober.targets):
+            results.append(await self.probe(url, timeout))
+            if results[-1].state != ProbeState.OFFLINE:
+                break
+        return combine_attempts(results)
+
+    async def _get(self, url: str, timeout: float) -> Tuple[int, Dict[str, str], bytes, int]:
+        """(status, lower-cased headers, body, bytes received) of one GET"""
+        parts = urlsplit(url)
+        tls = parts.scheme == 'https'
+        if tls and self._tls is None:
+            self._tls = ssl.create_default_context()
+        port = parts.port or (443 if tls else 80)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        reader, writer = await self._connect(parts.hostname, port, self._tls if tls else None, timeout)
+        try:
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                         f"User-Agent: iitm-login-manager\r\nConnection: close\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode('iso-8859-1').split("\r\n")
+            status = int(lines[0].split()[1])
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                if name:
+                    headers[name.strip().lower()] = value.strip()
+            length = headers.get('content-length')
+            if status in (204, 304):
+                body = b''
+            elif length is not None:
+                body = await reader.readexactly(min(int(length), self.MAX_BODY))
+            else:
+                body = await reader.read(self.MAX_BODY)
+            return status, headers, body, len(head) + len(body)
+        finally:
+            writer.close()
+
+    async def _connect(self, host: str, port: int, tls: Optional[ssl.SSLContext], timeout: float):
+        prober = self.prober
+        resolver = getattr(prober, 'resolver', None)
+        if resolver is None:
+            return await asyncio.open_connection(host, port, ssl=tls, happy_eyeballs_delay=0.25)
+        source = (prober.source_address, 0) if prober.source_address else None
+        options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)] + device_options(prober.device)
+        connect = functools.partial(resolver.create_connection, (host, port), timeout,
+                                    source_address=source, socket_options=options)
+        future = asyncio.get_running_loop().run_in_executor(None, connect)
+        try:
+            sock = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Timed out: the connect finishes in its thread, so close what it returns
+            future.add_done_callback(lambda f: f.cancelled() or f.exception() or f.result().close())
+            raise
+        sock.setblocking(False)
+        try:
+            return await asyncio.open_connection(sock=sock, ssl=tls, server_hostname=host if tls else None)
+        except BaseException:
+            sock.close()
+            raise
+
+
+class ScheduleRunner:
+    """Run a schedule.Scheduler's jobs from the loop
+
+    Sleeps until the next job instead of polling, capped at max_idle so a
+    suspend or a wall clock change is noticed (asyncio sleeps on the
+    monotonic clock). wake() after adding or clearing jobs.
+    """
+
+    def __init__(self, scheduler, max_idle: float = 60):
+        self.scheduler = scheduler
+        self.max_idle = max_idle
+        self.wakeups = 0
+        self._loop = None
+        self._wake = None
+        self._stopped = False
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        while not self._stopped:
+            self.wakeups += 1
+            try:
+                self.scheduler.run_pending()
+            except Exception as e:
+                print(f"Scheduled job failed: {e}")
+            idle = self.scheduler.idle_seconds
+            delay = self.max_idle if idle is None else min(self.max_idle, max(1.0, idle))
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self):
+        """Re-plan the next wake-up; safe from any thread"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stop(self):
+        self._stopped = True
+        self.wake()
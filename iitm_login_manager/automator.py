@@ -5,36 +5,35 @@ Enhanced version with better error handling and status reporting
 """
 
 import requests
-import re
 from bs4 import BeautifulSoup
 import time
-import json
-import os
-from datetime import datetime, timedelta
-import threading
-import logging
+from urllib.parse import urlparse
 from typing import Optional, Dict, Any, Tuple
 
-class LoginStatus:
-    SUCCESS = "success"
-    FAILED = "failed"
-    IN_PROGRESS = "in_progress"
-    NETWORK_ERROR = "network_error"
-    AUTH_ERROR = "auth_error"
-    UNKNOWN = "unknown"
+from .engine import (LoginEngine, LoginStatus, ACTIVE_KEYWORDS,
+                     classify_login_response, classify_approval_response, approval_submit_url)
+from .probe import ConnectivityProber
+from .resolver import Resolver, ResolverAdapter, install_resolver
+from .deadline import Deadline
+from .cancel import CancelToken
 
-class IITMNetAccessAutomator:
-    def __init__(self, username: str = None, password: str = None, callback=None):
-        self.username = username
-        self.password = password
+def release_soup(soup: BeautifulSoup):
+    """Free a parsed page right away
+
+    The tree is full of reference cycles, so merely dropping it leaves it
+    to the next cyclic collection. decompose() on the soup itself misses
+    the root's children, hence clear() first.
+    """
+    soup.clear(decompose=True)
+    soup.decompose()
+
+class IITMNetAccessAutomator(LoginEngine):
+    def __init__(self, username: str = None, password: str = None, callback=None,
+                 interface: str = None, source_address: str = None, bind_device: bool = False,
+                 resolver: Resolver = None):
+        super().__init__(username, password, callback, interface=interface, source_address=source_address)
         self.session = requests.Session()
-        self.callback = callback  # For status updates
-        self.status = LoginStatus.UNKNOWN
-        self.last_login_time = None
-        self.next_login_time = None
-        
-        # Setup logging
-        self.logger = logging.getLogger(__name__)
+        device = interface if bind_device else None
         
         # Set headers to mimic a real browser
         self.session.headers.update({
@@ -46,62 +45,142 @@ class IITMNetAccessAutomator:
             'Upgrade-Insecure-Requests': '1',
         })
         
-        self.base_url = 'https://netaccess.iitm.ac.in'
-        self.login_url = f'{self.base_url}/account/login'
-        
-    def set_credentials(self, username: str, password: str):
-        """Set login credentials"""
-        self.username = username
-        self.password = password
+        # Shared DNS cache with dual-stack connection racing for portal and probes
+        self.resolver = resolver or Resolver()
+        install_resolver(self.session, self.resolver, source_address=source_address, device=device)
         
-    def _notify_status(self, status: str, message: str = ""):
-        """Notify about status change"""
-        self.status = status
-        if self.callback:
-            self.callback(status, message)
-        self.logger.info(f"Status: {status} - {message}")
+        # Cheap captive-portal aware probe used by the heartbeat
+        self.prober = ConnectivityProber(resolver=self.resolver, rtt=self.rtt,
+                                         source_address=source_address, device=device)
         
-    def log(self, message: str):
-        """Log messages with timestamp"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        log_msg = f"[{timestamp}] {message}"
-        print(log_msg)
-        self.logger.info(message)
+        # Filled in by prewarm() ahead of scheduled logins
+        self.portal_addresses = []
+        self._prefetched_login = None
+        self.prefetch_max_age = 60  # seconds a prefetched login page stays usable
         
-    def get_login_page(self) -> Optional[Dict[str, Any]]:
+    def _request(self, method: str, url: str, deadline: Deadline, cap: float, **kwargs) -> requests.Response:
+        """Session request with an adaptive timeout
+
+        The timeout comes from the RTT observed for this host and login phase
+        (cap when there is no history yet), limited to the run's remaining
+        budget.
+        """
+        host, phase = urlparse(url).hostname, deadline.current_phase
+        try:
+            response = self.session.request(
+                method, url, timeout=deadline.timeout(self.rtt.timeout(host, cap, phase)), **kwargs
+            )
+        except requests.RequestException as e:
+            if isinstance(e, requests.Timeout):
+                self.rtt.on_timeout(host, phase)
+            deadline.check()  # a cancelled run fails with Cancelled, not a connection error
+            raise
+        self.rtt.observe(host, response.elapsed.total_seconds(), phase)
+        return response
+    
+    def _adapters(self):
+        for session in (self.session, self.prober.session):
+            for adapter in set(session.adapters.values()):
+                adapter = getattr(adapter, 'inner', adapter)  # under a cassette
+                if isinstance(adapter, ResolverAdapter):
+                    yield adapter
+    
+    def _bind_transport(self, token: Optional[CancelToken]):
+        for adapter in self._adapters():
+            adapter.token = token
+    
+    def _abort_requests(self):
+        for adapter in self._adapters():
+            adapter.abort()
+    
+    def get_login_page(self, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
         """Get the login page and extract necessary information"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('login_page')
         self.log("Fetching login page...")
         try:
-            response = self.session.get(self.login_url, timeout=10)
+            response = self._request('GET', self.login_url, deadline, 10)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find the login form
-            login_form = soup.find('form')
-            if not login_form:
-                self.log("ERROR: Could not find login form")
-                return None
-                
-            # Extract any hidden fields or CSRF tokens
-            hidden_fields = {}
-            for hidden in login_form.find_all('input', type='hidden'):
-                if hidden.get('name') and hidden.get('value'):
-                    hidden_fields[hidden['name']] = hidden['value']
+            try:
+                # Find the login form
+                login_form = soup.find('form')
+                if not login_form:
+                    self.log("ERROR: Could not find login form")
+                    return None
                     
-            return {
-                'form_action': login_form.get('action', ''),
-                'hidden_fields': hidden_fields,
-                'cookies': response.cookies
-            }
+                # Extract any hidden fields or CSRF tokens
+                hidden_fields = {}
+                for hidden in login_form.find_all('input', type='hidden'):
+                    if hidden.get('name') and hidden.get('value'):
+                        hidden_fields[hidden['name']] = hidden['value']
+                        
+                return {
+                    'form_action': login_form.get('action', ''),
+                    'hidden_fields': hidden_fields,
+                    'cookies': dict(response.cookies)  # a copy: don't keep the response alive
+                }
+            finally:
+                release_soup(soup)
             
         except requests.RequestException as e:
             self.log(f"ERROR: Failed to fetch login page: {e}")
             self._notify_status(LoginStatus.NETWORK_ERROR, str(e))
             return None
     
-    def perform_login(self) -> Optional[requests.Response]:
+    def prewarm(self, prefetch: bool = False) -> Dict[str, float]:
+        """Warm DNS, TCP and TLS to the portal ahead of a planned login
+
+        Resolves the portal host, then makes a HEAD request so a keep-alive
+        TLS connection is left in the session pool for the login to reuse.
+        With prefetch=True the login page is fetched as well and kept for
+        perform_login(), but only if it carries no hidden (volatile) fields.
+        Returns the time taken by each step in seconds.
+        """
+        timings = {}
+        host = urlparse(self.base_url).hostname
+        if self.off_campus():
+            return timings
+        self.log(f"Pre-warming connection to {host}...")
+        
+        start = time.monotonic()
+        try:
+            self.portal_addresses = self.resolver.resolve(host, 443)
+        except OSError as e:
+            self.log(f"Pre-warm: could not resolve {host}: {e}")
+            return timings
+        timings['dns'] = time.monotonic() - start
+        
+        start = time.monotonic()
+        try:
+            self.session.head(self.login_url, timeout=5, allow_redirects=False)
+        except requests.RequestException as e:
+            self.log(f"Pre-warm: could not connect to portal: {e}")
+            return timings
+        timings['connect'] = time.monotonic() - start
+        
+        if prefetch:
+            start = time.monotonic()
+            login_info = self.get_login_page()
+            if login_info and not login_info['hidden_fields']:
+                self._prefetched_login = (time.monotonic(), login_info)
+            timings['prefetch'] = time.monotonic() - start
+        
+        self.log("Pre-warm done: " + ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in timings.items()))
+        return timings
+    
+    def _take_prefetched_login_page(self) -> Optional[Dict[str, Any]]:
+        """Return the prefetched login page info once, if still fresh"""
+        prefetched, self._prefetched_login = self._prefetched_login, None
+        if prefetched and time.monotonic() - prefetched[0] <= self.prefetch_max_age:
+            self.log("Using prefetched login page")
+            return prefetched[1]
+        return None
+    
+    def perform_login(self, deadline: Optional[Deadline] = None) -> Optional[requests.Response]:
         """Perform the login using credentials"""
+        deadline = Deadline.coerce(deadline)
         if not self.username or not self.password:
             self._notify_status(LoginStatus.AUTH_ERROR, "No credentials provided")
             return None
@@ -110,7 +189,7 @@ class IITMNetAccessAutomator:
         self._notify_status(LoginStatus.IN_PROGRESS, "Logging in...")
         
         # Get login page info
-        login_info = self.get_login_page()
+        login_info = self._take_prefetched_login_page() or self.get_login_page(deadline)
         if not login_info:
             return None
             
@@ -131,23 +210,24 @@ class IITMNetAccessAutomator:
             'Referer': self.login_url,
         }
         
+        deadline.enter('login')
         try:
             # Perform login
-            response = self.session.post(
-                self.login_url,
+            response = self._request(
+                'POST', self.login_url, deadline, 15,
                 data=login_data,
                 headers=headers,
-                allow_redirects=True,
-                timeout=15
+                allow_redirects=True
             )
             
             # Check if login was successful
-            if response.status_code == 200:
+            outcome = classify_login_response(response.status_code, response.text)
+            if outcome != 'http_error':
                 # Check for success indicators
-                if 'logout' in response.text.lower() or 'dashboard' in response.text.lower():
+                if outcome == 'success':
                     self.log("Login successful!")
                     return response
-                elif 'invalid' in response.text.lower() or 'error' in response.text.lower():
+                elif outcome == 'invalid':
                     self.log("ERROR: Invalid credentials")
                     self._notify_status(LoginStatus.AUTH_ERROR, "Invalid credentials")
                     return None
@@ -164,14 +244,18 @@ class IITMNetAccessAutomator:
             self._notify_status(LoginStatus.NETWORK_ERROR, str(e))
             return None
     
-    def handle_access_options(self, response: requests.Response) -> requests.Response:
+    def handle_access_options(self, response: requests.Response,
+                              deadline: Optional[Deadline] = None) -> requests.Response:
         """Handle the access options page (one day option, allow button)"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('approve')
         self.log("Processing access options...")
         
         soup = BeautifulSoup(response.text, 'html.parser')
         
         # Look for the approve button/link
-        approve_link = soup.find('a', href='/account/approve')
+        approve_link = soup.find('a', href='/account/approve') is not None
+        release_soup(soup)
         if approve_link:
             self.log("Found approve link for proxy-less access!")
             
@@ -180,10 +264,9 @@ class IITMNetAccessAutomator:
                 approve_url = f"{self.base_url}/account/approve"
                 self.log(f"Accessing approval URL: {approve_url}")
                 
-                approve_response = self.session.get(
-                    approve_url,
-                    headers={'Referer': response.url},
-                    timeout=10
+                approve_response = self._request(
+                    'GET', approve_url, deadline, 10,
+                    headers={'Referer': response.url}
                 )
                 
                 if approve_response.status_code == 200:
@@ -196,65 +279,35 @@ class IITMNetAccessAutomator:
                     forms = approve_soup.find_all('form')
                     self.log(f"Found {len(forms)} forms on approval page")
                     
-                    for i, form in enumerate(forms):
-                        self.log(f"Processing approval form {i+1}")
-                        
-                        # Extract form data
-                        form_data = {}
-                        action = form.get('action', '')
-                        
-                        # Get all input fields
-                        for input_field in form.find_all('input'):
-                            name = input_field.get('name')
-                            value = input_field.get('value', '')
-                            input_type = input_field.get('type', 'text')
-                            
-                            if name:
-                                if input_type == 'radio':
-                                    # Look for duration options (1 day, 1 week, 1 month)
-                                    if 'day' in str(input_field.parent).lower() or 'day' in value.lower():
-                                        form_data[name] = value
-                                        self.log(f"Selected duration option: {name}={value}")
-                                elif input_type in ['hidden', 'submit']:
-                                    form_data[name] = value
-                                elif name.lower() in ['duration', 'period']:
-                                    # Default to shortest duration if available
-                                    form_data[name] = value
-                        
-                        # Also look for buttons
-                        for button in form.find_all('button'):
-                            name = button.get('name')
-                            if name:
-                                form_data[name] = button.get('value', '')
-                                self.log(f"Added button: {name}")
-                        
-                        self.log(f"Approval form data to submit: {form_data}")
-                        
+                    approval_forms = [self._extract_approval_form(i, form) for i, form in enumerate(forms)]
+                    release_soup(approve_soup)  # only the extracted fields are needed from here on
+                    
+                    for action, form_data in approval_forms:
                         # Submit the approval form
                         try:
-                            submit_url = f"{self.base_url}{action}" if action.startswith('/') else f"{self.base_url}/account/approve"
-                            if action and not action.startswith('/') and not action.startswith('http'):
-                                submit_url = f"{self.base_url}/{action}"
+                            submit_url = approval_submit_url(self.base_url, action)
                             
                             self.log(f"Submitting approval form to: {submit_url}")
                             
-                            final_response = self.session.post(
-                                submit_url,
+                            deadline.enter('approval_form')
+                            self._approval_sending(deadline)
+                            final_response = self._request(
+                                'POST', submit_url, deadline, 10,
                                 data=form_data,
                                 headers={
                                     'Referer': approve_response.url,
                                     'Content-Type': 'application/x-www-form-urlencoded'
-                                },
-                                timeout=10
+                                }
                             )
                             
                             if final_response.status_code == 200:
                                 self.log("Approval form submitted successfully")
                                 
                                 # Check if the approval was successful
-                                if 'authorized' in final_response.text.lower() or 'approved' in final_response.text.lower():
+                                outcome = classify_approval_response(final_response.text)
+                                if outcome == 'authorized':
                                     self.log("✅ Machine authorization successful!")
-                                elif 'error' in final_response.text.lower():
+                                elif outcome == 'error':
                                     self.log("❌ Authorization may have failed - check manually")
                                 else:
                                     self.log("⚠️ Authorization status unclear - proceeding anyway")
@@ -272,78 +325,77 @@ class IITMNetAccessAutomator:
                 self.log(f"ERROR: Failed to access approval URL: {e}")
         
         # Check if we're already on a success page
-        if any(keyword in response.text.lower() for keyword in ['welcome', 'success', 'internet access', 'activated']):
+        if any(keyword in response.text.lower() for keyword in ACTIVE_KEYWORDS):
             self.log("Appears to be already on success page - access may already be granted")
             return response
         
         return response
     
-    def check_internet_access(self) -> bool:
+    def _extract_approval_form(self, i: int, form) -> Tuple[str, Dict[str, str]]:
+        """(action, fields to submit) of one form on the approval page"""
+        self.log(f"Processing approval form {i+1}")
+        
+        # Extract form data
+        form_data = {}
+        action = form.get('action', '')
+        
+        # Get all input fields
+        for input_field in form.find_all('input'):
+            name = input_field.get('name')
+            value = input_field.get('value', '')
+            input_type = input_field.get('type', 'text')
+        
+            if name:
+                if input_type == 'radio':
+                    # Look for duration options (1 day, 1 week, 1 month)
+                    if 'day' in str(input_field.parent).lower() or 'day' in value.lower():
+                        form_data[name] = value
+                        self.log(f"Selected duration option: {name}={value}")
+                elif input_type in ['hidden', 'submit']:
+                    form_data[name] = value
+                elif name.lower() in ['duration', 'period']:
+                    # Default to shortest duration if available
+                    form_data[name] = value
+        
+        # Also look for buttons
+        for button in form.find_all('button'):
+            name = button.get('name')
+            if name:
+                form_data[name] = button.get('value', '')
+                self.log(f"Added button: {name}")
+        
+        self.log(f"Approval form data to submit: {form_data}")
+        return action, form_data
+    
+    def probe_access(self) -> bool:
+        """One generate_204 probe; True if it shows open internet access"""
+        return self.prober.probe().online
+    
+    def check_internet_access(self, deadline: Optional[Deadline] = None) -> bool:
         """Check if internet access is working"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('verify')
         self.log("Checking internet access...")
-        test_urls = [
-            'https://www.google.com',
-            'https://httpbin.org/ip',
-            'https://www.cloudflare.com'
-        ]
-        
-        for url in test_urls:
+        for url in self.internet_test_urls:
+            # Not _request(): these go out on the prober's session, but learn like the login steps
+            host = urlparse(url).hostname
             try:
-                test_response = requests.get(url, timeout=10)
-                if test_response.status_code == 200:
-                    self.log("✅ Internet access is working!")
-                    return True
-            except requests.RequestException:
+                timeout = self.rtt.timeout(host, 10, 'verify')
+                test_response = self.prober.session.get(url, timeout=deadline.timeout(timeout))
+            except requests.RequestException as e:
+                if isinstance(e, requests.Timeout):
+                    self.rtt.on_timeout(host, 'verify')
                 continue
+            self.rtt.observe(host, test_response.elapsed.total_seconds(), 'verify')
+            if test_response.status_code == 200:
+                self.log("✅ Internet access is working!")
+                return True
                 
         self.log("❌ No internet access detected")
         return False
     
-    def automate_login(self) -> bool:
-        """Main automation function"""
-        self.log("Starting IITM Internet Access automation...")
-        
-        # Step 1: Perform login
-        login_response = self.perform_login()
-        if not login_response:
-            self.log("❌ Login failed. Please check your credentials.")
-            self._notify_status(LoginStatus.FAILED, "Login failed")
-            return False
-        
-        # Step 2: Handle access options
-        final_response = self.handle_access_options(login_response)
-        
-        # Step 3: Wait for access to propagate
-        self.log("Waiting for internet access to activate...")
-        time.sleep(10)
-        
-        # Step 4: Verify internet access
-        if self.check_internet_access():
-            self.log("🎉 Automation completed successfully!")
-            self._notify_status(LoginStatus.SUCCESS, "Login successful")
-            self.last_login_time = datetime.now()
-            return True
-        else:
-            self.log("⚠️  Automation completed but internet access verification failed")
-            self.log("💡 This might be normal - try browsing manually to verify")
-            # Return True anyway since the automation steps completed
-            self._notify_status(LoginStatus.SUCCESS, "Login completed (verification unclear)")
-            self.last_login_time = datetime.now()
-            return True
-    
-    def automate_login_async(self):
-        """Run automation in a separate thread"""
-        thread = threading.Thread(target=self.automate_login)
-        thread.daemon = True
-        thread.start()
-        return thread
-    
     def get_status_info(self) -> Dict[str, Any]:
         """Get current status information"""
-        return {
-            'status': self.status,
-            'last_login_time': self.last_login_time.isoformat() if self.last_login_time else None,
-            'next_login_time': self.next_login_time.isoformat() if self.next_login_time else None,
-            'has_credentials': bool(self.username and self.password),
-            'internet_access': self.check_internet_access()
-        }
\ No newline at end of file
+        info = super().get_status_info()
+        info['dns_cache'] = self.resolver.stats()
+        return info
\ No newline at end of file
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Cancellation of running logins
+
+A CancelToken travels with a login run (inside its Deadline). Cancelling
+it wakes any cancellable sleep, makes the next phase or request check
+raise Cancelled, and runs the callbacks registered on it. The engines
+register one that shuts down their open sockets, so a request blocked in
+connect, send or recv fails at once instead of running out its timeout.
+Connections that finish connecting after the cancel are closed before
+anything is sent on them.
+"""
+
+import os
+import socket
+import threading
+from typing import Callable, List, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside a run whose CancelToken was cancelled"""
+
+    def __init__(self, reason: str = "Cancelled", phase: Optional[str] = None):
+        self.reason = reason
+        self.phase = phase
+        super().__init__(f"{reason} (during {phase})" if phase else reason)
+
+
+class CancelToken:
+    """Thread-safe, one-shot cancellation flag with callbacks"""
+
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "Cancelled"):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error while cancelling: {e}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Run callback when cancelled (right away if that already happened)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove(self, callback: Callable[[], None]):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def child(self) -> "CancelToken":
+        """Token cancelled along with this one, which can also be cancelled alone"""
+        child = CancelToken()
+        self.on_cancel(lambda: child.cancel(self.reason))
+        return child
+
+    def wait(self, seconds: Optional[float]) -> bool:
+        """Sleep up to seconds; True if cancelled meanwhile"""
+        return self._event.wait(seconds)
+
+    def check(self, phase: Optional[str] = None):
+        if self._event.is_set():
+            raise Cancelled(self.reason, phase)
+
+
+def abort_socket(sock) -> bool:
+    """Shut down a socket another thread may be blocked on
+
+    Works on a duplicate of the descriptor, so TLS sockets are cut at the
+    TCP level without touching their SSL state from this thread.
+    """
+    try:
+        fd = sock.fileno() if sock is not None else -1
+    except OSError:
+        return False
+    if fd < 0:
+        return False
+    try:
+        with socket.socket(fileno=os.dup(fd)) as dup:
+            dup.shutdown(socket.SHUT_RDWR)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Record/replay HTTP cassettes
+
+A cassette is a JSON file of HTTP exchanges. In record mode, CassetteAdapter
+wraps a session's real transport adapters and writes down every request and
+response (or connection error), with credentials redacted. In replay mode,
+it answers from the file without touching the network, optionally with the
+original timing. With a cassette on the automator's session and on its
+prober, the whole automate_login() flow runs offline and deterministically.
+"""
+
+import http.client
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3 import HTTPResponse
+
+REDACTED = "<redacted>"
+
+# Form fields and headers that never make it into a cassette
+SECRET_FIELDS = {'userlogin', 'userpassword', 'username', 'password', 'passwd', 'pass'}
+SECRET_HEADERS = {'authorization', 'cookie', 'proxy-authorization'}
+
+ERRORS = {
+    'ConnectTimeout': requests.ConnectTimeout,
+    'ReadTimeout': requests.ReadTimeout,
+    'Timeout': requests.Timeout,
+    'SSLError': requests.exceptions.SSLError,
+    'ConnectionError': requests.ConnectionError,
+}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay found no recorded exchange for a request"""
+
+
+class _RecordedMessage:
+    """Stands in for http.client.HTTPResponse so cookies are extracted as usual"""
+
+    def __init__(self, headers: List[List[str]], method: str):
+        self.msg = http.client.HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+        self._method = method
+
+    def isclosed(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class Cassette:
+    """A list of recorded exchanges, saved to and loaded from JSON"""
+
+    def __init__(self, path: Optional[str] = None, secrets: Optional[List[str]] = None,
+                 realtime: bool = False, speed: float = 1.0, allow_repeats: bool = True):
+        self.path = path
+        self.secrets = []
+        self.add_secrets(*(secrets or []))
+        self.realtime = realtime  # replay with the recorded response times
+        self.speed = speed  # >1 replays faster than recorded
+        self.allow_repeats = allow_repeats  # reuse the last match once a request's recordings run out
+        self.interactions = []
+        self.misses = 0
+        self._cursors = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "Cassette":
+        cassette = cls(path, **kwargs)
+        with open(path, 'r') as f:
+            cassette.interactions = json.load(f)['interactions']
+        return cassette
+
+    def save(self, path: Optional[str] = None):
+        """Write the cassette atomically"""
+        path = path or self.path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".cassette-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': 1, 'interactions': self.interactions}, f, indent=1)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def add_secrets(self, *secrets: Optional[str]):
+        """Values to blank out wherever they appear (too-short ones would mangle everything)"""
+        for secret in secrets:
+            if secret and len(secret) >= 3 and secret not in self.secrets:
+                self.secrets.append(secret)
+
+    def redact(self, text: str) -> str:
+        for secret in self.secrets:
+            text = text.replace(secret, REDACTED)
+        return text
+
+    def _redact_body(self, body) -> Optional[str]:
+        if body is None:
+            return None
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        fields = parse_qsl(body, keep_blank_values=True)
+        if fields and '=' in body:
+            body = urlencode([(k, REDACTED if k.lower() in SECRET_FIELDS else v) for k, v in fields])
+        return self.redact(body)
+
+    def _redact_headers(self, headers) -> List[List[str]]:
+        redacted = []
+        for name, value in headers:
+            if name.lower() in SECRET_HEADERS:
+                value = REDACTED
+            elif name.lower() == 'set-cookie':
+                cookie, _, attributes = value.partition(';')
+                value = cookie.split('=', 1)[0] + '=' + REDACTED + (';' + attributes if attributes else '')
+            redacted.append([name, self.redact(value)])
+        return redacted
+
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        return f"{method.upper()} {url}"
+
+    def record(self, request: requests.PreparedRequest, response: Optional[requests.Response],
+               elapsed: float, error: Optional[Exception] = None):
+        entry = {
+            'request': {
+                'method': request.method,
+                'url': self.redact(request.url),
+                'headers': self._redact_headers(request.headers.items()),
+                'body': self._redact_body(request.body),
+            },
+            'elapsed': round(elapsed, 6),
+        }
+        if error is not None:
+            entry['error'] = {'type': type(error).__name__, 'message': self.redact(str(error))}
+        else:
+            entry['response'] = {
+                'status': response.status_code,
+                'reason': response.reason,
+                'headers': self._redact_headers(response.raw.headers.items()
+                                                if response.raw is not None else response.headers.items()),
+                'body': self.redact(response.content.decode('utf-8', errors='replace')),
+            }
+        with self._lock:
+            self.interactions.append(entry)
+
+    def find(self, request: requests.PreparedRequest) -> Optional[Dict[str, object]]:
+        """Next unused recording for this method and URL"""
+        key = self._key(request.method, self.redact(request.url))
+        with self._lock:
+            matches = [i for i, entry in enumerate(self.interactions)
+                       if self._key(entry['request']['method'], entry['request']['url']) == key]
+            if not matches:
+                self.misses += 1
+                return None
+            cursor = self._cursors.get(key, 0)
+            if cursor >= len(matches):
+                if not self.allow_repeats:
+                    self.misses += 1
+                    return None
+                cursor = len(matches) - 1
+            self._cursors[key] = cursor + 1
+            return self.interactions[matches[cursor]]
+
+    def rewind(self):
+        with self._lock:
+            self._cursors.clear()
+            self.misses = 0
+
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter that records through another adapter or replays"""
+
+    def __init__(self, cassette: Cassette, mode: str = 'replay', inner: Optional[BaseAdapter] = None):
+        super().__init__()
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner or HTTPAdapter()
+        self._builder = HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == 'record':
+            start = time.perf_counter()
+            try:
+                response = self.inner.send(request, stream=False, timeout=timeout, verify=verify,
+                                           cert=cert, proxies=proxies)
+            except requests.RequestException as e:
+                self.cassette.record(request, None, time.perf_counter() - start, error=e)
+                raise
+            self.cassette.record(request, response, time.perf_counter() - start)
+            return response
+        return self._replay(request, timeout)
+
+    def _replay(self, request, timeout):
+        entry = self.cassette.find(request)
+        if entry is None:
+            raise CassetteMiss(f"No recorded response for {request.method} {request.url}", request=request)
+
+        elapsed = entry.get('elapsed', 0.0)
+        if self.cassette.realtime and elapsed:
+            limit = timeout[1] if isinstance(timeout, tuple) else timeout
+            delay = elapsed / self.cassette.speed
+            if limit is not None and delay > limit:
+                time.sleep(limit)
+                raise requests.ReadTimeout(f"Replayed response took {delay:.2f}s (timeout {limit}s)",
+                                           request=request)
+            time.sleep(delay)
+
+        if 'error' in entry:
+            error = ERRORS.get(entry['error']['type'], requests.ConnectionError)
+            raise error(entry['error']['message'], request=request)
+
+        recorded = entry['response']
+        body = recorded['body'].encode('utf-8')
+        headers = [(name, value) for name, value in recorded['headers']
+                   if name.lower() not in ('content-encoding', 'transfer-encoding', 'content-length')]
+        headers.append(('Content-Length', str(len(body))))
+        raw = HTTPResponse(
+            body=io.BytesIO(body), headers=headers, status=recorded['status'],
+            reason=recorded.get('reason'), preload_content=False, decode_content=False,
+            original_response=_RecordedMessage(headers, request.method),
+        )
+        response = self._builder.build_response(request, raw)
+        response.elapsed = timedelta(seconds=elapsed)
+        return response
+
+    def close(self):
+        self.inner.close()
+        self._builder.close()
+
+
+def install_cassette(session: requests.Session, cassette: Cassette, mode: str = 'replay'):
+    """Route every request of a session through the cassette
+
+    In record mode the session's current adapters (e.g. the resolver's) do
+    the real work underneath.
+    """
+    for prefix, adapter in list(session.adapters.items()):
+        if isinstance(adapter, CassetteAdapter):
+            adapter = adapter.inner
+        session.mount(prefix, CassetteAdapter(cassette, mode, inner=adapter))
+
+
+def use_cassette(automator, cassette: Cassette, mode: str = 'replay'):
+    """Put the automator's portal session and its prober on one cassette"""
+    cassette.add_secrets(automator.username, automator.password)
+    install_cassette(automator.session, cassette, mode)
+    install_cassette(automator.prober.session, cassette, mode)
+    return cassette
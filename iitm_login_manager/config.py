@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Configuration
+
+One place that reads ~/.config/iitm-login-manager/config.json. The file is
+parsed once per process and cached; later loads only stat it. Values are
+checked against SCHEMA, which also holds every default, and writes go
+through a temporary file and rename so a concurrent reader never sees a
+truncated file. A running tray can watch() the file with inotify and
+picks up changes made by the CLI (or an editor) without polling.
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .paths import CONFIG_FILE
+from .scheduling import SCHEDULE_TIMES
+
+_MISSING = object()
+
+
+class Option:
+    """Type, default and constraint of one setting"""
+
+    def __init__(self, types, default=None, check: Optional[Callable[[Any], bool]] = None, doc: str = ""):
+        self.types = types if isinstance(types, tuple) else (types,)
+        self.default = default
+        self.check = check
+        self.doc = doc
+
+    def valid(self, value) -> bool:
+        if value is None:
+            return self.default is None
+        if isinstance(value, bool) and bool not in self.types:
+            return False  # True is an int, but not a number of seconds
+        if not isinstance(value, self.types):
+            return False
+        return self.check is None or self.check(value)
+
+
+NUMBER = (int, float)
+
+
+def _positive(value) -> bool:
+    return value > 0
+
+
+def _non_negative(value) -> bool:
+    return value >= 0
+
+
+def _strings(value) -> bool:
+    return all(isinstance(item, str) and item for item in value)
+
+
+SCHEMA: Dict[str, Option] = {
+    # Account and schedule
+    'username': Option(str, '', doc="LDAP username; the password lives in the keyring"),
+    'schedule': Option(str, 'daily', lambda v: v in SCHEDULE_TIMES, "daily, twice or manual"),
+    'autostart': Option(bool, False),
+    'last_login': Option(str, None, doc="ISO time of the last successful login"),
+    'schedule_window': Option(NUMBER, 900, _non_negative,
+                              "Spread scheduled logins over this many seconds (per-host jitter)"),
+    'schedule_retries': Option(int, 3, _non_negative),
+    'prewarm_seconds': Option(NUMBER, 10, _non_negative),
+    'prewarm_prefetch': Option(bool, False),
+
+    # Probing and timeouts
+    'engine': Option(str, 'auto', lambda v: v in ('auto', 'requests', 'lite'),
+                     "Login engine; lite needs only the standard library"),
+    'probe_targets': Option(list, None, _strings, "generate_204 URLs (default: Google and Cloudflare)"),
+    'probe_timeout': Option(NUMBER, 5, _positive, "Seconds before a probe counts as offline"),
+    'login_budget': Option(NUMBER, 90, _positive, "Seconds one login attempt may take"),
+    'rtt_floor': Option(NUMBER, 0.3, _positive, "Shortest adaptive request timeout, in seconds"),
+    'rtt_ceiling': Option(NUMBER, 15, _positive, "Longest adaptive request timeout, in seconds"),
+    'pipelined_login': Option(bool, False, doc="Probe while approving; stop at the first sign of access"),
+    'heartbeat': Option(bool, True),
+    'heartbeat_min_interval': Option(NUMBER, 5, _positive),
+    'heartbeat_max_interval': Option(NUMBER, 300, _positive),
+
+    # Network layout
+    'interfaces': Option(list, None),
+    'campus_fingerprints': Option(list, None),
+    'cooperative': Option(bool, False),
+    'coop_key': Option(str, None),
+
+    # Session drops and prediction
+    'lease_hours': Option(NUMBER, 24, _positive),
+    'predictive_relogin': Option(bool, True),
+    'predict_min_confidence': Option(NUMBER, 0.6, lambda v: 0 <= v <= 1),
+    'predict_lead': Option(NUMBER, 300, _non_negative),
+
+    # Tray
+    'warm_start_max_age': Option(NUMBER, 1800, _non_negative),
+    'ui_interval': Option(NUMBER, 0.1, _non_negative),
+    'notify_window': Option(NUMBER, 60, _non_negative),
+    'memory_budget_mb': Option(NUMBER, 128, _non_negative,
+                               "RSS in MB past which the tray trims its caches and warns (0: no budget)"),
+    'event_loop': Option(str, 'threads', lambda v: v in ('threads', 'asyncio'),
+                         "asyncio: scheduler and probes as coroutines on the GTK loop (PyGObject 3.50+)"),
+}
+
+
+def validate(data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Drop values that do not fit the schema; returns (clean, problems)
+
+    Unknown keys are kept so a newer version's settings survive a save
+    from an older one.
+    """
+    if not isinstance(data, dict):
+        return {}, ["config is not a JSON object"]
+    clean, problems = {}, []
+    for key, value in data.items():
+        option = SCHEMA.get(key)
+        if option is not None and not option.valid(value):
+            problems.append(f"{key}={value!r} is invalid, using {option.default!r}")
+            continue
+        clean[key] = value
+    return clean, problems
+
+
+class Config:
+    """Cached, validated view of the config file
+
+    Reads like a dict; get() falls back to the schema default.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or CONFIG_FILE
+        self.data: Dict[str, Any] = {}
+        self.parses = 0
+        self.reloads = 0
+        self._stamp = None
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[Set[str]], None]] = []
+        self._watcher = None
+        self.load()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def load(self, force: bool = False) -> Dict[str, Any]:
+        """Parse the file if it changed since the last load"""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp == self._stamp and not force:
+                return self.data
+            data = {}
+            if stamp is not None:
+                try:
+                    with open(self.path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not load config: {e}")
+                    return self.data
+            data, problems = validate(data)
+            for problem in problems:
+                print(f"Warning: config: {problem}")
+            self.data = data
+            self._stamp = stamp
+            self.parses += 1
+            return self.data
+
+    def get(self, key: str, default=_MISSING):
+        with self._lock:
+            if key in self.data:
+                return self.data[key]
+        if default is not _MISSING:
+            return default
+        option = SCHEMA.get(key)
+        return option.default if option else None
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value):
+        option = SCHEMA.get(key)
+        if option is not None and not option.valid(value):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+        with self._lock:
+            self.data[key] = value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.data
+
+    def update(self, changes: Dict[str, Any]):
+        for key, value in changes.items():
+            self[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Every setting, with defaults filled in"""
+        with self._lock:
+            merged = {key: option.default for key, option in SCHEMA.items()}
+            merged.update(self.data)
+            return merged
+
+    def save(self):
+        """Write the file atomically (temp file in the same directory, then rename)"""
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".config-", suffix=".json")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(self.data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            # Our own write is not a change to report
+            self._stamp = self._file_stamp()
+
+    def watch(self, callback: Callable[[Set[str]], None]) -> bool:
+        """Call callback(changed keys) from a watcher thread when the file changes
+
+        Returns False when inotify is unavailable.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+            if self._watcher is not None:
+                return True
+            try:
+                self._watcher = _InotifyWatcher(self.path, self._on_file_event)
+            except OSError as e:
+                print(f"Warning: Config changes will need a restart: {e}")
+                return False
+        self._watcher.start()
+        return True
+
+    def stop_watching(self):
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+            self._listeners.clear()
+        if watcher is not None:
+            watcher.stop()
+
+    def _on_file_event(self):
+        with self._lock:
+            old = dict(self.data)
+            new = self.load()
+            changed = {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+            if not changed:
+                return
+            self.reloads += 1
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(changed)
+            except Exception as e:
+                print(f"Error applying config change: {e}")
+
+
+class _InotifyWatcher:
+    """Watch the config directory (renames replace the file) via libc inotify"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, path: str, on_change: Callable[[], None]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+        self.name = os.path.basename(path).encode()
+        self.on_change = on_change
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        self.fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(self.fd, directory.encode(), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"Cannot watch {directory}")
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread = threading.Thread(target=self._run, name="iitm-config-watch")
+        self._thread.daemon = True
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                ready, _, _ = select.select([self.fd, self._wake_r], [], [])
+                if self._wake_r in ready:
+                    break
+                if self._matches(os.read(self.fd, 4096)):
+                    self.on_change()
+        finally:
+            for fd in (self.fd, self._wake_r):
+                os.close(fd)
+
+    def _matches(self, buffer: bytes) -> bool:
+        offset = 0
+        while offset + self.EVENT.size <= len(buffer):
+            _, _, _, length = self.EVENT.unpack_from(buffer, offset)
+            offset += self.EVENT.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name == self.name:
+                return True
+        return False
+
+    def stop(self):
+        os.write(self._wake_w, b'x')
+        self._thread.join(timeout=2)
+        os.close(self._wake_w)
+
+
+_shared: Dict[str, Config] = {}
+_shared_lock = threading.Lock()
+
+
+def get_config(path: Optional[str] = None) -> Config:
+    """The process-wide Config for a path, created and parsed on first use"""
+    path = path or CONFIG_FILE
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = Config(path)
+        return _shared[path]
+
+
+def apply_probe_settings(config: Config, prober):
+    """Point a ConnectivityProber at the configured targets and timeout"""
+    targets = config.get('probe_targets')
+    if targets:
+        prober.targets = list(targets)
+    prober.timeout = config.get('probe_timeout')
+
+
+def apply_rtt_settings(config: Config, rtt):
+    """Bound an RTTEstimator's adaptive timeouts as configured"""
+    rtt.floor = config.get('rtt_floor')
+    rtt.ceiling = max(config.get('rtt_ceiling'), rtt.floor)
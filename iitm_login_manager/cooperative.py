@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - LAN-cooperative connectivity sharing
+
+Opt-in mode for rooms full of machines running the tray. Each instance
+announces its own probe results over UDP multicast (TTL 1, so they never
+leave the subnet) and listens for its neighbours' announcements. When a
+fresh peer observation exists, the heartbeat uses it instead of probing
+google.com/cloudflare.com itself, so probe traffic stays roughly constant
+per subnet instead of growing with the number of machines.
+
+Messages are signed with HMAC-SHA256 using a key shared by the lab
+('coop_key' in the config) and expire after a short time; unsigned, stale,
+replayed or foreign-gateway messages are dropped.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from .location import read_default_route
+from .probe import ProbeResult, ProbeState
+
+PROTOCOL_VERSION = 1
+
+
+class PeerObservation:
+    """A verified announcement from another instance"""
+
+    def __init__(self, node: str, state: str, sent: float, received: float, gateway: Optional[str]):
+        self.node = node
+        self.state = state
+        self.sent = sent
+        self.received = received  # time.monotonic() on arrival
+        self.gateway = gateway
+
+    def age(self) -> float:
+        return time.monotonic() - self.received
+
+    def to_probe_result(self) -> ProbeResult:
+        return ProbeResult(self.state, 0.0, 0, f"peer:{self.node}", "shared by peer", source="peer")
+
+
+class CooperativeStatus:
+    """Multicast announcer and listener for connectivity observations"""
+
+    GROUP = "239.255.77.77"
+    PORT = 47477
+
+    def __init__(self, key: bytes, group: str = GROUP, port: int = PORT,
+                 interface_address: str = "0.0.0.0", max_age: float = 60,
+                 max_skew: float = 30, gateway: Callable[[], Optional[str]] = None):
+        if not key:
+            raise ValueError("Cooperative mode needs a shared key to sign messages")
+        self.key = key if isinstance(key, bytes) else key.encode()
+        self.group = group
+        self.port = port
+        self.interface_address = interface_address
+        self.max_age = max_age
+        self.max_skew = max_skew
+        self.gateway = gateway or (lambda: read_default_route()[1])
+        self.node_id = os.urandom(6).hex()
+
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._latest = None  # newest PeerObservation
+        self._last_seq = OrderedDict()  # node -> last sequence number (replay protection)
+        self._sock = None
+        self._send_sock = None
+        self._thread = None
+        self._running = False
+        self.stats = {
+            'sent': 0, 'received': 0, 'accepted': 0,
+            'bad_signature': 0, 'stale': 0, 'replayed': 0, 'other_gateway': 0, 'malformed': 0,
+        }
+
+    def start(self):
+        """Join the multicast group and start listening"""
+        if self._running:
+            return
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(('', self.port))
+        membership = struct.pack('4s4s', socket.inet_aton(self.group), socket.inet_aton(self.interface_address))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.settimeout(0.5)
+
+        send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if self.interface_address != "0.0.0.0":
+            send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                                 socket.inet_aton(self.interface_address))
+
+        self._sock, self._send_sock = sock, send_sock
+        self._running = True
+        self._thread = threading.Thread(target=self._listen, name="iitm-coop")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        for sock in (self._sock, self._send_sock):
+            if sock:
+                sock.close()
+        self._sock = self._send_sock = None
+
+    def announce(self, result: ProbeResult):
+        """Share one of our own probe results with the subnet"""
+        if self._send_sock is None or getattr(result, 'source', 'local') != 'local':
+            return
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        payload = json.dumps({
+            'v': PROTOCOL_VERSION,
+            'node': self.node_id,
+            'seq': seq,
+            'ts': time.time(),
+            'state': result.state,
+            'gateway': self.gateway(),
+        }, separators=(',', ':'))
+        packet = json.dumps({'p': payload, 's': self._sign(payload)}).encode()
+        try:
+            self._send_sock.sendto(packet, (self.group, self.port))
+            self.stats['sent'] += 1
+        except OSError as e:
+            print(f"Warning: Could not send cooperative status: {e}")
+
+    def fresh_observation(self, max_age: Optional[float] = None) -> Optional[ProbeResult]:
+        """The newest peer observation, if it is recent enough"""
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            latest = self._latest
+        if latest is None or latest.age() > max_age:
+            return None
+        return latest.to_probe_result()
+
+    def _sign(self, payload: str) -> str:
+        return hmac.new(self.key, payload.encode(), hashlib.sha256).hexdigest()
+
+    def handle_packet(self, data: bytes) -> Optional[PeerObservation]:
+        """Verify one datagram; returns the observation if it is accepted"""
+        self.stats['received'] += 1
+        try:
+            envelope = json.loads(data.decode())
+            payload = envelope['p']
+            signature = envelope['s']
+        except (ValueError, KeyError, TypeError, UnicodeDecodeError):
+            self.stats['malformed'] += 1
+            return None
+
+        if not hmac.compare_digest(self._sign(payload), str(signature)):
+            self.stats['bad_signature'] += 1
+            return None
+
+        try:
+            message = json.loads(payload)
+            node = str(message['node'])
+            seq = int(message['seq'])
+            sent = float(message['ts'])
+            state = message['state']
+        except (ValueError, KeyError, TypeError):
+            self.stats['malformed'] += 1
+            return None
+
+        if node == self.node_id or message.get('v') != PROTOCOL_VERSION:
+            return None
+        if state not in (ProbeState.ONLINE, ProbeState.CAPTIVE, ProbeState.OFFLINE):
+            self.stats['malformed'] += 1
+            return None
+        if abs(time.time() - sent) > self.max_skew:
+            self.stats['stale'] += 1
+            return None
+
+        gateway = message.get('gateway')
+        own_gateway = self.gateway()
+        if gateway and own_gateway and gateway != own_gateway:
+            self.stats['other_gateway'] += 1
+            return None
+
+        with self._lock:
+            if seq <= self._last_seq.get(node, 0):
+                self.stats['replayed'] += 1
+                return None
+            self._last_seq[node] = seq
+            self._last_seq.move_to_end(node)
+            while len(self._last_seq) > 256:
+                self._last_seq.popitem(last=False)
+            observation = PeerObservation(node, state, sent, time.monotonic(), gateway)
+            self._latest = observation
+        self.stats['accepted'] += 1
+        return observation
+
+    def _listen(self):
+        while self._running:
+            try:
+                data, _ = self._sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break  # socket closed by stop()
+            self.handle_packet(data)
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Time budget for a whole login run
+
+A Deadline is created once per run and passed through every phase and
+HTTP call. Each request's timeout is derived from what is left of the
+budget, so the run as a whole can't take longer than asked for.
+"""
+
+import time
+from typing import Dict, Optional, Union
+
+from .cancel import CancelToken
+
+
+class BudgetExceeded(Exception):
+    """Raised when a phase runs out of the run's time budget"""
+
+    def __init__(self, phase: Optional[str], budget: Optional[float] = None):
+        self.phase = phase or "login"
+        self.budget = budget
+        if budget is not None:
+            super().__init__(f"Phase '{self.phase}' exceeded budget ({budget:g}s)")
+        else:
+            super().__init__(f"Phase '{self.phase}' exceeded budget")
+
+
+class Deadline:
+    """Remaining-time tracker with per-phase timings
+
+    Deadline(None) never expires; timeout() then just returns the cap,
+    which keeps the automator's original per-request timeouts. An optional
+    CancelToken is checked wherever the budget is.
+    """
+
+    def __init__(self, budget: Optional[float] = None, token: Optional[CancelToken] = None):
+        self.budget = budget
+        self.token = token
+        self.started = time.monotonic()
+        self.expires = None if budget is None else self.started + budget
+        self.current_phase = None
+        self._phase_started = None
+        self.timings = {}  # phase -> seconds spent
+
+    @classmethod
+    def coerce(cls, value: Union["Deadline", float, None]) -> "Deadline":
+        """Accept a Deadline, a number of seconds or None"""
+        if isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None for an unlimited budget"""
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def expired(self) -> bool:
+        return self.expires is not None and time.monotonic() >= self.expires
+
+    def check(self):
+        """Raise Cancelled or BudgetExceeded if the run must stop"""
+        if self.token is not None:
+            self.token.check(self.current_phase)
+        if self.expired:
+            raise BudgetExceeded(self.current_phase, self.budget)
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next call: cap, limited to the remaining budget"""
+        if self.token is not None:
+            self.token.check(self.current_phase)
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if remaining <= 0:
+            raise BudgetExceeded(self.current_phase, self.budget)
+        return min(cap, remaining)
+
+    def sleep(self, seconds: float):
+        """Sleep, but not past the deadline, and wake up when cancelled"""
+        remaining = self.remaining()
+        short = remaining is not None and remaining < seconds
+        duration = remaining if short else seconds
+        if self.token is not None:
+            if self.token.wait(duration):
+                self.token.check(self.current_phase)
+        else:
+            time.sleep(duration)
+        if short:
+            raise BudgetExceeded(self.current_phase, self.budget)
+
+    def enter(self, phase: str):
+        """Start a new phase; later budget errors are attributed to it"""
+        self._close_phase()
+        self.current_phase = phase
+        self._phase_started = time.monotonic()
+        self.check()
+
+    def finish(self):
+        """Stop timing the current phase"""
+        self._close_phase()
+
+    def _close_phase(self):
+        if self.current_phase is not None and self._phase_started is not None:
+            spent = time.monotonic() - self._phase_started
+            self.timings[self.current_phase] = self.timings.get(self.current_phase, 0.0) + spent
+        self._phase_started = None
+
+    def phase_timings(self) -> Dict[str, float]:
+        """Copy of the time spent per phase, plus the total"""
+        timings = dict(self.timings)
+        if self.current_phase is not None and self._phase_started is not None:
+            timings[self.current_phase] = timings.get(self.current_phase, 0.0) + \
+                time.monotonic() - self._phase_started
+        timings['total'] = self.elapsed()
+        return timings
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Engine-independent login flow
+
+LoginEngine holds what every login engine shares: status reporting, the
+single-flight and cross-process login lock, the time budget, off-campus
+detection, history recording and the order of the steps. Subclasses
+supply the HTTP side (get_login_page, perform_login,
+handle_access_options, check_internet_access): IITMNetAccessAutomator
+with requests and BeautifulSoup, LiteAutomator with the standard library
+only. Both classify portal responses with the helpers below, so they
+agree on every outcome.
+
+Nothing here imports a third-party package.
+"""
+
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Optional
+
+from .singleflight import SingleFlight, LoginLock
+from .paths import runtime_path
+from .deadline import Deadline, BudgetExceeded
+from .cancel import CancelToken, Cancelled
+from .events import EventBus
+from .pipeline import VerificationRace
+from .rtt import RTTEstimator
+from .location import LocationDetector
+
+class LoginStatus:
+    SUCCESS = "success"
+    FAILED = "failed"
+    IN_PROGRESS = "in_progress"
+    NETWORK_ERROR = "network_error"
+    AUTH_ERROR = "auth_error"
+    TIMEOUT = "timeout"
+    OFF_CAMPUS = "off_campus"
+    CANCELLED = "cancelled"
+    UNKNOWN = "unknown"
+
+# Text on a page that says access is already granted
+ACTIVE_KEYWORDS = ['welcome', 'success', 'internet access', 'activated']
+
+# Pages checked by check_internet_access()
+INTERNET_TEST_URLS = [
+    'https://www.google.com',
+    'https://httpbin.org/ip',
+    'https://www.cloudflare.com'
+]
+
+def classify_login_response(status_code: int, text: str) -> str:
+    """'success', 'invalid', 'unclear' or 'http_error' for the login POST's answer"""
+    if status_code != 200:
+        return 'http_error'
+    text = text.lower()
+    if 'logout' in text or 'dashboard' in text:
+        return 'success'
+    if 'invalid' in text or 'error' in text:
+        return 'invalid'
+    return 'unclear'
+
+def classify_approval_response(text: str) -> str:
+    """'authorized', 'error' or 'unclear' for the approval form's answer"""
+    text = text.lower()
+    if 'authorized' in text or 'approved' in text:
+        return 'authorized'
+    if 'error' in text:
+        return 'error'
+    return 'unclear'
+
+def approval_submit_url(base_url: str, action: str) -> str:
+    """Where an approval form posts to"""
+    submit_url = f"{base_url}{action}" if action.startswith('/') else f"{base_url}/account/approve"
+    if action and not action.startswith('/') and not action.startswith('http'):
+        submit_url = f"{base_url}/{action}"
+    return submit_url
+
+class LoginEngine:
+    """Login flow shared by the requests and standard-library engines"""
+    
+    def __init__(self, username: str = None, password: str = None, callback=None,
+                 interface: str = None, source_address: str = None):
+        self.username = username
+        self.password = password
+        
+        # Optional pinning to one network interface (see interfaces.py)
+        self.interface = interface
+        self.source_address = source_address
+        self.callback = callback  # For status updates
+        self.status = LoginStatus.UNKNOWN
+        self.last_login_time = None
+        self.next_login_time = None
+        self.last_phase_timings = {}
+        
+        # Only one login may run at a time, in this process and across processes
+        self._login_flight = SingleFlight()
+        self._login_thread = None
+        self._tokens = set()  # CancelTokens of runs in progress
+        self._tokens_lock = threading.Lock()
+        
+        # Setup logging; the tray replaces events with its own bus so one
+        # --watch stream covers every automator
+        self.logger = logging.getLogger(__name__)
+        self.events = EventBus()
+        
+        self.base_url = 'https://netaccess.iitm.ac.in'
+        self.login_url = f'{self.base_url}/account/login'
+        
+        # Per-host RTT history; request timeouts are derived from it
+        self.rtt = RTTEstimator.load()
+        
+        # Zero-network check that skips portal work when not on campus
+        self.location = LocationDetector()
+        self.skip_off_campus = True
+        
+        # Seconds to wait after approval before verifying access
+        self.activation_wait = 10
+        self.internet_test_urls = list(INTERNET_TEST_URLS)
+        
+        # Race connectivity probes against the approval step (see pipeline.py)
+        self.pipelined = False
+        self._race = None
+        
+        # Optional HistoryStore that records every login attempt
+        self.history = None
+        
+    def set_credentials(self, username: str, password: str):
+        """Set login credentials"""
+        self.username = username
+        self.password = password
+        
+    def _notify_status(self, status: str, message: str = ""):
+        """Notify about status change"""
+        self.status = status
+        if self.callback:
+            self.callback(status, message)
+        self.events.publish('status', status=status, message=message, interface=self.interface)
+        self.logger.info(f"Status: {status} - {message}")
+        
+    def log(self, message: str):
+        """Log messages with timestamp"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        log_msg = f"[{timestamp}] {message}"
+        print(log_msg)
+        self.events.publish('log', message=message, interface=self.interface)
+        self.logger.info(message)
+    
+    def automate_login(self, timeout: Optional[float] = None, token: Optional[CancelToken] = None) -> bool:
+        """Main automation function
+
+        Concurrent calls share a single run: callers in this process join the
+        login already in flight, and a login started by another process (e.g.
+        the tray) is waited for and its result reported instead of racing it.
+        
+        timeout is the budget in seconds for the whole run; every phase and
+        request timeout is derived from what is left of it. Cancelling token
+        (or calling cancel()) stops the run within milliseconds; it then
+        returns False with status CANCELLED.
+        """
+        deadline = Deadline(timeout, token or CancelToken())
+        return self._login_flight.run(
+            self._run_cancellable, deadline,
+            on_join=lambda: self.log("Login already in progress, waiting for its result...")
+        )
+    
+    def cancel(self, reason: str = "Cancelled") -> bool:
+        """Cancel the login in progress, if any; True if there was one"""
+        with self._tokens_lock:
+            tokens = list(self._tokens)
+        for token in tokens:
+            token.cancel(reason)
+        return bool(tokens)
+    
+    def _bind_transport(self, token: Optional[CancelToken]):
+        """Let the HTTP layer refuse new connections once token is cancelled"""
+    
+    def _abort_requests(self):
+        """Shut down open connections so blocked requests fail at once"""
+    
+    def _run_cancellable(self, deadline: Deadline) -> bool:
+        token = deadline.token
+        with self._tokens_lock:
+            self._tokens.add(token)
+        self._bind_transport(token)
+        token.on_cancel(self._abort_requests)
+        try:
+            return self._automate_login_locked(deadline)
+        finally:
+            token.remove(self._abort_requests)
+            self._bind_transport(None)
+            with self._tokens_lock:
+                self._tokens.discard(token)
+    
+    def off_campus(self) -> bool:
+        """Whether the local network state rules out reaching the portal"""
+        if not self.skip_off_campus:
+            return False
+        result = self.location.detect()
+        if result.skip:
+            self.log(f"Not on the campus network ({result.reason}), skipping portal")
+        return result.skip
+    
+    def _automate_login_locked(self, deadline: Deadline) -> bool:
+        """Run the login while holding the cross-process login lock"""
+        if self.off_campus():
+            self._notify_status(LoginStatus.OFF_CAMPUS, "Not on campus network")
+            return False
+        
+        # Logins on different interfaces are independent and get their own lock
+        lock = LoginLock(runtime_path(f"login-{self.interface}.lock") if self.interface else None)
+        try:
+            joined = lock.acquire(
+                on_wait=lambda: self.log("Another process is logging in, waiting for it to finish..."),
+                timeout=deadline.remaining(),
+                should_stop=lambda: deadline.token.cancelled
+            )
+        except TimeoutError:
+            return self._budget_exceeded(BudgetExceeded('waiting_for_other_login', deadline.budget), deadline)
+        except InterruptedError:
+            return self._cancelled(Cancelled(deadline.token.reason, 'waiting_for_other_login'), deadline)
+        except OSError as e:
+            self.log(f"Warning: Could not take login lock: {e}")
+            joined = None
+        
+        if joined is not None:
+            if joined:
+                self.log("✅ Login completed by another process")
+                self._notify_status(LoginStatus.SUCCESS, "Login completed by another process")
+                self.last_login_time = datetime.now()
+            else:
+                self.log("❌ Login attempted by another process failed")
+                self._notify_status(LoginStatus.FAILED, "Login by another process failed")
+            return joined
+        
+        try:
+            try:
+                result = self._run_login(deadline)
+            except BudgetExceeded as e:
+                result = self._budget_exceeded(e, deadline)
+            except Cancelled as e:
+                # No result recorded: a process waiting for us logs in itself
+                return self._cancelled(e, deadline)
+            lock.record(result)
+            return result
+        finally:
+            lock.release()
+            deadline.finish()
+            self.rtt.save()
+            self.last_phase_timings = deadline.phase_timings()
+            self._record_history()
+            self.events.publish('login', status=self.status, duration=self.last_phase_timings.get('total'),
+                                phases=self.last_phase_timings, interface=self.interface)
+    
+    def _record_history(self):
+        """Append the finished attempt to the history store, if one is set"""
+        if self.history is None:
+            return
+        try:
+            self.history.record_login(self.status, self.last_phase_timings.get('total'),
+                                      self.last_phase_timings, self.interface)
+        except sqlite3.Error as e:
+            self.log(f"Warning: Could not record login history: {e}")
+    
+    def _budget_exceeded(self, error: BudgetExceeded, deadline: Deadline) -> bool:
+        """Abort the run after a phase ran out of time"""
+        self.log(f"❌ {error} after {deadline.elapsed():.1f}s")
+        self._notify_status(LoginStatus.TIMEOUT, str(error))
+        return False
+    
+    def _cancelled(self, error: Cancelled, deadline: Deadline) -> bool:
+        """Stop the run after its token was cancelled"""
+        self.log(f"Login cancelled: {error} after {deadline.elapsed():.2f}s")
+        self._notify_status(LoginStatus.CANCELLED, error.reason)
+        return False
+    
+    def _run_login(self, deadline: Deadline) -> bool:
+        """Perform the full login sequence"""
+        self.log("Starting IITM Internet Access automation...")
+        
+        # Step 1: Perform login
+        login_response = self.perform_login(deadline)
+        if not login_response:
+            self.log("❌ Login failed. Please check your credentials.")
+            self._notify_status(LoginStatus.FAILED, "Login failed")
+            return False
+        
+        # Step 2: Handle access options (pipelined: probes start with the approval request)
+        # Step 3: Wait for access to propagate, unless the race has confirmed it
+        race = None
+        try:
+            final_response = self.handle_access_options(login_response, deadline)
+            race = self._race
+            if race is not None:
+                race.answered(classify_approval_response(final_response.text) == 'authorized')
+            if race is None or race.winner is None:
+                self.log("Waiting for internet access to activate...")
+                deadline.enter('activation_wait')
+                deadline.sleep(self.activation_wait)
+        except Cancelled:
+            race = self._race
+            if race is None or race.winner is None:
+                raise
+        finally:
+            self._end_race(deadline)
+        
+        if race is not None and race.winner is not None:
+            self.log(f"🎉 Access confirmed by {race.winner} after {race.probes} probe(s), "
+                     f"{deadline.timings['pipeline_saved']:.1f}s sooner than waiting")
+            self._notify_status(LoginStatus.SUCCESS, "Login successful")
+            self.last_login_time = datetime.now()
+            return True
+        
+        # Step 4: Verify internet access
+        if self.check_internet_access(deadline):
+            self.log("🎉 Automation completed successfully!")
+            self._notify_status(LoginStatus.SUCCESS, "Login successful")
+            self.last_login_time = datetime.now()
+            return True
+        else:
+            self.log("⚠️  Automation completed but internet access verification failed")
+            self.log("💡 This might be normal - try browsing manually to verify")
+            # Return True anyway since the automation steps completed
+            self._notify_status(LoginStatus.SUCCESS, "Login completed (verification unclear)")
+            self.last_login_time = datetime.now()
+            return True
+    
+    def _approval_sending(self, deadline: Deadline):
+        """Called by the engines just before the approval request goes out
+
+        In pipelined mode this starts the verification race. Until the run
+        ends the race, deadline and transport follow the race's token, so
+        deciding the race aborts the approval request and the probes.
+        """
+        if not self.pipelined or self._race is not None or deadline.token is None:
+            return
+        race = VerificationRace(self.probe_access, deadline.token)
+        self._race = race
+        deadline.token = race.token
+        self._bind_transport(race.token)
+        race.token.on_cancel(self._abort_requests)
+        race.start()
+    
+    def _end_race(self, deadline: Deadline):
+        """Stop the race, hand the run its own token back and report the time saved"""
+        race, self._race = self._race, None
+        if race is None:
+            return
+        race.stop()
+        deadline.token = race.parent
+        self._bind_transport(deadline.token)
+        if race.winner is not None:
+            deadline.timings['pipeline_saved'] = race.saved(self.activation_wait)
+    
+    def automate_login_async(self, timeout: Optional[float] = None, token: Optional[CancelToken] = None):
+        """Run automation in a separate thread
+
+        If a login is already running, its thread is returned instead of
+        starting another one. Stop it with cancel().
+        """
+        if self._login_flight.in_flight() and self._login_thread and self._login_thread.is_alive():
+            self.log("Login already in progress")
+            return self._login_thread
+        
+        thread = threading.Thread(target=self.automate_login, args=(timeout, token))
+        thread.daemon = True
+        thread.start()
+        self._login_thread = thread
+        return thread
+    
+    def get_status_info(self):
+        """Get current status information"""
+        return {
+            'status': self.status,
+            'last_login_time': self.last_login_time.isoformat() if self.last_login_time else None,
+            'next_login_time': self.next_login_time.isoformat() if self.next_login_time else None,
+            'has_credentials': bool(self.username and self.password),
+            'internet_access': self.check_internet_access()
+        }
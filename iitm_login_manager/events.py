@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - In-process event bus
+
+Status changes, log lines, login phase timings, probe results and
+scheduler decisions are published as small dicts ({'type', 'ts', ...}).
+Each subscriber has its own bounded queue: when a consumer falls behind,
+the oldest events are dropped and it receives one 'dropped' event that
+counts them per type, so a stuck consumer never holds up the publisher or
+grows memory. `iitm-login-manager --watch` streams them as NDJSON from the
+running tray over the instance socket.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+# Event types and their main fields
+EVENT_TYPES = {
+    'status': "status, message, interface - from _notify_status",
+    'log': "message - every automator log line",
+    'login': "status, duration, phases, interface - when a login run ends",
+    'probe': "state, latency, url, source - every heartbeat probe",
+    'schedule': "action, next_login, ... - scheduler and prediction decisions",
+    'memory': "rss, budget, trims - the tray went over its memory budget",
+    'dropped': "count, types - events this subscriber missed while slow",
+}
+
+
+def to_json(event: Dict[str, Any]) -> str:
+    """One NDJSON line (without the newline)"""
+    return json.dumps(event, separators=(',', ':'), default=str, ensure_ascii=False)
+
+
+class Subscription:
+    """One consumer's bounded queue of events"""
+
+    def __init__(self, bus: "EventBus", maxsize: int = 256, types=None):
+        self.bus = bus
+        self.maxsize = maxsize
+        self.types = set(types) if types else None
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._queue = deque()
+        self._missed: Dict[str, int] = {}  # per type, since the last 'dropped' event
+        self._cond = threading.Condition()
+
+    def put(self, event: Dict[str, Any]):
+        if self.types is not None and event['type'] not in self.types:
+            return
+        with self._cond:
+            if self.closed:
+                return
+            if len(self._queue) >= self.maxsize:
+                oldest = self._queue.popleft()
+                self._missed[oldest['type']] = self._missed.get(oldest['type'], 0) + 1
+                self.dropped += 1
+            self._queue.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Next event; None on timeout or once closed"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._missed or self.closed, timeout):
+                return None
+            if self._missed:
+                # Tell the consumer what it missed before what comes next
+                missed, self._missed = self._missed, {}
+                event = {'type': 'dropped', 'ts': time.time(), 'count': sum(missed.values()), 'types': missed}
+            elif self._queue:
+                event = self._queue.popleft()
+            else:
+                return None
+            self.delivered += 1
+            return event
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.bus.unsubscribe(self)
+        with self._cond:
+            self.closed = True
+            self._queue.clear()
+            self._missed.clear()
+            self._cond.notify_all()
+
+
+class EventBus:
+    """Fan events out to subscribers; publishing never blocks on them"""
+
+    def __init__(self):
+        self.published = 0
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize: int = 256, types=None) -> Subscription:
+        subscription = Subscription(self, maxsize, types)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, type: str, **fields) -> Optional[Dict[str, Any]]:
+        """Send an event to every subscriber; returns it (None without subscribers)"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            if not subscribers:
+                return None  # nobody listening: don't even build the event
+            self.published += 1
+        event = {'type': type, 'ts': time.time()}
+        event.update(fields)
+        for subscription in subscribers:
+            subscription.put(event)
+        return event
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            subscribers = list(self._subscribers)
+        return {
+            'published': self.published,
+            'subscribers': len(subscribers),
+            'dropped': sum(s.dropped for s in subscribers),
+        }
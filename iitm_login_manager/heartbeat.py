@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Adaptive connectivity heartbeat
+
+Runs cheap probes in the background so a session that drops mid-day is
+noticed. The interval backs off while the link is stable and tightens after
+a failure or a state flap. A confirmed captive state triggers a re-login,
+repeated with a growing gap (in probes) while the portal keeps capturing
+us. Probe count per hour and bytes per day are capped.
+
+The monitor runs in its own thread (start()) or as a coroutine on an
+asyncio loop (run_async()), e.g. the tray's integrated GLib loop.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Awaitable, Callable, Optional
+
+from .probe import ConnectivityProber, ProbeResult, ProbeState
+
+
+class ProbeBudget:
+    """Hard limits on probe frequency and traffic"""
+
+    def __init__(self, max_probes_per_hour: int = 120, max_bytes_per_day: int = 2_000_000):
+        self.max_probes_per_hour = max_probes_per_hour
+        self.max_bytes_per_day = max_bytes_per_day
+        self._probe_times = deque(maxlen=max_probes_per_hour)
+        self._day = date.today()
+        self.bytes_today = 0
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._day:
+            self._day = today
+            self.bytes_today = 0
+
+    def wait_time(self, now: Optional[float] = None) -> float:
+        """Seconds until another probe is allowed (0 = allowed now)"""
+        now = time.monotonic() if now is None else now
+        self._roll_day()
+        if self.bytes_today >= self.max_bytes_per_day:
+            # Nothing left for today; check again in an hour
+            return 3600.0
+        if len(self._probe_times) >= self.max_probes_per_hour:
+            return max(0.0, self._probe_times[0] + 3600 - now)
+        return 0.0
+
+    def record(self, bytes_used: int, now: Optional[float] = None, probes: int = 1):
+        now = time.monotonic() if now is None else now
+        self._probe_times.extend([now] * probes)
+        self._roll_day()
+        self.bytes_today += bytes_used
+
+
+class HeartbeatMonitor:
+    """Background connectivity monitor with a flap-aware interval"""
+
+    def __init__(self, prober: ConnectivityProber,
+                 on_result: Callable[[ProbeResult], None] = None,
+                 on_captive: Callable[[ProbeResult], None] = None,
+                 min_interval: float = 5, max_interval: float = 300,
+                 backoff: float = 2.0, captive_confirmations: int = 2,
+                 max_relogin_gap: int = 64,
+                 budget: Optional[ProbeBudget] = None,
+                 should_probe: Callable[[], bool] = None,
+                 peer_source: Callable[[], Optional[ProbeResult]] = None,
+                 max_peer_reliance: float = 1800):
+        self.prober = prober
+        self.on_result = on_result
+        self.on_captive = on_captive
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.captive_confirmations = captive_confirmations
+        self.max_relogin_gap = max_relogin_gap  # captive probes between re-logins, at most
+        self.budget = budget or ProbeBudget()
+        self.should_probe = should_probe
+        self.peer_source = peer_source
+        self.max_peer_reliance = max_peer_reliance  # probe ourselves at least this often
+        self.peer_skips = 0
+        self._last_own_probe = time.monotonic()
+
+        self.interval = min_interval
+        self.state = None
+        self.last_result = None
+        self._reset_captive()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._wake_async = None  # thread-safe setter of run_async()'s wake event
+
+    def start(self):
+        """Start probing in a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="iitm-heartbeat")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake_up()
+
+    def poke(self):
+        """Probe soon, e.g. after a login or a network change"""
+        self.interval = self.min_interval
+        self._wake_up()
+
+    def _wake_up(self):
+        self._wake.set()
+        if self._wake_async is not None:
+            self._wake_async()
+
+    def next_interval(self, result: ProbeResult) -> float:
+        """Update and return the interval after a probe result"""
+        flapped = self.state is not None and result.state != self.state
+        if result.state != ProbeState.ONLINE or flapped:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+        return self.interval
+
+    def tick(self) -> Optional[ProbeResult]:
+        """Run one probe if the budget allows it and probing makes sense"""
+        if not self._may_probe():
+            return None
+        result = self._peer_result()
+        if result is None:
+            result = self._own_result(self.prober.probe_any())
+        return self._handle(result)
+
+    async def tick_async(self, probe_any: Callable[[], Awaitable[ProbeResult]]) -> Optional[ProbeResult]:
+        """tick() with an awaitable probe, e.g. AsyncProber.probe_any"""
+        if not self._may_probe():
+            return None
+        result = self._peer_result()
+        if result is None:
+            result = self._own_result(await probe_any())
+        return self._handle(result)
+
+    def _may_probe(self) -> bool:
+        if self.budget.wait_time() > 0:
+            return False
+        if self.should_probe and not self.should_probe():
+            self.state = None
+            self._reset_captive()
+            return False
+        return True
+
+    def _own_result(self, result: ProbeResult) -> ProbeResult:
+        self.budget.record(result.bytes_used, probes=result.probes)
+        self._last_own_probe = time.monotonic()
+        return result
+
+    def _handle(self, result: ProbeResult) -> ProbeResult:
+        self.next_interval(result)
+        self.state = result.state
+        self.last_result = result
+
+        if self.on_result:
+            self.on_result(result)
+
+        if result.state == ProbeState.CAPTIVE:
+            self._captive_streak += 1
+            if self._captive_streak >= self._next_relogin:
+                # Still captive after a re-login: try again, each time after twice as many probes
+                self._next_relogin = self._captive_streak + self._relogin_gap
+                self._relogin_gap = min(self._relogin_gap * 2, self.max_relogin_gap)
+                if self.on_captive:
+                    self.on_captive(result)
+        else:
+            self._reset_captive()
+        return result
+
+    def _reset_captive(self):
+        self._captive_streak = 0
+        self._next_relogin = self.captive_confirmations
+        self._relogin_gap = self.captive_confirmations
+
+    def _peer_result(self) -> Optional[ProbeResult]:
+        """A fresh peer observation to use instead of probing, if allowed"""
+        if self.peer_source is None:
+            return None
+        if time.monotonic() - self._last_own_probe > self.max_peer_reliance:
+            return None
+        result = self.peer_source()
+        if result is not None:
+            self.peer_skips += 1
+        return result
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Heartbeat probe failed: {e}")
+                self.interval = self.min_interval
+
+            self._wake.wait(self._delay())
+            self._wake.clear()
+
+    def _delay(self) -> float:
+        return max(self.interval, self.budget.wait_time())
+
+    async def run_async(self, probe_any: Callable[[], Awaitable[ProbeResult]]):
+        """Probe from the running asyncio loop until stop(); no thread of its own"""
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        self._stop.clear()
+        self._wake_async = lambda: loop.call_soon_threadsafe(wake.set)
+        try:
+            while not self._stop.is_set():
+                try:
+                    await self.tick_async(probe_any)
+                except Exception as e:
+                    print(f"Heartbeat probe failed: {e}")
+                    self.interval = self.min_interval
+                if self._stop.is_set():
+                    break
+                try:
+                    await asyncio.wait_for(wake.wait(), self._delay())
+                except asyncio.TimeoutError:
+                    pass
+                wake.clear()
+        finally:
+            self._wake_async = None
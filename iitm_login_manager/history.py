@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Persistent login and probe history
+
+An append-only SQLite database of every login attempt (outcome, interface,
+per-phase durations) and every heartbeat probe. Alongside the raw probes,
+runs of identical state are kept as spans, so uptime over any window is a
+sum over a few thousand spans inside SQLite rather than a scan of every
+probe: a year of one-minute probes summarizes in milliseconds.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .paths import data_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS logins (
+    ts REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL,
+    interface TEXT,
+    phases TEXT
+);
+CREATE INDEX IF NOT EXISTS logins_ts ON logins (ts);
+CREATE TABLE IF NOT EXISTS probes (
+    ts REAL NOT NULL,
+    state TEXT NOT NULL,
+    latency REAL,
+    interface TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS probes_ts ON probes (ts);
+CREATE TABLE IF NOT EXISTS spans (
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    state TEXT NOT NULL,
+    interface TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS spans_end ON spans (end);
+"""
+
+# Time within [since, until) covered by spans, in total and while online
+UPTIME_QUERY = """
+SELECT
+    COALESCE(SUM(MIN(end, :until) - MAX(start, :since)), 0),
+    COALESCE(SUM(CASE WHEN state = 'online' THEN MIN(end, :until) - MAX(start, :since) END), 0)
+FROM spans WHERE end > :since AND start < :until
+"""
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Linear-interpolated percentile of sorted values"""
+    if not values:
+        return None
+    position = (len(values) - 1) * fraction
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+class HistoryStore:
+    """Append-only history of login attempts and probe results
+
+    A probe's state is taken to hold until the next probe, but never for
+    more than max_gap seconds (machine asleep, tray not running).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_gap: float = 600):
+        self.path = path or data_path("history.sqlite3")
+        self.max_gap = max_gap
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._open_spans = {}  # interface -> (rowid, end, state) of its newest span
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def record_login(self, outcome: str, duration: Optional[float] = None,
+                     phases: Optional[Dict[str, float]] = None, interface: Optional[str] = None,
+                     ts: Optional[float] = None):
+        self._insert("INSERT INTO logins VALUES (?, ?, ?, ?, ?)",
+                     [(time.time() if ts is None else ts, outcome, duration, interface,
+                       json.dumps(phases) if phases else None)])
+
+    def record_probe(self, result, interface: Optional[str] = None, ts: Optional[float] = None):
+        """Store a ProbeResult"""
+        self.record_probes([(time.time() if ts is None else ts, result.state, result.latency,
+                             interface, getattr(result, 'source', 'local'))])
+
+    def record_probes(self, rows: List[tuple]):
+        """Bulk insert (ts, state, latency, interface, source) rows in time order"""
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT INTO probes VALUES (?, ?, ?, ?, ?)", rows)
+                for ts, state, _, interface, _ in rows:
+                    self._extend_span(ts, state, interface or "")
+
+    def _extend_span(self, ts: float, state: str, interface: str):
+        """Grow the interface's newest span, or close it and start another"""
+        current = self._open_spans.get(interface)
+        if current is None:
+            current = self._db.execute(
+                "SELECT rowid, end, state FROM spans WHERE interface = ? ORDER BY end DESC LIMIT 1",
+                (interface,)
+            ).fetchone()
+
+        if current is not None:
+            rowid, end, last_state = current
+            gap = ts - end
+            if 0 <= gap <= self.max_gap and state == last_state:
+                self._db.execute("UPDATE spans SET end = ? WHERE rowid = ?", (ts, rowid))
+                self._open_spans[interface] = (rowid, ts, state)
+                return
+            if gap >= 0:
+                # The old state held until now, or for max_gap across a long gap
+                self._db.execute("UPDATE spans SET end = ? WHERE rowid = ?",
+                                 (end + min(gap, self.max_gap), rowid))
+
+        cursor = self._db.execute("INSERT INTO spans VALUES (?, ?, ?, ?)", (ts, ts, state, interface))
+        self._open_spans[interface] = (cursor.lastrowid, ts, state)
+
+    def _insert(self, sql: str, rows: List[tuple]):
+        with self._lock:
+            with self._db:
+                self._db.executemany(sql, rows)
+
+    def recent_logins(self, limit: int = 20, since: float = 0,
+                      until: Optional[float] = None) -> List[Dict[str, object]]:
+        """Newest login attempts first"""
+        until = time.time() if until is None else until
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ts, outcome, duration, interface, phases FROM logins "
+                "WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT ?", (since, until, limit)
+            ).fetchall()
+        return [{'ts': ts, 'outcome': outcome, 'duration': duration, 'interface': interface,
+                 'phases': json.loads(phases) if phases else {}}
+                for ts, outcome, duration, interface, phases in rows]
+
+    def login_times(self, since: float = 0, until: Optional[float] = None) -> List[float]:
+        """Timestamps of successful logins, oldest first"""
+        until = time.time() if until is None else until
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT ts FROM logins WHERE ts >= ? AND ts < ? AND outcome = 'success' ORDER BY ts",
+                (since, until))]
+
+    def drop_events(self, since: float = 0, until: Optional[float] = None) -> List[Tuple[float, Optional[float]]]:
+        """(drop time, recovery time) for every loss of connectivity, oldest first
+
+        A drop is an online span followed directly by a non-online one (not
+        a gap in the record); recovery is the start of the next online span,
+        or None if connectivity had not come back by the end of the record.
+        """
+        until = time.time() if until is None else until
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start, end, state, interface FROM spans "
+                "WHERE end >= ? AND start < ? ORDER BY interface, start", (since, until)
+            ).fetchall()
+
+        events = []
+        pending = None  # drop time still waiting for its recovery
+        previous = None
+        for start, end, state, interface in rows:
+            if previous is not None and previous[3] != interface:
+                if pending is not None:
+                    events.append((pending, None))
+                pending, previous = None, None
+            if state == 'online':
+                if pending is not None:
+                    events.append((pending, start))
+                    pending = None
+            elif (pending is None and previous is not None and previous[2] == 'online'
+                  and previous[1] == start and start >= since):
+                pending = start
+            previous = (start, end, state, interface)
+        if pending is not None:
+            events.append((pending, None))
+        return sorted(events)
+
+    def stats(self, since: float = 0, until: Optional[float] = None) -> Dict[str, object]:
+        """Login latency percentiles, success rate and uptime in [since, until)"""
+        until = time.time() if until is None else until
+        with self._lock:
+            attempts, successes = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(outcome = 'success'), 0) FROM logins "
+                "WHERE ts >= ? AND ts < ?", (since, until)
+            ).fetchone()
+            durations = [row[0] for row in self._db.execute(
+                "SELECT duration FROM logins WHERE ts >= ? AND ts < ? AND outcome = 'success' "
+                "AND duration IS NOT NULL ORDER BY duration", (since, until))]
+            probes = self._db.execute(
+                "SELECT COUNT(*) FROM probes WHERE ts >= ? AND ts < ?", (since, until)
+            ).fetchone()[0]
+            observed, online = self._db.execute(
+                UPTIME_QUERY, {'since': since, 'until': until}
+            ).fetchone()
+
+        return {
+            'since': since,
+            'until': until,
+            'login_attempts': attempts,
+            'login_successes': successes,
+            'success_rate': successes / attempts if attempts else None,
+            'latency_p50': percentile(durations, 0.50),
+            'latency_p95': percentile(durations, 0.95),
+            'latency_p99': percentile(durations, 0.99),
+            'probes': probes,
+            'uptime': online / observed if observed else None,
+            'observed_seconds': observed,
+        }
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Single-instance tray with activation handoff
+
+The first tray process binds an abstract Unix socket named after the user.
+A later launch (autostart plus the desktop menu, say) finds the name taken,
+passes its intent ("activate", "login", "status", "quit") to the running
+instance over the socket and exits, without importing GTK or requests.
+Only connections from the same user are honoured.
+
+The same socket serves `iitm-login-manager --watch`: after a "watch"
+request the connection stays open and carries the instance's events as
+NDJSON, one subscriber queue per connection. A "memory" request is
+answered with one JSON line: the instance's memory report.
+"""
+
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+from typing import Callable, Iterator, Optional
+
+INTENTS = ('activate', 'login', 'status', 'quit')
+WATCH = 'watch'
+MEMORY = 'memory'
+
+
+def default_name() -> str:
+    return f"iitm-login-manager-{os.getuid()}"
+
+
+class SingleInstance:
+    """Hold the per-user instance socket, or talk to whoever holds it"""
+
+    def __init__(self, name: Optional[str] = None, timeout: float = 2.0):
+        self.name = name or default_name()
+        self.timeout = timeout
+        self._sock = None
+        self._thread = None
+        self.events = None  # EventBus offered to watchers
+        self.memory = None  # callable(top) -> memory report
+        self._watchers = set()  # (connection, subscription)
+        self._watchers_lock = threading.Lock()
+        self._path = None  # filesystem socket where abstract ones are unavailable
+        if sys.platform.startswith('linux'):
+            self.address = '\0' + self.name
+        else:
+            from .paths import runtime_path
+            self._path = self.address = runtime_path(f"{self.name}.sock")
+
+    @property
+    def primary(self) -> bool:
+        return self._sock is not None
+
+    def acquire(self) -> bool:
+        """Become the running instance; False if another one already is"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.address)
+        except OSError:
+            if self._path is None or self._alive():
+                sock.close()
+                return False
+            # A crashed instance left its socket file behind
+            os.unlink(self._path)
+            sock.bind(self.address)
+        sock.listen(8)
+        self._sock = sock
+        return True
+
+    def _alive(self) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.settimeout(self.timeout)
+                probe.connect(self.address)
+            return True
+        except OSError:
+            return False
+
+    def send(self, intent: str) -> Optional[str]:
+        """Hand an intent to the running instance; returns its reply"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+                sock.sendall(json.dumps({'intent': intent}).encode() + b'\n')
+                return sock.makefile('r').readline().strip() or None
+            except OSError:
+                return None
+
+    def watch(self, types=None) -> Iterator[str]:
+        """Stream the running instance's events as NDJSON lines
+
+        Raises ConnectionRefusedError when no instance is running (or it has
+        no events to offer).
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address)
+            except OSError as e:
+                raise ConnectionRefusedError("IITM Login Manager is not running") from e
+            request = {'intent': WATCH}
+            if types:
+                request['types'] = list(types)
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            stream = sock.makefile('r', encoding='utf-8')
+            reply = stream.readline().strip()
+            if reply != "ok":
+                raise ConnectionRefusedError(f"Watch refused: {reply or 'no reply'}")
+            sock.settimeout(None)  # events may be minutes apart
+            for line in stream:
+                yield line.rstrip('\n')
+        finally:
+            sock.close()
+
+    def memory_report(self, top: int = 0) -> Optional[dict]:
+        """The running instance's memory report; None if it is not running"""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout + 5)  # walking the heap takes a moment
+            try:
+                sock.connect(self.address)
+                sock.sendall(json.dumps({'intent': MEMORY, 'top': top}).encode() + b'\n')
+                reply = sock.makefile('r').readline()
+            except OSError:
+                return None
+        try:
+            report = json.loads(reply)
+        except ValueError:
+            return None
+        return report if isinstance(report, dict) else None
+
+    def serve(self, handler: Callable[[str], None], events=None, memory=None):
+        """Accept intents in a daemon thread; handler runs on that thread
+
+        With an EventBus, "watch" connections are answered from their own
+        thread each, so a slow watcher never delays intents or the bus.
+        memory(top) answers "memory" requests on the accept thread.
+        """
+        self.events = events
+        self.memory = memory
+        self._thread = threading.Thread(target=self._accept_loop, args=(handler,), name="iitm-instance")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _accept_loop(self, handler):
+        while self._sock is not None:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break  # closed
+            conn.settimeout(self.timeout)
+            subscription = None
+            try:
+                reply, subscription = self._handle(conn, handler)
+                conn.sendall(reply.encode() + b'\n')
+            except OSError:
+                if subscription is not None:
+                    subscription.close()
+                    subscription = None
+            if subscription is None:
+                conn.close()
+                continue
+            conn.settimeout(None)
+            thread = threading.Thread(target=self._stream, args=(conn, subscription), name="iitm-watch")
+            thread.daemon = True
+            thread.start()
+
+    def _stream(self, conn, subscription):
+        """Write one watcher's events until it disconnects or we close"""
+        from .events import to_json
+        with self._watchers_lock:
+            self._watchers.add((conn, subscription))
+        try:
+            for event in subscription:
+                conn.sendall(to_json(event).encode() + b'\n')
+        except OSError:
+            pass  # watcher went away
+        finally:
+            subscription.close()
+            with self._watchers_lock:
+                self._watchers.discard((conn, subscription))
+            conn.close()
+
+    def _handle(self, conn, handler):
+        """(reply, subscription): a subscription only for accepted watch requests"""
+        reply, request = self._read_request(conn)
+        if request is None:
+            return reply, None
+        intent = request['intent']
+        if intent == WATCH:
+            if self.events is None:
+                return "error: events are not available", None
+            return "ok", self.events.subscribe(types=request.get('types'))
+        if intent == MEMORY:
+            if self.memory is None:
+                return "error: memory report is not available", None
+            try:
+                return json.dumps(self.memory(int(request.get('top') or 0)), default=str), None
+            except (TypeError, ValueError) as e:
+                return f"error: {e}", None
+        try:
+            handler(intent)
+        except Exception as e:
+            return f"error: {e}", None
+        return "ok", None
+
+    def _read_request(self, conn):
+        if hasattr(socket, 'SO_PEERCRED'):
+            creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+            _, uid, _ = struct.unpack('3i', creds)
+            if uid != os.getuid():
+                return "denied", None
+        try:
+            request = json.loads(conn.makefile('r').readline())
+            intent = request['intent']
+        except (ValueError, KeyError, TypeError):
+            return "error: malformed request", None
+        if intent not in INTENTS and intent not in (WATCH, MEMORY):
+            return f"error: unknown intent {intent!r}", None
+        return "ok", request
+
+    def close(self):
+        with self._watchers_lock:
+            watchers = list(self._watchers)
+        for conn, subscription in watchers:
+            subscription.close()
+            try:
+                conn.shutdown(socket.SHUT_RDWR)  # in case it is stuck writing
+            except OSError:
+                pass
+        sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+            if self._path:
+                try:
+                    os.unlink(self._path)
+                except OSError:
+                    pass
+
+
+def main(argv=None, name: Optional[str] = None) -> int:
+    """Entry point for iitm-login-tray"""
+    parser = argparse.ArgumentParser(description="IITM Login Manager tray")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--login-now', dest='intent', action='store_const', const='login',
+                       help='Log in now (in the running tray, if there is one)')
+    group.add_argument('--check-status', dest='intent', action='store_const', const='status',
+                       help='Check internet status in the running tray')
+    group.add_argument('--quit', dest='intent', action='store_const', const='quit',
+                       help='Quit the running tray')
+    args = parser.parse_args(argv)
+    intent = args.intent or 'activate'
+
+    instance = SingleInstance(name)
+    if not instance.acquire():
+        reply = instance.send(intent)
+        if reply == "ok":
+            return 0
+        print(f"IITM Login Manager is already running but did not accept '{intent}': {reply}")
+        return 1
+    if intent == 'quit':
+        instance.close()
+        print("IITM Login Manager is not running")
+        return 0
+
+    # We are the only instance: now pay for GTK
+    from .tray import main as tray_main
+    tray_main(instance=instance, intent=intent)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Multi-interface probing and login
+
+Lab machines often have a wired and a wireless link on different campus
+segments. Each configured interface gets its own automator whose sessions
+are bound to that interface's source address (or device), so probes and
+logins happen on every link concurrently and connectivity is tracked per
+interface. Whether a link is on campus is judged from that link's own
+address and gateway, not the default route's.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Union
+
+from .automator import IITMNetAccessAutomator, LoginStatus
+from .location import interface_address
+from .probe import ProbeResult, ProbeState
+from .resolver import Resolver
+
+
+class InterfaceConfig:
+    """One configured interface
+
+    address overrides the interface's current IPv4 address (useful for
+    loopback aliases in tests); bind_device additionally binds sockets to
+    the device with SO_BINDTODEVICE, which may need CAP_NET_RAW.
+    """
+
+    def __init__(self, name: str, address: Optional[str] = None, bind_device: bool = False):
+        self.name = name
+        self.address = address
+        self.bind_device = bind_device
+
+    @classmethod
+    def from_config(cls, entry: Union[str, Dict[str, object]]) -> "InterfaceConfig":
+        if isinstance(entry, str):
+            return cls(entry)
+        return cls(entry['name'], entry.get('address'), bool(entry.get('bind_device', False)))
+
+    def source_address(self) -> Optional[str]:
+        return self.address or interface_address(self.name)
+
+
+class InterfaceState:
+    """Last known connectivity of one interface"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.address = None
+        self.state = None  # ProbeState value, None until probed
+        self.last_probe = None
+        self.last_login = None
+        self.last_login_ok = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'name': self.name,
+            'address': self.address,
+            'state': self.state,
+            'last_probe': self.last_probe.isoformat() if self.last_probe else None,
+            'last_login': self.last_login.isoformat() if self.last_login else None,
+            'last_login_ok': self.last_login_ok,
+        }
+
+
+class MultiInterfaceManager:
+    """Probe and log in on several interfaces at once"""
+
+    def __init__(self, username: str, password: str, interfaces: List[Union[str, Dict[str, object]]],
+                 callback: Callable[[str, str, str], None] = None,
+                 configure: Callable[[IITMNetAccessAutomator], None] = None):
+        self.username = username
+        self.password = password
+        self.interfaces = [InterfaceConfig.from_config(entry) for entry in interfaces]
+        self.callback = callback  # (interface, status, message)
+        self.configure = configure  # applied to every automator we create
+        self.resolver = Resolver()  # one DNS cache for all links
+        self._lock = threading.Lock()
+        self._automators = {}  # name -> (source address, automator)
+        self.states = {iface.name: InterfaceState(iface.name) for iface in self.interfaces}
+
+    def set_credentials(self, username: str, password: str):
+        self.username = username
+        self.password = password
+        with self._lock:
+            for _, automator in self._automators.values():
+                automator.set_credentials(username, password)
+
+    def reconfigure(self):
+        """Apply the configure callback again to the automators already created"""
+        with self._lock:
+            for name, (address, automator) in self._automators.items():
+                self._configure(name, address, automator)
+
+    def cancel(self, reason: str = "Cancelled") -> bool:
+        """Cancel the logins in progress on every interface"""
+        with self._lock:
+            automators = [automator for _, automator in self._automators.values()]
+        return any([automator.cancel(reason) for automator in automators])
+
+    def automator_for(self, iface: InterfaceConfig) -> Optional[IITMNetAccessAutomator]:
+        """Automator bound to the interface's current address (None if it has none)"""
+        address = iface.source_address()
+        self.states[iface.name].address = address
+        if not address and not iface.bind_device:
+            return None
+
+        with self._lock:
+            cached = self._automators.get(iface.name)
+            if cached and cached[0] == address:
+                return cached[1]
+
+            # First use, or DHCP gave the interface a new address
+            automator = IITMNetAccessAutomator(
+                self.username, self.password,
+                callback=lambda status, message, name=iface.name: self._on_status(name, status, message),
+                interface=iface.name, source_address=address,
+                bind_device=iface.bind_device, resolver=self.resolver
+            )
+            self._configure(iface.name, address, automator)
+            self._automators[iface.name] = (address, automator)
+            return automator
+
+    def _configure(self, name: str, address: Optional[str], automator: IITMNetAccessAutomator):
+        if self.configure:
+            self.configure(automator)
+        # configure may share one detector between automators; each link needs its own view
+        automator.location = automator.location.for_interface(name, address)
+
+    def _on_status(self, name: str, status: str, message: str):
+        if self.callback:
+            self.callback(name, status, message)
+
+    def probe_all(self) -> Dict[str, Optional[ProbeResult]]:
+        """Probe every interface concurrently"""
+        def probe(iface):
+            automator = self.automator_for(iface)
+            if automator is None:
+                return None
+            result = automator.prober.probe_any()
+            state = self.states[iface.name]
+            state.state = result.state
+            state.last_probe = datetime.now()
+            return result
+
+        return self._run_all(probe)
+
+    def login_all(self, timeout: Optional[float] = None, only_needed: bool = True) -> Dict[str, bool]:
+        """Log in on every interface concurrently
+
+        With only_needed, interfaces whose last probe showed them online are
+        skipped (and reported as successful).
+        """
+        def login(iface):
+            state = self.states[iface.name]
+            if only_needed and state.state == ProbeState.ONLINE:
+                return True
+            automator = self.automator_for(iface)
+            if automator is None:
+                self._on_status(iface.name, LoginStatus.NETWORK_ERROR, "Interface has no address")
+                return False
+            ok = automator.automate_login(timeout=timeout)
+            state.last_login = datetime.now()
+            state.last_login_ok = ok
+            if ok:
+                state.state = ProbeState.ONLINE
+            return ok
+
+        return {name: bool(ok) for name, ok in self._run_all(login).items()}
+
+    def online_interfaces(self) -> List[str]:
+        return [name for name, state in self.states.items() if state.state == ProbeState.ONLINE]
+
+    def get_status_info(self) -> Dict[str, Dict[str, object]]:
+        return {name: state.to_dict() for name, state in self.states.items()}
+
+    def _run_all(self, func) -> Dict[str, object]:
+        if not self.interfaces:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(self.interfaces)) as executor:
+            futures = {iface.name: executor.submit(func, iface) for iface in self.interfaces}
+            return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Standard-library login engine
+
+For Raspberry Pi class gateways and small VMs, where importing requests,
+BeautifulSoup and keyring costs more than the handful of form posts the
+login needs. LiteAutomator walks the same flow as IITMNetAccessAutomator
+(both are LoginEngines and classify portal answers with the same helpers)
+using http.client with one persistent connection per host, a small cookie
+jar, and an html.parser based form extractor.
+
+Not included: the DNS cache with Happy Eyeballs racing (plain
+getaddrinfo order is used), cassettes and the heartbeat prober.
+
+select_engine() picks LiteAutomator when asked to, or on "auto" when
+requests or BeautifulSoup is not installed.
+"""
+
+import http.client
+import importlib.util
+import socket
+import ssl
+import threading
+import time
+import zlib
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+from .cancel import CancelToken, Cancelled, abort_socket
+from .deadline import Deadline
+from .engine import (LoginEngine, LoginStatus, ACTIVE_KEYWORDS,
+                     classify_login_response, classify_approval_response, approval_submit_url)
+
+ENGINES = ('auto', 'requests', 'lite')
+
+# What a request can fail with: socket errors (timeouts included) and protocol errors
+REQUEST_ERRORS = (OSError, http.client.HTTPException)
+
+REDIRECTS = (301, 302, 303, 307, 308)
+
+
+def heavy_dependencies_available() -> bool:
+    """Whether the default engine's packages are installed (without importing them)"""
+    return all(importlib.util.find_spec(name) is not None for name in ('requests', 'bs4'))
+
+
+def select_engine(name: str = 'auto'):
+    """Automator class for an engine name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name}")
+    if name == 'lite' or (name == 'auto' and not heavy_dependencies_available()):
+        return LiteAutomator
+    from .automator import IITMNetAccessAutomator
+    return IITMNetAccessAutomator
+
+
+def _open_socket(host: str, port: int, timeout: Optional[float],
+                 source_address: Optional[str], device: Optional[str],
+                 token: Optional[CancelToken] = None) -> socket.socket:
+    """Connect to the first reachable address, optionally pinned to an interface
+
+    Raises Cancelled instead of returning the socket if token was cancelled
+    while connecting, so nothing is sent on behalf of a cancelled run.
+    """
+    error = None
+    for family, kind, proto, _, address in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+        sock = socket.socket(family, kind, proto)
+        try:
+            sock.settimeout(timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # as urllib3 does
+            if device:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BINDTODEVICE, device.encode())
+            if source_address:
+                sock.bind((source_address, 0))
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            error = e
+            continue
+        if token is not None and token.cancelled:
+            sock.close()
+            raise Cancelled(token.reason, 'connect')
+        return sock
+    raise error or OSError(f"No addresses for {host}")
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    def __init__(self, host, port=None, timeout=None, source_address=None, device=None):
+        super().__init__(host, port, timeout=timeout)
+        self.bind_address = source_address
+        self.device = device
+        self.token = None
+
+    def connect(self):
+        self.sock = _open_socket(self.host, self.port, self.timeout, self.bind_address, self.device, self.token)
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    def __init__(self, host, port=None, timeout=None, source_address=None, device=None):
+        super().__init__(host, port, timeout=timeout, context=ssl.create_default_context())
+        self.bind_address = source_address
+        self.device = device
+        self.token = None
+
+    def connect(self):
+        sock = _open_socket(self.host, self.port, self.timeout, self.bind_address, self.device, self.token)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class LiteResponse:
+    """The parts of a requests.Response the login flow looks at"""
+
+    def __init__(self, status_code: int, reason: str, headers, text: str, url: str, elapsed: float):
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.text = text
+        self.url = url
+        self.elapsed = elapsed  # seconds, for the final hop
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise http.client.HTTPException(f"HTTP {self.status_code} {self.reason} for {self.url}")
+
+
+class LiteSession:
+    """Keep-alive connections per host, cookies and redirects over http.client
+
+    token and abort() work as on ResolverAdapter: no new connections once
+    the token is cancelled, and abort() cuts the open ones.
+    """
+
+    def __init__(self, source_address: Optional[str] = None, device: Optional[str] = None):
+        self.source_address = source_address
+        self.device = device
+        self.token: Optional[CancelToken] = None
+        self.headers: Dict[str, str] = {}
+        self.cookies: Dict[str, str] = {}
+        self.connections_opened = 0
+        self._connections: Dict[Tuple[str, str, int], http.client.HTTPConnection] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self, scheme: str, host: str, port: int, timeout: float) -> http.client.HTTPConnection:
+        key = (scheme, host, port)
+        conn = self._connections.get(key)
+        if conn is None:
+            cls = _HTTPSConnection if scheme == 'https' else _HTTPConnection
+            conn = cls(host, port, timeout=timeout, source_address=self.source_address, device=self.device)
+            self._connections[key] = conn
+            self.connections_opened += 1
+        conn.timeout = timeout
+        conn.token = self.token
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn
+
+    def _drop(self, key):
+        conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, method: str, url: str, timeout: float, data: Optional[Dict[str, Any]] = None,
+                headers: Optional[Dict[str, str]] = None, allow_redirects: bool = True,
+                max_redirects: int = 5) -> LiteResponse:
+        with self._lock:
+            for _ in range(max_redirects + 1):
+                response = self._send(method, url, timeout, data, headers)
+                location = response.headers.get('Location')
+                if not (allow_redirects and response.status_code in REDIRECTS and location):
+                    return response
+                url = urljoin(url, location)
+                if response.status_code in (301, 302, 303) and method != 'HEAD':
+                    method, data = 'GET', None
+            raise http.client.HTTPException(f"More than {max_redirects} redirects")
+
+    def _send(self, method, url, timeout, data, headers) -> LiteResponse:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+
+        send_headers = dict(self.headers)
+        send_headers.update(headers or {})
+        if self.cookies:
+            send_headers['Cookie'] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode(data).encode()
+            send_headers.setdefault('Content-Type', 'application/x-www-form-urlencoded')
+
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.hostname, port, timeout)
+            reused = conn.sock is not None
+            start = time.monotonic()
+            try:
+                conn.request(method, path, body=body, headers=send_headers)
+                raw = conn.getresponse()
+                content = raw.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._drop(key)
+                if not reused or attempt:
+                    raise
+                # The server closed an idle keep-alive connection; retry on a fresh one
+            except BaseException:
+                self._drop(key)
+                raise
+        elapsed = time.monotonic() - start
+        if raw.will_close:
+            self._drop(key)
+
+        for cookie in raw.headers.get_all('Set-Cookie') or []:
+            name, _, value = cookie.split(';', 1)[0].partition('=')
+            if name.strip():
+                self.cookies[name.strip()] = value.strip()
+
+        encoding = (raw.headers.get('Content-Encoding') or '').lower()
+        if encoding == 'gzip':
+            content = zlib.decompress(content, 16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            content = zlib.decompress(content)
+        charset = raw.headers.get_content_charset() or 'utf-8'
+        return LiteResponse(raw.status, raw.reason, raw.headers,
+                            content.decode(charset, errors='replace'), url, elapsed)
+
+    def abort(self) -> int:
+        """Shut down every open connection, even one a request is blocked on"""
+        # Not under _lock: the blocked request holds it
+        connections = list(self._connections.values())
+        for conn in connections:
+            abort_socket(conn.sock)
+        return len(connections)
+
+    def close(self):
+        with self._lock:
+            for key in list(self._connections):
+                self._drop(key)
+
+
+class FormExtractor(HTMLParser):
+    """Forms, their inputs and buttons, and link targets of a page
+
+    Each input remembers the text of its enclosing element, which is where
+    the approval page says which radio button is "1 day".
+    """
+
+    VOID = {'input', 'br', 'img', 'hr', 'meta', 'link', 'area', 'base', 'col', 'embed', 'source', 'wbr'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: List[Dict[str, Any]] = []
+        self.links: List[str] = []
+        self._stack: List[Tuple[str, List[str]]] = [('document', [])]
+        self._form = None
+
+    @classmethod
+    def parse(cls, html: str) -> "FormExtractor":
+        parser = cls()
+        parser.feed(html)
+        parser.close()
+        return parser
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value if value is not None else '' for name, value in attrs}
+        if tag == 'form':
+            self._form = {'action': attrs.get('action', ''), 'method': attrs.get('method', 'get'),
+                          'inputs': [], 'buttons': []}
+            self.forms.append(self._form)
+        elif tag == 'a' and 'href' in attrs:
+            self.links.append(attrs['href'])
+        elif tag == 'input' and self._form is not None:
+            parent_text = self._stack[-1][1]
+            parent_text.append(' '.join(attrs.values()))
+            self._form['inputs'].append((attrs, parent_text))
+        elif tag == 'button' and self._form is not None:
+            self._form['buttons'].append(attrs)
+        if tag not in self.VOID:
+            self._stack.append((tag, []))
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        for index in range(len(self._stack) - 1, 0, -1):
+            if self._stack[index][0] == tag:
+                # Closing an element folds its text into its parent's
+                for _, text in self._stack[index:]:
+                    self._stack[index - 1][1].extend(text)
+                del self._stack[index:]
+                break
+
+    def handle_data(self, data):
+        self._stack[-1][1].append(data)
+
+
+def approval_form_data(form: Dict[str, Any]) -> Dict[str, str]:
+    """The fields the default engine would submit for an approval form"""
+    form_data = {}
+    for attrs, parent_text in form['inputs']:
+        name = attrs.get('name')
+        value = attrs.get('value', '')
+        input_type = attrs.get('type', 'text')
+        if not name:
+            continue
+        if input_type == 'radio':
+            # Look for duration options (1 day, 1 week, 1 month)
+            if 'day' in ' '.join(parent_text).lower() or 'day' in value.lower():
+                form_data[name] = value
+        elif input_type in ['hidden', 'submit']:
+            form_data[name] = value
+        elif name.lower() in ['duration', 'period']:
+            form_data[name] = value
+    for button in form['buttons']:
+        if button.get('name'):
+            form_data[button['name']] = button.get('value', '')
+    return form_data
+
+
+class LiteProber:
+    """Connectivity targets and timeout, as configured for ConnectivityProber"""
+
+    DEFAULT_TARGETS = [
+        'http://connectivitycheck.gstatic.com/generate_204',
+        'http://cp.cloudflare.com/generate_204',
+    ]
+
+    def __init__(self, targets=None, timeout: float = 5):
+        self.targets = list(targets or self.DEFAULT_TARGETS)
+        self.timeout = timeout
+
+
+class LiteAutomator(LoginEngine):
+    """IITMNetAccessAutomator's login flow on the standard library alone"""
+
+    def __init__(self, username: str = None, password: str = None, callback=None,
+                 interface: str = None, source_address: str = None, bind_device: bool = False,
+                 resolver=None):
+        super().__init__(username, password, callback, interface=interface, source_address=source_address)
+        # resolver is accepted for interface compatibility; getaddrinfo is used instead
+        self.session = LiteSession(source_address=source_address, device=interface if bind_device else None)
+        self.session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:138.0) Gecko/20100101 Firefox/138.0',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+        })
+        self.prober = LiteProber()
+        # Probes of a pipelined login run while the approval request holds self.session
+        self.probe_session = LiteSession(source_address=source_address, device=self.session.device)
+        self.probe_session.headers['User-Agent'] = 'iitm-login-manager'
+
+    def _request(self, method: str, url: str, deadline: Deadline, cap: float, **kwargs) -> LiteResponse:
+        """Session request with the same adaptive timeout as the default engine"""
+        host, phase = urlsplit(url).hostname, deadline.current_phase
+        try:
+            response = self.session.request(method, url, deadline.timeout(self.rtt.timeout(host, cap, phase)), **kwargs)
+        except REQUEST_ERRORS as e:
+            if isinstance(e, socket.timeout):
+                self.rtt.on_timeout(host, phase)
+            deadline.check()
+            raise
+        self.rtt.observe(host, response.elapsed, phase)
+        return response
+
+    def _bind_transport(self, token: Optional[CancelToken]):
+        self.session.token = self.probe_session.token = token
+
+    def _abort_requests(self):
+        self.session.abort()
+        self.probe_session.abort()
+
+    def get_login_page(self, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Get the login page and extract necessary information"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('login_page')
+        self.log("Fetching login page...")
+        try:
+            response = self._request('GET', self.login_url, deadline, 10)
+            response.raise_for_status()
+        except REQUEST_ERRORS as e:
+            self.log(f"ERROR: Failed to fetch login page: {e}")
+            self._notify_status(LoginStatus.NETWORK_ERROR, str(e))
+            return None
+
+        page = FormExtractor.parse(response.text)
+        if not page.forms:
+            self.log("ERROR: Could not find login form")
+            return None
+        form = page.forms[0]
+        hidden_fields = {attrs['name']: attrs['value'] for attrs, _ in form['inputs']
+                         if attrs.get('type') == 'hidden' and attrs.get('name') and attrs.get('value')}
+        return {'form_action': form['action'], 'hidden_fields': hidden_fields, 'cookies': dict(self.session.cookies)}
+
+    def perform_login(self, deadline: Optional[Deadline] = None) -> Optional[LiteResponse]:
+        """Perform the login using credentials"""
+        deadline = Deadline.coerce(deadline)
+        if not self.username or not self.password:
+            self._notify_status(LoginStatus.AUTH_ERROR, "No credentials provided")
+            return None
+
+        self.log("Attempting to log in...")
+        self._notify_status(LoginStatus.IN_PROGRESS, "Logging in...")
+        login_info = self.get_login_page(deadline)
+        if not login_info:
+            return None
+
+        login_data = {'userLogin': self.username, 'userPassword': self.password, 'submit': ''}
+        login_data.update(login_info['hidden_fields'])
+        headers = {'Origin': self.base_url, 'Referer': self.login_url}
+
+        deadline.enter('login')
+        try:
+            response = self._request('POST', self.login_url, deadline, 15, data=login_data, headers=headers)
+        except REQUEST_ERRORS as e:
+            self.log(f"ERROR: Login request failed: {e}")
+            self._notify_status(LoginStatus.NETWORK_ERROR, str(e))
+            return None
+
+        outcome = classify_login_response(response.status_code, response.text)
+        if outcome == 'success':
+            self.log("Login successful!")
+            return response
+        if outcome == 'invalid':
+            self.log("ERROR: Invalid credentials")
+            self._notify_status(LoginStatus.AUTH_ERROR, "Invalid credentials")
+            return None
+        if outcome == 'unclear':
+            self.log("Login appears successful, proceeding...")
+            return response
+        self.log(f"ERROR: Login failed with status code: {response.status_code}")
+        self._notify_status(LoginStatus.FAILED, f"HTTP {response.status_code}")
+        return None
+
+    def handle_access_options(self, response: LiteResponse,
+                              deadline: Optional[Deadline] = None) -> LiteResponse:
+        """Handle the access options page (one day option, allow button)"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('approve')
+        self.log("Processing access options...")
+
+        if '/account/approve' in FormExtractor.parse(response.text).links:
+            approve_url = f"{self.base_url}/account/approve"
+            self.log(f"Accessing approval URL: {approve_url}")
+            try:
+                approve_response = self._request('GET', approve_url, deadline, 10,
+                                                 headers={'Referer': response.url})
+            except REQUEST_ERRORS as e:
+                self.log(f"ERROR: Failed to access approval URL: {e}")
+                approve_response = None
+
+            if approve_response is not None and approve_response.status_code == 200:
+                forms = FormExtractor.parse(approve_response.text).forms
+                self.log(f"Found {len(forms)} forms on approval page")
+                for form in forms:
+                    form_data = approval_form_data(form)
+                    submit_url = approval_submit_url(self.base_url, form['action'])
+                    self.log(f"Submitting approval form to: {submit_url}")
+                    deadline.enter('approval_form')
+                    self._approval_sending(deadline)
+                    try:
+                        final_response = self._request('POST', submit_url, deadline, 10, data=form_data,
+                                                       headers={'Referer': approve_response.url})
+                    except REQUEST_ERRORS as e:
+                        self.log(f"ERROR: Failed to submit approval form: {e}")
+                        continue
+                    if final_response.status_code != 200:
+                        self.log(f"Approval form submission failed with status: {final_response.status_code}")
+                        continue
+                    outcome = classify_approval_response(final_response.text)
+                    if outcome == 'authorized':
+                        self.log("✅ Machine authorization successful!")
+                    elif outcome == 'error':
+                        self.log("❌ Authorization may have failed - check manually")
+                    else:
+                        self.log("⚠️ Authorization status unclear - proceeding anyway")
+                    return final_response
+                return approve_response
+
+        if any(keyword in response.text.lower() for keyword in ACTIVE_KEYWORDS):
+            self.log("Appears to be already on success page - access may already be granted")
+        return response
+
+    def probe_access(self) -> bool:
+        """One generate_204 probe; True if it shows open internet access"""
+        url = self.prober.targets[0]
+        timeout = self.rtt.timeout(urlsplit(url).hostname, self.prober.timeout)
+        try:
+            response = self.probe_session.request('GET', url, timeout, allow_redirects=False)
+        except REQUEST_ERRORS:
+            return False
+        return response.status_code == 204
+
+    def check_internet_access(self, deadline: Optional[Deadline] = None) -> bool:
+        """Check if internet access is working"""
+        deadline = Deadline.coerce(deadline)
+        deadline.enter('verify')
+        self.log("Checking internet access...")
+        for url in self.internet_test_urls:
+            try:
+                if self._request('GET', url, deadline, 10).status_code == 200:
+                    self.log("✅ Internet access is working!")
+                    return True
+            except REQUEST_ERRORS:
+                continue
+        self.log("❌ No internet access detected")
+        return False
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Network location detection
+
+Decides, without sending a single packet, whether the machine looks like it
+is on the campus network. It reads the default route from /proc/net/route,
+the search domains from /etc/resolv.conf, the interface's IPv4 address and
+(optionally) the Wi-Fi SSID via ioctls, and matches them against campus
+fingerprints. Off campus, logins and probes are skipped instead of burning
+through the whole timeout chain. A detector bound to one interface
+(for_interface()) judges that link by its own address and gateway.
+"""
+
+import copy
+import ctypes
+import ipaddress
+import socket
+import struct
+import time
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SIOCGIFADDR = 0x8915
+SIOCGIWESSID = 0x8B1B
+IW_ESSID_MAX_SIZE = 32
+
+# Used when no campus_fingerprints are configured. Matching one of these is
+# a positive signal, but not matching them is not treated as off campus.
+DEFAULT_FINGERPRINTS = [
+    {'search_domains': ['iitm.ac.in']},
+]
+
+
+class Location:
+    CAMPUS = "campus"
+    OFF_CAMPUS = "off_campus"
+    NO_NETWORK = "no_network"
+    UNKNOWN = "unknown"
+
+
+class NetworkSnapshot:
+    """Local network facts gathered for one detection"""
+
+    def __init__(self, interface: Optional[str] = None, gateway: Optional[str] = None,
+                 address: Optional[str] = None, search_domains: List[str] = None,
+                 ssid: Optional[str] = None):
+        self.interface = interface
+        self.gateway = gateway
+        self.address = address
+        self.search_domains = search_domains or []
+        self.ssid = ssid
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'interface': self.interface,
+            'gateway': self.gateway,
+            'address': self.address,
+            'search_domains': self.search_domains,
+            'ssid': self.ssid,
+        }
+
+
+class LocationResult:
+    def __init__(self, location: str, snapshot: NetworkSnapshot, reason: str, elapsed: float):
+        self.location = location
+        self.snapshot = snapshot
+        self.reason = reason
+        self.elapsed = elapsed
+
+    @property
+    def skip(self) -> bool:
+        """Whether portal logins and probes are pointless here"""
+        return self.location in (Location.OFF_CAMPUS, Location.NO_NETWORK)
+
+    def __repr__(self):
+        return f"LocationResult({self.location}, {self.reason!r}, {self.elapsed * 1e6:.0f}us)"
+
+
+def read_default_route(path: str = "/proc/net/route", interface: Optional[str] = None):
+    """Return (interface, gateway) of the lowest-metric IPv4 default route
+
+    With interface, only default routes through that interface count.
+    """
+    best = None
+    try:
+        with open(path, 'r') as f:
+            next(f, None)  # header
+            for line in f:
+                fields = line.split()
+                if len(fields) < 8 or fields[1] != '00000000' or fields[7] != '00000000':
+                    continue
+                if interface is not None and fields[0] != interface:
+                    continue
+                flags = int(fields[3], 16)
+                if not flags & 0x1:  # RTF_UP
+                    continue
+                metric = int(fields[6])
+                gateway = socket.inet_ntoa(struct.pack('<I', int(fields[2], 16)))
+                if best is None or metric < best[0]:
+                    best = (metric, fields[0], gateway)
+    except (OSError, ValueError):
+        return None, None
+    return (best[1], best[2]) if best else (None, None)
+
+
+def read_ipv6_default_interface(path: str = "/proc/net/ipv6_route") -> Optional[str]:
+    """Interface of an IPv6 default route, for IPv6-only networks"""
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) < 10 or fields[0] != '0' * 32 or fields[1] != '00':
+                    continue
+                flags = int(fields[8], 16)
+                if flags & 0x1 and not flags & 0x200 and fields[9] != 'lo':  # RTF_UP, not RTF_REJECT
+                    return fields[9]
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def read_search_domains(path: str = "/etc/resolv.conf") -> List[str]:
+    domains = []
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if fields and fields[0] in ('search', 'domain'):
+                    domains.extend(d.rstrip('.').lower() for d in fields[1:])
+    except OSError:
+        pass
+    return domains
+
+
+def interface_address(interface: str) -> Optional[str]:
+    """IPv4 address of an interface via SIOCGIFADDR"""
+    if fcntl is None or not interface:
+        return None
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            ifreq = struct.pack('256s', interface.encode()[:15])
+            return socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFADDR, ifreq)[20:24])
+    except OSError:
+        return None
+
+
+def wireless_ssid(interface: str) -> Optional[str]:
+    """SSID of a wireless interface via the wireless extensions ioctl"""
+    if fcntl is None or not interface:
+        return None
+    essid = ctypes.create_string_buffer(IW_ESSID_MAX_SIZE + 1)
+    # struct iwreq: ifr_name[16] followed by struct iw_point {pointer, length, flags}
+    iwreq = struct.pack('16sPHH', interface.encode()[:15], ctypes.addressof(essid), len(essid), 0)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            result = fcntl.ioctl(s.fileno(), SIOCGIWESSID, iwreq)
+    except OSError:
+        return None  # not a wireless interface
+    length = struct.unpack('16sPHH', result)[2]
+    return essid.raw[:length].decode(errors='replace') or None
+
+
+class LocationDetector:
+    """Match local network state against campus fingerprints
+
+    A fingerprint is a dict with any of 'subnets' (CIDR strings),
+    'gateways', 'interfaces', 'search_domains' and 'ssids'. All keys present
+    in a fingerprint must match; any matching fingerprint means campus.
+    """
+
+    def __init__(self, fingerprints: Optional[List[Dict[str, List[str]]]] = None,
+                 route_path: str = "/proc/net/route", resolv_path: str = "/etc/resolv.conf"):
+        self.configured = bool(fingerprints)
+        self.fingerprints = [self._compile(fp) for fp in (fingerprints or DEFAULT_FINGERPRINTS)]
+        self.route_path = route_path
+        self.resolv_path = resolv_path
+        self._wants_ssid = any('ssids' in fp for fp in self.fingerprints)
+        self.interface = None  # judge this interface instead of the default route's
+        self.address = None  # its address, when known to the caller
+
+    def for_interface(self, interface: str, address: Optional[str] = None) -> "LocationDetector":
+        """Detector with the same fingerprints for one interface"""
+        detector = copy.copy(self)
+        detector.interface = interface
+        detector.address = address
+        return detector
+
+    @staticmethod
+    def _compile(fingerprint: Dict[str, List[str]]) -> Dict[str, object]:
+        compiled = dict(fingerprint)
+        if 'subnets' in fingerprint:
+            compiled['subnets'] = [ipaddress.ip_network(n, strict=False) for n in fingerprint['subnets']]
+        if 'search_domains' in fingerprint:
+            compiled['search_domains'] = [d.lower().rstrip('.') for d in fingerprint['search_domains']]
+        return compiled
+
+    def snapshot(self) -> NetworkSnapshot:
+        if self.interface is not None:
+            interface = self.interface
+            gateway = read_default_route(self.route_path, interface)[1]
+        else:
+            interface, gateway = read_default_route(self.route_path)
+            if interface is None:
+                interface = read_ipv6_default_interface()
+        return NetworkSnapshot(
+            interface=interface,
+            gateway=gateway,
+            address=self.address or interface_address(interface),
+            search_domains=read_search_domains(self.resolv_path),
+            ssid=wireless_ssid(interface) if self._wants_ssid else None,
+        )
+
+    def detect(self) -> LocationResult:
+        start = time.perf_counter()
+        snap = self.snapshot()
+
+        if snap.interface is None:
+            location, reason = Location.NO_NETWORK, "no default route"
+        elif self.interface is not None and not snap.address and snap.gateway is None:
+            location, reason = Location.NO_NETWORK, f"{snap.interface} has no address"
+        else:
+            match = next((i for i, fp in enumerate(self.fingerprints) if self._matches(fp, snap)), None)
+            if match is not None:
+                location, reason = Location.CAMPUS, f"matched fingerprint {match + 1}"
+            elif self.configured:
+                location, reason = Location.OFF_CAMPUS, "no campus fingerprint matched"
+            else:
+                location, reason = Location.UNKNOWN, "no campus fingerprints configured"
+
+        return LocationResult(location, snap, reason, time.perf_counter() - start)
+
+    @staticmethod
+    def _matches(fp: Dict[str, object], snap: NetworkSnapshot) -> bool:
+        if 'subnets' in fp:
+            if not snap.address:
+                return False
+            address = ipaddress.ip_address(snap.address)
+            if not any(address in net for net in fp['subnets']):
+                return False
+        if 'gateways' in fp and snap.gateway not in fp['gateways']:
+            return False
+        if 'interfaces' in fp and snap.interface not in fp['interfaces']:
+            return False
+        if 'search_domains' in fp:
+            if not any(d == want or d.endswith('.' + want)
+                       for d in snap.search_domains for want in fp['search_domains']):
+                return False
+        if 'ssids' in fp and snap.ssid not in fp['ssids']:
+            return False
+        return True
@@ -4,30 +4,37 @@ IITM Login Manager - Main CLI Interface
 """
 
 import argparse
+import re
+import sqlite3
 import sys
 import os
+import time
 from datetime import datetime
-from .automator import IITMNetAccessAutomator, LoginStatus
-import keyring
-import json
+from .deadline import BudgetExceeded
+from .location import LocationDetector
+from .history import HistoryStore
+from .instance import SingleInstance
+from .config import get_config, apply_probe_settings, apply_rtt_settings
+from .lite import ENGINES, select_engine
 
-def load_config():
-    """Load configuration from file"""
-    config_file = os.path.expanduser("~/.config/iitm-login-manager/config.json")
+# The requests-based modules and keyring are imported when first needed, so
+# the standard-library engine starts without them
+
+def load_keyring():
+    """The keyring module, or None when it is not installed"""
     try:
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"Warning: Could not load config: {e}")
-    return {}
+        import keyring
+    except ImportError:
+        return None
+    return keyring
 
 def get_credentials():
     """Get credentials from config and keyring"""
-    config = load_config()
+    config = get_config()
     username = config.get('username')
+    keyring = load_keyring() if username else None
     
-    if username:
+    if keyring is not None:
         try:
             password = keyring.get_password("iitm-login-manager", username)
             if password:
@@ -53,6 +60,10 @@ def setup_credentials():
         return False
     
     # Save to keyring
+    keyring = load_keyring()
+    if keyring is None:
+        print("Error: The keyring package is needed to store the password (pip install keyring)")
+        return False
     try:
         keyring.set_password("iitm-login-manager", username, password)
         print("✅ Password saved securely to system keyring")
@@ -61,20 +72,174 @@ def setup_credentials():
         return False
     
     # Save username to config
-    config_file = os.path.expanduser("~/.config/iitm-login-manager/config.json")
-    config = load_config()
+    config = get_config()
     config['username'] = username
     
     try:
-        os.makedirs(os.path.dirname(config_file), exist_ok=True)
-        with open(config_file, 'w') as f:
-            json.dump(config, f, indent=2)
+        config.save()
         print("✅ Configuration saved")
-    except Exception as e:
+    except OSError as e:
         print(f"Warning: Could not save config: {e}")
     
     return True
 
+def parse_time(value, now=None):
+    """Parse "7d", "12h", "30m" (ago) or an ISO date/time into a timestamp"""
+    now = time.time() if now is None else now
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)([smhdw])', value.strip())
+    if match:
+        units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+        return now - float(match.group(1)) * units[match.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+def show_history(args):
+    """Handle --history and --stats"""
+    try:
+        since = parse_time(args.since) if args.since else 0
+        until = parse_time(args.until) if args.until else None
+    except ValueError as e:
+        print(f"❌ Invalid time: {e}")
+        return 1
+    
+    try:
+        history = HistoryStore()
+    except sqlite3.Error as e:
+        print(f"❌ Could not open history: {e}")
+        return 1
+    
+    if args.history:
+        logins = history.recent_logins(limit=args.limit, since=since, until=until)
+        if not logins:
+            print("No login attempts recorded")
+        for entry in logins:
+            when = datetime.fromtimestamp(entry['ts']).strftime("%Y-%m-%d %H:%M:%S")
+            duration = f"{entry['duration']:.2f}s" if entry['duration'] is not None else "-"
+            interface = f" [{entry['interface']}]" if entry['interface'] else ""
+            print(f"{when}  {entry['outcome']:<14} {duration:>8}{interface}")
+            if args.verbose and entry['phases']:
+                print("    " + ", ".join(f"{phase} {secs:.2f}s" for phase, secs in entry['phases'].items()))
+    
+    if args.stats:
+        stats = history.stats(since=since, until=until)
+        
+        def fmt(value, spec, suffix=""):
+            return "n/a" if value is None else f"{value:{spec}}{suffix}"
+        
+        print(f"Login attempts:  {stats['login_attempts']} ({stats['login_successes']} successful)")
+        print(f"Success rate:    {fmt(stats['success_rate'] and stats['success_rate'] * 100, '.1f', '%')}")
+        print(f"Login latency:   p50 {fmt(stats['latency_p50'], '.2f', 's')}, "
+              f"p95 {fmt(stats['latency_p95'], '.2f', 's')}, p99 {fmt(stats['latency_p99'], '.2f', 's')}")
+        print(f"Probes:          {stats['probes']}")
+        print(f"Uptime:          {fmt(stats['uptime'] and stats['uptime'] * 100, '.2f', '%')} "
+              f"of {stats['observed_seconds'] / 3600:.1f}h observed")
+    
+    history.close()
+    return 0
+
+def show_cached_status():
+    """Handle --status --cached: read the tray's status map, no network access"""
+    from .statusmap import read_status, describe, exit_code
+    record = read_status()
+    print(describe(record))
+    return exit_code(record)
+
+def show_memory(verbose=False, name=None):
+    """Handle --memory: the running tray's RSS, live objects and (verbose) top allocators"""
+    from .memory import describe_report
+    report = SingleInstance(name).memory_report(top=10 if verbose else 0)
+    if report is None:
+        print("❌ IITM Login Manager is not running", file=sys.stderr)
+        return 1
+    for line in describe_report(report):
+        print(line)
+    return 0
+
+def watch_events(types=None, name=None):
+    """Handle --watch: print the running tray's events as NDJSON until it exits"""
+    try:
+        for line in SingleInstance(name).watch(types):
+            print(line, flush=True)
+    except ConnectionRefusedError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 0
+    except BrokenPipeError:
+        # The consumer (e.g. head) went away; don't complain while exiting
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    return 0
+
+def run_multi_interface(args, username, password, interfaces, configure):
+    """Handle --status/--login across several interfaces at once"""
+    def status_callback(interface, status, message):
+        if args.verbose:
+            print(f"[{interface}] Status: {status} - {message}")
+    
+    from .interfaces import MultiInterfaceManager
+    manager = MultiInterfaceManager(username, password, interfaces,
+                                    callback=status_callback, configure=configure)
+    
+    print("Checking internet status on: " + ", ".join(i.name for i in manager.interfaces))
+    for name, result in manager.probe_all().items():
+        address = manager.states[name].address or "no address"
+        print(f"  {name} ({address}): {result.state if result else 'unavailable'}")
+    
+    if args.status:
+        return 0 if manager.online_interfaces() else 1
+    
+    if args.login:
+        results = manager.login_all(timeout=args.timeout)
+        for name, ok in results.items():
+            print(f"  {name}: {'✅ online' if ok else '❌ login failed'}")
+        if any(results.values()):
+            print("✅ Login completed successfully!")
+            return 0
+        print("❌ Login failed")
+        return 1
+    
+    return 0
+
+def run_single_interface(args, username, password, configure, status_callback, engine=None):
+    """Handle --status/--login on the default route"""
+    engine = engine or select_engine('auto')
+    automator = engine(username, password, callback=status_callback)
+    configure(automator)
+    
+    # Check status
+    if args.status:
+        print("Checking internet status...")
+        try:
+            has_internet = automator.check_internet_access(deadline=args.timeout)
+        except BudgetExceeded as e:
+            print(f"❌ {e}")
+            return 1
+        
+        if has_internet:
+            print("✅ Internet access is working!")
+            return 0
+        else:
+            print("❌ No internet access detected")
+            return 1
+    
+    # Perform login
+    if args.login:
+        print(f"Starting login process for user: {username}")
+        success = automator.automate_login(timeout=args.timeout)
+        
+        if args.verbose and automator.last_phase_timings:
+            timings = ", ".join(f"{phase} {secs:.2f}s" for phase, secs in automator.last_phase_timings.items())
+            print(f"Phase timings: {timings}")
+        
+        if success:
+            print("✅ Login completed successfully!")
+            return 0
+        else:
+            print("❌ Login failed")
+            return 1
+    
+    return 0
+
 def main():
     """Main CLI entry point"""
     parser = argparse.ArgumentParser(
@@ -83,9 +248,13 @@ def main():
         epilog="""
 Examples:
   iitm-login-manager --login          # Perform login now
+  iitm-login-manager --login --timeout 30   # Give up after 30 seconds
   iitm-login-manager --status         # Check internet status
+  iitm-login-manager --status --cached      # Last status seen by the tray (no probe)
+  iitm-login-manager --watch          # Stream the tray's events as JSON lines
   iitm-login-manager --setup          # Setup credentials
   iitm-login-manager --tray           # Start system tray app
+  iitm-login-manager --stats --since 7d     # Latency and uptime over the last week
         """
     )
     
@@ -93,6 +262,15 @@ Examples:
                        help='Perform login now')
     parser.add_argument('--status', action='store_true',
                        help='Check current internet status')
+    parser.add_argument('--cached', action='store_true',
+                       help='With --status: print what the running tray last saw instead of probing '
+                            '(cheap enough for status bars to poll)')
+    parser.add_argument('--watch', action='store_true',
+                       help='Stream the running tray\'s events as JSON lines: status, log, login, probe, schedule')
+    parser.add_argument('--events', type=str, metavar='TYPES',
+                       help='With --watch: only these comma-separated event types')
+    parser.add_argument('--memory', action='store_true',
+                       help='Show the running tray\'s memory use; with --verbose, its top allocators')
     parser.add_argument('--setup', action='store_true',
                        help='Setup credentials interactively')
     parser.add_argument('--tray', action='store_true',
@@ -101,16 +279,55 @@ Examples:
                        help='Username for login (if not using saved credentials)')
     parser.add_argument('--password', type=str,
                        help='Password for login (if not using saved credentials)')
+    parser.add_argument('--timeout', type=float, metavar='SECONDS',
+                       help='Overall time budget for --login/--status (default: no limit)')
+    parser.add_argument('--interface', action='append', metavar='NAME',
+                       help='Probe and log in on this interface (repeatable; default: from config)')
+    parser.add_argument('--force', action='store_true',
+                       help='Log in even if the network does not look like the campus network')
+    parser.add_argument('--pipelined', action='store_true',
+                       help='Probe for access while approving and stop as soon as it is confirmed')
+    parser.add_argument('--history', action='store_true',
+                       help='Show recent login attempts')
+    parser.add_argument('--stats', action='store_true',
+                       help='Show login latency percentiles, success rate and uptime')
+    parser.add_argument('--since', type=str, metavar='WHEN',
+                       help='Start of the --history/--stats window: 7d, 12h, 30m or an ISO date')
+    parser.add_argument('--until', type=str, metavar='WHEN',
+                       help='End of the --history/--stats window (default: now)')
+    parser.add_argument('--limit', type=int, default=20,
+                       help='Number of attempts shown by --history (default: 20)')
+    parser.add_argument('--record-cassette', type=str, metavar='PATH',
+                       help='Record all HTTP exchanges (credentials redacted) to a cassette file')
+    parser.add_argument('--replay-cassette', type=str, metavar='PATH',
+                       help='Answer HTTP requests from a cassette instead of the network')
+    parser.add_argument('--replay-realtime', action='store_true',
+                       help='Replay cassette responses with their recorded timing')
+    parser.add_argument('--engine', choices=ENGINES,
+                       help='Login engine: requests, lite (standard library only) or auto, which uses '
+                            'lite when requests/BeautifulSoup are missing (default: from config, auto)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose output')
     
     args = parser.parse_args()
     
+    if args.cached:
+        return show_cached_status()
+    
+    if args.watch:
+        return watch_events(args.events.split(',') if args.events else None)
+    
+    if args.memory:
+        return show_memory(args.verbose)
+    
     # If no arguments, show help
-    if not any([args.login, args.status, args.setup, args.tray]):
+    if not any([args.login, args.status, args.setup, args.tray, args.history, args.stats]):
         parser.print_help()
         return 1
     
+    if args.history or args.stats:
+        return show_history(args)
+    
     # Setup credentials
     if args.setup:
         if setup_credentials():
@@ -123,13 +340,20 @@ Examples:
     # Start tray application
     if args.tray:
         try:
+            # Hand over to an already running tray instead of starting another
+            instance = SingleInstance()
+            if not instance.acquire():
+                instance.send('activate')
+                print("IITM Login Manager tray is already running")
+                return 0
+            
             # Check if GTK is available
             import gi
             gi.require_version('Gtk', '3.0')
             from gi.repository import Gtk
             
             from .tray import main as tray_main
-            tray_main()
+            tray_main(instance=instance)
             return 0
         except ImportError as e:
             print(f"Error: Could not start tray application: {e}")
@@ -161,33 +385,55 @@ Examples:
         if args.verbose:
             print(f"Status: {status} - {message}")
     
-    automator = IITMNetAccessAutomator(username, password, callback=status_callback)
+    config = get_config()
+    engine = select_engine(args.engine or config.get('engine'))
+    if args.verbose:
+        print(f"Login engine: {engine.__name__}")
     
-    # Check status
-    if args.status:
-        print("Checking internet status...")
-        has_internet = automator.check_internet_access()
-        
-        if has_internet:
-            print("✅ Internet access is working!")
-            return 0
-        else:
-            print("❌ No internet access detected")
-            return 1
+    try:
+        history = HistoryStore()
+    except sqlite3.Error as e:
+        print(f"Warning: Could not open login history: {e}")
+        history = None
     
-    # Perform login
-    if args.login:
-        print(f"Starting login process for user: {username}")
-        success = automator.automate_login()
-        
-        if success:
-            print("✅ Login completed successfully!")
-            return 0
-        else:
-            print("❌ Login failed")
+    cassette = None
+    if (args.replay_cassette or args.record_cassette) and engine.__name__ == 'LiteAutomator':
+        print("❌ Cassettes need the requests engine (--engine requests)")
+        return 1
+    if args.replay_cassette:
+        from .cassette import Cassette
+        try:
+            cassette = Cassette.load(args.replay_cassette, realtime=args.replay_realtime)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Could not load cassette: {e}")
             return 1
+    elif args.record_cassette:
+        from .cassette import Cassette
+        cassette = Cassette(args.record_cassette)
     
-    return 0
+    def configure(automator):
+        automator.location = LocationDetector(config.get('campus_fingerprints'))
+        automator.skip_off_campus = not args.force
+        automator.history = history
+        automator.pipelined = args.pipelined or config.get('pipelined_login')
+        apply_probe_settings(config, automator.prober)
+        apply_rtt_settings(config, automator.rtt)
+        if cassette is not None:
+            from .cassette import use_cassette
+            use_cassette(automator, cassette, 'replay' if args.replay_cassette else 'record')
+    
+    try:
+        interfaces = args.interface or config.get('interfaces')
+        if interfaces:
+            if engine.__name__ == 'LiteAutomator':
+                print("❌ Multi-interface login needs the requests engine (--engine requests)")
+                return 1
+            return run_multi_interface(args, username, password, interfaces, configure)
+        return run_single_interface(args, username, password, configure, status_callback, engine)
+    finally:
+        if cassette is not None and args.record_cassette:
+            cassette.save()
+            print(f"Recorded {len(cassette.interactions)} exchanges to {args.record_cassette}")
 
 if __name__ == "__main__":
     sys.exit(main())
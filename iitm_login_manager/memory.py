@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Memory budget and telemetry for long-running processes
+
+The tray runs for weeks, so whatever a login leaves behind adds up. The
+engines drop parsed pages and response bodies as soon as the form fields
+are extracted, and every cache and queue the tray keeps has a bound
+(resolver and RTT caches, event and notification queues). This module
+checks that it stays that way:
+
+- rss_bytes(): the current resident set size, from /proc
+- object_counts(): live sessions, responses and parsed documents
+- top_allocators(): tracemalloc's biggest allocation sites, on demand
+- MemoryBudget: an RSS limit; when it is crossed the owner trims its
+  caches, tracing starts and a warning is printed once
+
+`iitm-login-manager --memory` asks the running tray for memory_report().
+Only the standard library is used.
+"""
+
+import gc
+import os
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+# Classes whose live instances are worth watching: one of each per engine
+# is normal, a growing number is a leak
+TRACKED_TYPES = ('Session', 'LiteSession', 'BeautifulSoup', 'Response', 'LiteResponse', 'Subscription')
+
+MB = 1024 * 1024
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size; None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Largest resident set size so far"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+
+
+def object_counts(names=TRACKED_TYPES) -> Dict[str, int]:
+    """Live instances per class name (walks every tracked object: not for hot paths)"""
+    names = set(names)
+    counts = dict.fromkeys(sorted(names), 0)
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in names:
+            counts[name] += 1
+    return counts
+
+
+def start_tracing(frames: int = 1) -> bool:
+    """Start tracemalloc; True if it was not running yet"""
+    if tracemalloc.is_tracing():
+        return False
+    tracemalloc.start(frames)
+    return True
+
+
+def top_allocators(limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """Biggest allocation sites since tracing started; None if it has not"""
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    return [{'where': str(stat.traceback), 'size': stat.size, 'count': stat.count}
+            for stat in snapshot.statistics('lineno')[:limit]]
+
+
+def memory_report(top: int = 0) -> Dict[str, Any]:
+    """RSS, live object counts and, with top, the biggest allocators
+
+    Asking for allocators starts tracemalloc if needed; they cover
+    allocations from then on, so the first such report has none.
+    """
+    report = {
+        'rss': rss_bytes(),
+        'peak_rss': peak_rss_bytes(),
+        'objects': object_counts(),
+        'gc': list(gc.get_count()),
+        'tracing': tracemalloc.is_tracing(),
+    }
+    if top:
+        if start_tracing():
+            report['top'] = []
+            report['note'] = "tracemalloc started; ask again for allocators"
+        else:
+            report['top'] = top_allocators(top)
+            report['traced'] = tracemalloc.get_traced_memory()[0]
+    return report
+
+
+def describe_report(report: Dict[str, Any]) -> List[str]:
+    """Human-readable lines for --memory"""
+    def mb(value):
+        return "?" if value is None else f"{value / MB:.1f} MB"
+
+    lines = [f"RSS {mb(report.get('rss'))} (peak {mb(report.get('peak_rss'))})"]
+    if report.get('budget'):
+        lines[0] += f", budget {mb(report['budget'])}"
+    objects = report.get('objects') or {}
+    lines.append("Objects: " + ", ".join(f"{name} {count}" for name, count in objects.items()))
+    for name, value in (report.get('caches') or {}).items():
+        lines.append(f"  {name}: {value}")
+    if report.get('note'):
+        lines.append(report['note'])
+    for entry in report.get('top') or []:
+        lines.append(f"  {entry['size'] / 1024:8.1f} KiB {entry['count']:6d}  {entry['where']}")
+    return lines
+
+
+class MemoryBudget:
+    """RSS limit for a long-running process
+
+    check() (on a timer) collects garbage and calls trim() when RSS is
+    over the limit, and starts tracemalloc so a later report shows where
+    the memory went. The warning is printed once per excursion.
+    """
+
+    def __init__(self, limit_mb: float, trim: Optional[Callable[[], None]] = None):
+        self.limit = int(limit_mb * MB)
+        self.trim = trim
+        self.over = False
+        self.trims = 0
+
+    def check(self) -> Optional[int]:
+        """RSS after any trimming; None if it can't be measured"""
+        rss = rss_bytes()
+        if rss is None or not self.limit or rss <= self.limit:
+            self.over = False
+            return rss
+        gc.collect()
+        if self.trim is not None:
+            self.trim()
+        self.trims += 1
+        rss = rss_bytes()
+        if rss is not None and rss > self.limit and not self.over:
+            self.over = True
+            start_tracing()
+            print(f"Warning: memory use {rss / MB:.1f} MB is over the {self.limit / MB:.0f} MB budget")
+        return rss
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Well-known file locations
+"""
+
+import os
+
+APP_NAME = "iitm-login-manager"
+
+CONFIG_DIR = os.path.expanduser(f"~/.config/{APP_NAME}")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+
+
+def runtime_dir() -> str:
+    """Per-user runtime directory for locks and sockets
+
+    Uses $XDG_RUNTIME_DIR when available and falls back to ~/.cache so the
+    CLI still works on headless boxes without a login session.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
+def runtime_path(name: str) -> str:
+    """Path of a file inside the runtime directory"""
+    return os.path.join(runtime_dir(), name)
+
+
+def cache_dir() -> str:
+    """Per-user cache directory for learned state that is safe to lose"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def cache_path(name: str) -> str:
+    """Path of a file inside the cache directory"""
+    return os.path.join(cache_dir(), name)
+
+
+def data_dir() -> str:
+    """Per-user data directory for state worth keeping, like login history"""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def data_path(name: str) -> str:
+    """Path of a file inside the data directory"""
+    return os.path.join(data_dir(), name)
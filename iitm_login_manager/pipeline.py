@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Verification raced against the approval step
+
+The sequential flow sends the approval POST, waits for its answer, sleeps
+activation_wait seconds and only then checks for internet access. Access
+usually switches on the moment the portal accepts the approval, sometimes
+before its answer has arrived. In pipelined mode the engine starts a
+VerificationRace as it sends the approval request: generate_204 probes
+run in the background until either an online probe or an 'authorized'
+approval answer confirms access. The first confirmation ends the run and
+cancels the rest - the probes stop, and an approval request still in
+flight is aborted through the race's token.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from .cancel import CancelToken, Cancelled
+
+
+class VerificationRace:
+    """Background connectivity probes racing the approval request
+
+    probe() makes one lightweight probe and returns True if it shows open
+    internet access. token is a child of the run's token: it is cancelled
+    when the race is decided (or the run is cancelled), which is what
+    stops the probes and the approval request.
+    """
+
+    def __init__(self, probe: Callable[[], bool], parent: Optional[CancelToken] = None,
+                 interval: float = 0.25):
+        self.probe = probe
+        self.interval = interval
+        self.parent = parent
+        self.token = parent.child() if parent is not None else CancelToken()
+        self.winner: Optional[str] = None  # 'probe' or 'approval'
+        self.probes = 0
+        self.started = None
+        self.answered_at = None   # when the approval answer arrived, if it did
+        self.confirmed_at = None
+        self.probe_latency = 0.0  # of the confirming probe
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="verification-race")
+        self._thread.start()
+
+    def _run(self):
+        while not self.token.cancelled:
+            self.probes += 1
+            start = time.monotonic()
+            try:
+                online = self.probe()
+            except Cancelled:
+                return
+            if online:
+                self.probe_latency = time.monotonic() - start
+                self.confirm('probe')
+                return
+            if self.token.wait(self.interval):
+                return
+
+    def answered(self, authorized: bool):
+        """The approval answer arrived; authorized confirms access"""
+        self.answered_at = time.monotonic()
+        if authorized:
+            self.confirm('approval')
+
+    def confirm(self, source: str) -> bool:
+        """Decide the race for source; False if it was already decided"""
+        with self._lock:
+            if self.winner is not None or self.token.cancelled:
+                return False
+            self.winner = source
+            self.confirmed_at = time.monotonic()
+        self.token.cancel(f"Access confirmed by {source}")
+        return True
+
+    def stop(self, timeout: float = 1.0):
+        """End the race (if still open) and wait for the probe thread"""
+        self.token.cancel("Verification finished")
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def saved(self, activation_wait: float) -> float:
+        """Seconds the sequential flow would have taken past the confirmation
+
+        It would have waited for the approval answer, slept activation_wait
+        and made one more request to verify; the confirming probe's latency
+        stands in for that request. An aborted approval answer counts as
+        arriving at the confirmation, so this is a lower bound.
+        """
+        if self.confirmed_at is None:
+            return 0.0
+        answered = max(self.answered_at or self.confirmed_at, self.confirmed_at)
+        return answered + activation_wait + self.probe_latency - self.confirmed_at
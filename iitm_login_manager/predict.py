@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Predictive pre-emptive re-login
+
+Sessions on campus drop at recurring moments: approvals expiring a fixed
+time after login, nightly portal maintenance, DHCP renewals. DropPredictor
+learns two profiles from the connectivity losses in the login history:
+
+- time of day: on what fraction of observed days a drop happened in each
+  slot of the day
+- time since login: the chance that a session which survived to a given age
+  drops in the next slot (a discrete hazard rate)
+
+next_drop() turns these into the next likely drop and a login time shortly
+before it, with the profile's value as the confidence.
+"""
+
+import bisect
+from datetime import datetime
+from typing import Dict, List, Optional
+
+DAY = 86400
+
+
+class Prediction:
+    """A likely upcoming drop and when to log in ahead of it"""
+
+    def __init__(self, drop_at: float, login_at: float, confidence: float, basis: str):
+        self.drop_at = drop_at
+        self.login_at = login_at
+        self.confidence = confidence
+        self.basis = basis  # 'time_of_day' or 'since_login'
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'drop_at': datetime.fromtimestamp(self.drop_at).isoformat(),
+            'login_at': datetime.fromtimestamp(self.login_at).isoformat(),
+            'confidence': round(self.confidence, 3),
+            'basis': self.basis,
+        }
+
+    def __repr__(self):
+        when = datetime.fromtimestamp(self.drop_at).strftime("%H:%M")
+        return f"Prediction({when}, {self.confidence:.0%}, {self.basis})"
+
+
+class DropPredictor:
+    """Learn drop times from history and plan logins ahead of them
+
+    Both profiles count a drop in a slot and the one after it, so drops that
+    straddle a slot boundary from day to day still add up.
+    """
+
+    def __init__(self, slot: float = 900, lead: float = 300, min_confidence: float = 0.6,
+                 min_drops: int = 3, max_session: float = 2 * DAY):
+        self.slot = slot
+        self.lead = lead  # log in this long before the predicted drop
+        self.min_confidence = min_confidence
+        self.min_drops = min_drops
+        self.max_session = max_session
+        self.days = 0
+        self.drop_count = 0
+        self.time_of_day = [0.0] * int(DAY // slot)
+        self.since_login = [0.0] * int(max_session // slot)
+
+    @classmethod
+    def from_history(cls, history, days: float = 28, now: Optional[float] = None,
+                     **kwargs) -> "DropPredictor":
+        """Fit on the last few weeks of a HistoryStore"""
+        now = datetime.now().timestamp() if now is None else now
+        since = now - days * DAY
+        predictor = cls(**kwargs)
+        predictor.fit([ts for ts, _ in history.drop_events(since, now)],
+                      history.login_times(since, now), since, now)
+        return predictor
+
+    def _time_of_day_slot(self, ts: float) -> int:
+        moment = datetime.fromtimestamp(ts)
+        return int((moment.hour * 3600 + moment.minute * 60 + moment.second) // self.slot)
+
+    def fit(self, drops: List[float], logins: List[float], start: float, end: float):
+        """Learn from drop times and successful login times within [start, end)"""
+        drops = sorted(d for d in drops if start <= d < end)
+        logins = sorted(l for l in logins if start <= l < end)
+        self.drop_count = len(drops)
+        self.days = max(1, round((end - start) / DAY))
+
+        # Distinct days with a drop in each time-of-day slot (or the one after)
+        slots = len(self.time_of_day)
+        days_with_drop = [set() for _ in range(slots)]
+        for ts in drops:
+            day = datetime.fromtimestamp(ts).date()
+            index = self._time_of_day_slot(ts)
+            days_with_drop[index].add(day)
+            days_with_drop[index - 1].add(day)  # wraps to the last slot at midnight
+        self.time_of_day = [min(1.0, len(days) / self.days) for days in days_with_drop]
+
+        # Hazard by session age: first drop of each session versus sessions still up
+        ages = len(self.since_login)
+        dropped = [0] * ages
+        at_risk = [0] * ages
+        for i, login in enumerate(logins):
+            session_end = logins[i + 1] if i + 1 < len(logins) else end
+            first = bisect.bisect_right(drops, login)
+            drop = drops[first] if first < len(drops) and drops[first] < session_end else None
+            lasted = (drop if drop is not None else session_end) - login
+            for index in range(min(ages, int(lasted // self.slot) + 1)):
+                at_risk[index] += 1
+            if drop is not None and lasted < self.max_session:
+                index = int(lasted // self.slot)
+                dropped[index] += 1
+                if index > 0:
+                    dropped[index - 1] += 1
+        self.since_login = [dropped[i] / at_risk[i] if at_risk[i] >= self.min_drops else 0.0
+                            for i in range(ages)]
+
+    def explains_age(self, age: Optional[float]) -> bool:
+        """Whether a drop at this session age fits the learned since-login pattern"""
+        if age is None or not 0 <= age < self.max_session:
+            return False
+        return self.since_login[int(age // self.slot)] >= self.min_confidence
+
+    def next_drop(self, now: float, last_login: Optional[float] = None) -> Optional[Prediction]:
+        """The earliest likely drop in the next day, if any is confident enough"""
+        if self.drop_count < self.min_drops:
+            return None
+        candidates = []
+
+        midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        slots = len(self.time_of_day)
+        first = int((now - midnight) // self.slot) + 1
+        for index in range(first, first + slots):
+            confidence = self.time_of_day[index % slots]
+            if confidence >= self.min_confidence:
+                candidates.append(Prediction(midnight + index * self.slot, 0, confidence, 'time_of_day'))
+                break
+
+        if last_login is not None:
+            first = int(max(0, now - last_login) // self.slot) + 1
+            for index in range(first, len(self.since_login)):
+                confidence = self.since_login[index]
+                if confidence >= self.min_confidence:
+                    candidates.append(Prediction(last_login + index * self.slot, 0, confidence, 'since_login'))
+                    break
+
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda p: p.drop_at)
+        best.login_at = max(now, best.drop_at - self.lead)
+        return best
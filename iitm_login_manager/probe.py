@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Lightweight connectivity probe
+
+Fetches a "generate_204" endpoint, which costs a few hundred bytes and tells
+apart three states: online (204), captive (redirected or answered by the
+portal) and offline (no answer).
+"""
+
+import time
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from .resolver import Resolver, install_resolver
+from .rtt import RTTEstimator
+
+
+# What requests' Response.is_redirect counts as a redirect (given a Location)
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+class ProbeState:
+    ONLINE = "online"
+    CAPTIVE = "captive"
+    OFFLINE = "offline"
+
+
+class ProbeResult:
+    """Outcome of a single connectivity probe"""
+
+    def __init__(self, state: str, latency: float, bytes_used: int, url: str, detail: str = "",
+                 source: str = "local", probes: int = 1):
+        self.state = state
+        self.latency = latency
+        self.bytes_used = bytes_used
+        self.probes = probes  # requests behind this result; bytes_used covers them all
+        self.url = url
+        self.detail = detail
+        self.source = source  # "local", or "peer" for observations shared over the LAN
+
+    @property
+    def online(self) -> bool:
+        return self.state == ProbeState.ONLINE
+
+    def to_dict(self):
+        return {
+            'state': self.state,
+            'latency': self.latency,
+            'bytes': self.bytes_used,
+            'url': self.url,
+            'detail': self.detail,
+            'source': self.source,
+        }
+
+    def __repr__(self):
+        return f"ProbeResult({self.state}, {self.latency * 1000:.0f}ms, {self.bytes_used}B)"
+
+
+def classify_probe(url: str, status_code: int, location: str, text: str, portal_host: str,
+                   latency: float, bytes_used: int) -> ProbeResult:
+    """ProbeResult for a generate_204 answer"""
+    if status_code == 204:
+        return ProbeResult(ProbeState.ONLINE, latency, bytes_used, url)
+
+    if status_code in REDIRECT_CODES or portal_host in location or portal_host in text:
+        return ProbeResult(ProbeState.CAPTIVE, latency, bytes_used, url, location or f"HTTP {status_code}")
+
+    # Some other answer in place of the empty 204 - something intercepted it
+    return ProbeResult(ProbeState.CAPTIVE, latency, bytes_used, url, f"HTTP {status_code}")
+
+
+def combine_attempts(results: List[ProbeResult]) -> Optional[ProbeResult]:
+    """The last of several probes, charged with the probes and bytes of all of them"""
+    if not results:
+        return None
+    result = results[-1]
+    result.probes = sum(r.probes for r in results)
+    result.bytes_used = sum(r.bytes_used for r in results)
+    return result
+
+
+class ConnectivityProber:
+    """Cheap captive-portal aware connectivity checks"""
+
+    DEFAULT_TARGETS = [
+        'http://connectivitycheck.gstatic.com/generate_204',
+        'http://cp.cloudflare.com/generate_204',
+    ]
+
+    # Rough size of request line plus headers we send, for byte budgeting
+    REQUEST_OVERHEAD = 200
+
+    def __init__(self, targets=None, timeout: float = 5, portal_host: str = 'netaccess.iitm.ac.in',
+                 resolver: Optional[Resolver] = None, rtt: Optional[RTTEstimator] = None,
+                 source_address: Optional[str] = None, device: Optional[str] = None):
+        self.targets = list(targets or self.DEFAULT_TARGETS)
+        self.timeout = timeout
+        self.portal_host = portal_host
+        self.rtt = rtt
+        # Kept for AsyncProber, which makes its connections the same way
+        self.resolver = resolver
+        self.source_address = source_address
+        self.device = device
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'iitm-login-manager', 'Connection': 'keep-alive'})
+        if resolver is not None:
+            install_resolver(self.session, resolver, source_address=source_address, device=device)
+
+    def probe(self, url: Optional[str] = None, timeout: Optional[float] = None) -> ProbeResult:
+        """Probe a single target (the first configured one by default)"""
+        url = url or self.targets[0]
+        host = urlparse(url).hostname
+        if timeout is None:
+            timeout = self.rtt.timeout(host, self.timeout) if self.rtt else self.timeout
+        start = time.monotonic()
+        try:
+            response = self.session.get(url, timeout=timeout, allow_redirects=False)
+        except requests.RequestException as e:
+            if self.rtt and isinstance(e, requests.Timeout):
+                self.rtt.on_timeout(host)
+            return ProbeResult(ProbeState.OFFLINE, time.monotonic() - start,
+                               self.REQUEST_OVERHEAD, url, str(e))
+
+        latency = time.monotonic() - start
+        if self.rtt:
+            self.rtt.observe(host, latency)
+            self.rtt.save(min_interval=300)
+        bytes_used = self.REQUEST_OVERHEAD + len(response.content) + sum(
+            len(k) + len(v) + 4 for k, v in response.headers.items()
+        )
+        return classify_probe(url, response.status_code, response.headers.get('Location', ''),
+                              response.text, self.portal_host, latency, bytes_used)
+
+    def probe_any(self, timeout: Optional[float] = None) -> ProbeResult:
+        """Try each target in turn until one gives a definite answer
+
+        The result counts the probes and bytes of every target tried.
+        """
+        results = []
+        for url in self.targets:
+            results.append(self.probe(url, timeout))
+            if results[-1].state != ProbeState.OFFLINE:
+                break
+        return combine_attempts(results)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Caching resolver with Happy Eyeballs connects
+
+On some campus networks the AAAA lookup or the IPv6 connect to the portal
+stalls until the timeout before anything falls back to IPv4. This module
+resolves both address families in parallel, caches the answers (including
+failures), and races connection attempts across families in the style of
+RFC 8305 so the first address that answers wins.
+
+install_resolver() mounts it on a requests.Session so the automator's
+portal session and the connectivity prober both go through it.
+"""
+
+import errno
+import ipaddress
+import queue
+import selectors
+import socket
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+try:
+    from urllib3.exceptions import NameResolutionError
+except ImportError:
+    # urllib3 < 2 reports resolution failures as NewConnectionError
+    NameResolutionError = None
+
+from .cancel import abort_socket
+
+AddrInfo = Tuple[int, int, int, str, tuple]
+
+
+class Resolver:
+    """DNS cache with negative caching and dual-stack connection racing
+
+    getaddrinfo() does not expose record TTLs, so positive answers are kept
+    for a fixed ttl and failures for negative_ttl seconds.
+    """
+
+    # RFC 8305 recommended values
+    RESOLUTION_DELAY = 0.05  # wait this long for AAAA once A has answered
+    CONNECTION_ATTEMPT_DELAY = 0.25  # head start for each attempt before the next
+
+    def __init__(self, ttl: float = 300, negative_ttl: float = 30, max_entries: int = 256,
+                 resolve_timeout: float = 5):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.resolve_timeout = resolve_timeout
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (host, port) -> (expires, addrinfos or exception)
+        self._stats = {
+            'hits': 0, 'misses': 0, 'negative_hits': 0, 'expired': 0, 'evictions': 0,
+            'connects': 0, 'ipv6_wins': 0, 'ipv4_wins': 0,
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """Cache and connection statistics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._cache)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def resolve(self, host: str, port: int) -> List[AddrInfo]:
+        """Resolve host to stream addrinfos, IPv6 first, using the cache"""
+        if _is_ip_literal(host):
+            return socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires, answer = entry
+                if expires > now:
+                    self._cache.move_to_end(key)
+                    if isinstance(answer, Exception):
+                        self._stats['negative_hits'] += 1
+                        raise answer
+                    self._stats['hits'] += 1
+                    return list(answer)
+                del self._cache[key]
+                self._stats['expired'] += 1
+            self._stats['misses'] += 1
+
+        try:
+            answer = self._resolve_both(host, port)
+        except socket.gaierror as e:
+            self._store(key, e, self.negative_ttl)
+            raise
+        self._store(key, answer, self.ttl)
+        return list(answer)
+
+    def _store(self, key, answer, ttl: float):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, answer)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def _resolve_both(self, host: str, port: int) -> List[AddrInfo]:
+        """Look up AAAA and A in parallel so a stalled AAAA can't block IPv4"""
+        families = [socket.AF_INET6, socket.AF_INET] if socket.has_ipv6 else [socket.AF_INET]
+        answers = queue.Queue()
+
+        def lookup(family):
+            try:
+                answers.put((family, socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)))
+            except OSError as e:
+                answers.put((family, e))
+
+        for family in families:
+            threading.Thread(target=lookup, args=(family,), daemon=True).start()
+
+        results = {}
+        deadline = time.monotonic() + self.resolve_timeout
+        while len(results) < len(families):
+            remaining = deadline - time.monotonic()
+            if any(isinstance(r, list) and r for r in results.values()):
+                # Have a usable answer; only give the other family a short grace period
+                remaining = min(remaining, self.RESOLUTION_DELAY)
+            if remaining <= 0:
+                break
+            try:
+                family, result = answers.get(timeout=remaining)
+            except queue.Empty:
+                break
+            results[family] = result
+
+        v6 = results.get(socket.AF_INET6)
+        v4 = results.get(socket.AF_INET)
+        v6 = v6 if isinstance(v6, list) else []
+        v4 = v4 if isinstance(v4, list) else []
+        if not v6 and not v4:
+            errors = [r for r in results.values() if isinstance(r, Exception)]
+            if errors and isinstance(errors[0], socket.gaierror):
+                raise errors[0]
+            raise socket.gaierror(socket.EAI_NONAME, f"Could not resolve {host}")
+        return interleave(v6, v4)
+
+    def create_connection(self, address: Tuple[str, int], timeout: Optional[float] = None,
+                          source_address: Optional[tuple] = None,
+                          socket_options: Optional[list] = None) -> socket.socket:
+        """Connect to (host, port), racing addresses RFC 8305 style
+
+        Attempts start CONNECTION_ATTEMPT_DELAY apart, alternating address
+        families; the first to complete wins and the rest are closed.
+        """
+        host, port = address
+        addrinfos = self.resolve(host, port)
+        if source_address:
+            # A bound source address pins the family
+            family = socket.AF_INET6 if ':' in source_address[0] else socket.AF_INET
+            addrinfos = [a for a in addrinfos if a[0] == family] or addrinfos
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sel = selectors.DefaultSelector()
+        pending = list(addrinfos)
+        attempts = {}
+        last_error = None
+        next_attempt = time.monotonic()
+
+        try:
+            while pending or attempts:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    raise socket.timeout(f"timed out connecting to {host}:{port}")
+
+                if pending and (now >= next_attempt or not attempts):
+                    family, socktype, proto, _, sockaddr = pending.pop(0)
+                    try:
+                        sock = socket.socket(family, socktype, proto)
+                    except OSError as e:
+                        last_error = e
+                        continue
+                    try:
+                        for opt in socket_options or []:
+                            sock.setsockopt(*opt)
+                        if source_address:
+                            sock.bind(source_address)
+                        sock.setblocking(False)
+                        err = sock.connect_ex(sockaddr)
+                    except OSError as e:
+                        sock.close()
+                        last_error = e
+                        continue
+                    if err not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+                        sock.close()
+                        last_error = OSError(err, f"connect to {sockaddr[0]} failed")
+                        next_attempt = time.monotonic()  # move on immediately
+                        continue
+                    attempts[sock] = family
+                    sel.register(sock, selectors.EVENT_WRITE)
+                    next_attempt = time.monotonic() + self.CONNECTION_ATTEMPT_DELAY
+
+                wait = None
+                if pending:
+                    wait = max(0.0, next_attempt - time.monotonic())
+                if deadline is not None:
+                    remaining = max(0.0, deadline - time.monotonic())
+                    wait = remaining if wait is None else min(wait, remaining)
+
+                for key, _ in sel.select(wait):
+                    sock = key.fileobj
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    family = attempts.pop(sock)
+                    sel.unregister(sock)
+                    if err == 0:
+                        sock.setblocking(True)
+                        sock.settimeout(timeout)
+                        with self._lock:
+                            self._stats['connects'] += 1
+                            self._stats['ipv6_wins' if family == socket.AF_INET6 else 'ipv4_wins'] += 1
+                        return sock
+                    sock.close()
+                    last_error = OSError(err, f"connect to {host}:{port} failed")
+                    next_attempt = time.monotonic()  # failure: start the next one now
+        finally:
+            for sock in attempts:
+                sock.close()
+            sel.close()
+
+        raise last_error or OSError(f"Could not connect to {host}:{port}")
+
+
+def interleave(first: List[AddrInfo], second: List[AddrInfo]) -> List[AddrInfo]:
+    """Alternate address families, starting with the first list (RFC 8305 4)"""
+    merged = []
+    for i in range(max(len(first), len(second))):
+        if i < len(first):
+            merged.append(first[i])
+        if i < len(second):
+            merged.append(second[i])
+    return merged
+
+
+def device_options(device: Optional[str]) -> list:
+    """Socket options pinning a connection to a network device (SO_BINDTODEVICE)"""
+    if not device:
+        return []
+    return [(socket.SOL_SOCKET, getattr(socket, 'SO_BINDTODEVICE', 25), device.encode())]
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+class _ResolverConnectionMixin:
+    """Replaces urllib3's connect step with Resolver.create_connection"""
+
+    resolver = None
+    adapter = None
+
+    def _new_conn(self):
+        sock = self._connect()
+        token = self.adapter.token
+        if token is not None and token.cancelled:
+            # Cancelled while connecting: don't let the request go out
+            sock.close()
+            raise NewConnectionError(self, f"Cancelled: {token.reason}")
+        # The connection, not sock: for HTTPS urllib3 replaces conn.sock with
+        # the TLS socket, and wrapping detaches (closes) this one
+        self.adapter.track(self)
+        return sock
+
+    def _connect(self):
+        timeout = self.timeout if isinstance(self.timeout, (int, float)) else None
+        try:
+            return self.resolver.create_connection(
+                (self._dns_host, self.port), timeout,
+                source_address=self.source_address,
+                socket_options=self.socket_options,
+            )
+        except socket.gaierror as e:
+            if NameResolutionError is not None:
+                raise NameResolutionError(self.host, self, e) from e
+            raise NewConnectionError(self, f"Failed to resolve {self.host}: {e}") from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+
+class ResolverAdapter(HTTPAdapter):
+    """requests transport adapter whose connections use a Resolver
+
+    source_address and device pin every connection to one local address or
+    network interface (SO_BINDTODEVICE) for multi-interface operation.
+
+    While token (a CancelToken) is cancelled no new connection is made, and
+    abort() shuts down the open ones so requests blocked on them fail at
+    once instead of waiting for their timeout.
+    """
+
+    def __init__(self, resolver: Resolver, source_address: Optional[str] = None,
+                 device: Optional[str] = None, **kwargs):
+        self.resolver = resolver
+        self.source_address = source_address
+        self.device = device
+        self.token = None
+        self._connections = weakref.WeakSet()
+        attrs = {'resolver': resolver, 'adapter': self}
+        http_conn = type('ResolverHTTPConnection', (_ResolverConnectionMixin, HTTPConnection), attrs)
+        https_conn = type('ResolverHTTPSConnection', (_ResolverConnectionMixin, HTTPSConnection), attrs)
+        self._pool_classes = {
+            'http': type('ResolverHTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_conn}),
+            'https': type('ResolverHTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_conn}),
+        }
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.source_address:
+            kwargs['source_address'] = (self.source_address, 0)
+        if self.device:
+            kwargs['socket_options'] = HTTPConnection.default_socket_options + device_options(self.device)
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def track(self, conn):
+        self._connections.add(conn)
+
+    def abort(self) -> int:
+        """Shut down every open connection; returns how many"""
+        # conn.sock is read now, so TLS connections are cut at their wrapped socket
+        return sum(abort_socket(getattr(conn, 'sock', None)) for conn in list(self._connections))
+
+
+def install_resolver(session, resolver: Resolver, source_address: Optional[str] = None,
+                     device: Optional[str] = None):
+    """Route all of a requests.Session's connections through resolver"""
+    adapter = ResolverAdapter(resolver, source_address=source_address, device=device)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Per-host RTT estimation for adaptive timeouts
+
+Keeps a smoothed round-trip time and its variation for every host we talk
+to, the same way TCP computes its retransmission timeout (RFC 6298), and
+derives request timeouts from them. The estimates are persisted so a fresh
+process starts with what earlier runs learned.
+
+Login requests are estimated per phase as well as per host: a portal
+answers its login page in milliseconds but may take seconds to process
+the login or approval POST, and one shared estimate would let the fast
+requests cut the slow ones off.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+from .paths import cache_path
+
+
+class RTTEstimator:
+    """SRTT/RTTVAR estimator with clamped, backed-off timeouts"""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+    GRANULARITY = 0.05  # lower bound for the variance term, in seconds
+
+    def __init__(self, path: Optional[str] = None, floor: float = 0.3, ceiling: float = 15,
+                 max_hosts: int = 64, max_age: float = 30 * 86400):
+        self.path = path
+        self.floor = floor
+        self.ceiling = ceiling
+        self.max_hosts = max_hosts
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._hosts = {}  # key -> {'srtt', 'rttvar', 'samples', 'updated', 'backoff'}
+        self._dirty = False
+        self._last_save = 0.0
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, **kwargs) -> "RTTEstimator":
+        """Create an estimator primed from the persisted history"""
+        estimator = cls(path or cache_path("rtt.json"), **kwargs)
+        try:
+            with open(estimator.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return estimator
+
+        cutoff = time.time() - estimator.max_age
+        for host, entry in data.get('hosts', {}).items():
+            try:
+                if entry['updated'] >= cutoff:
+                    estimator._hosts[host] = {
+                        'srtt': float(entry['srtt']),
+                        'rttvar': float(entry['rttvar']),
+                        'samples': int(entry['samples']),
+                        'updated': float(entry['updated']),
+                        'backoff': 1,
+                    }
+            except (KeyError, TypeError, ValueError):
+                continue
+        return estimator
+
+    @staticmethod
+    def key(host: str, phase: Optional[str] = None) -> str:
+        """Estimate key: the host, or the host and login phase"""
+        return f"{host} {phase}" if phase else host
+
+    def observe(self, host: str, rtt: float, phase: Optional[str] = None):
+        """Feed a measured round-trip time (seconds) for host"""
+        key = self.key(host, phase)
+        with self._lock:
+            entry = self._hosts.get(key)
+            if entry is None:
+                entry = self._hosts[key] = {'srtt': rtt, 'rttvar': rtt / 2, 'samples': 0,
+                                             'updated': time.time(), 'backoff': 1}
+                self._evict()
+            else:
+                entry['rttvar'] = (1 - self.BETA) * entry['rttvar'] + self.BETA * abs(entry['srtt'] - rtt)
+                entry['srtt'] = (1 - self.ALPHA) * entry['srtt'] + self.ALPHA * rtt
+            entry['samples'] += 1
+            entry['updated'] = time.time()
+            entry['backoff'] = 1
+            self._dirty = True
+
+    def on_timeout(self, host: str, phase: Optional[str] = None):
+        """A request to host timed out: double its timeout until the next sample"""
+        with self._lock:
+            entry = self._hosts.get(self.key(host, phase))
+            if entry is not None:
+                entry['backoff'] = min(entry['backoff'] * 2, 64)
+
+    def timeout(self, host: str, default: float, phase: Optional[str] = None) -> float:
+        """Timeout for the next request to host
+
+        Without history this is default (the old fixed timeout). Otherwise
+        SRTT + K*RTTVAR, backed off after timeouts and clamped to
+        [floor, min(ceiling, default * backoff)].
+        """
+        with self._lock:
+            entry = self._hosts.get(self.key(host, phase))
+            if entry is None:
+                return default
+            rto = entry['srtt'] + max(self.GRANULARITY, self.K * entry['rttvar'])
+            backoff = entry['backoff']
+        upper = min(self.ceiling * backoff, default * backoff)
+        return max(self.floor, min(rto * backoff, upper))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {host: {'srtt': e['srtt'], 'rttvar': e['rttvar'], 'samples': e['samples']}
+                    for host, e in self._hosts.items()}
+
+    def save(self, min_interval: float = 0):
+        """Persist estimates atomically (skipped if unchanged or saved recently)"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty or time.monotonic() - self._last_save < min_interval:
+                return
+            data = {'hosts': {host: {k: e[k] for k in ('srtt', 'rttvar', 'samples', 'updated')}
+                              for host, e in self._hosts.items()}}
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+        directory = os.path.dirname(self.path) or '.'
+        try:
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.rtt-')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save RTT history: {e}")
+
+    def _evict(self):
+        # Called with the lock held: drop the least recently updated hosts
+        while len(self._hosts) > self.max_hosts:
+            oldest = min(self._hosts, key=lambda h: self._hosts[h].get('updated', 0))
+            del self._hosts[oldest]
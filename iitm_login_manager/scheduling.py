@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Scheduling helpers
+
+Every installation used to log in at exactly 08:00, so a whole department
+hit the portal in the same second. Scheduled logins are now spread over a
+window with a per-host offset derived from the machine id and username:
+stable from day to day for one machine, uniform across machines. Retries
+after a failed scheduled login add a random offset on top.
+"""
+
+import hashlib
+import random
+import socket
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+MACHINE_ID_PATHS = ("/etc/machine-id", "/var/lib/dbus/machine-id")
+
+# Login times for each schedule option in the settings dialog
+SCHEDULE_TIMES = {
+    'daily': ["08:00"],
+    'twice': ["08:00", "20:00"],
+    'manual': [],
+}
+
+
+def login_times(schedule_type: str) -> List[str]:
+    """Planned login times ("HH:MM") for a schedule option"""
+    return list(SCHEDULE_TIMES.get(schedule_type, []))
+
+
+def shift_time(at: str, seconds: float) -> str:
+    """Shift an "HH:MM[:SS]" time of day by seconds, wrapping at midnight
+
+    Returns "HH:MM:SS", the format schedule's .at() accepts for daily jobs.
+    """
+    fmt = "%H:%M:%S" if at.count(":") == 2 else "%H:%M"
+    base = datetime.strptime(at, fmt)
+    shifted = base + timedelta(seconds=int(round(seconds)))
+    return shifted.strftime("%H:%M:%S")
+
+
+def machine_id() -> str:
+    """Stable identifier of this machine (falls back to the hostname)"""
+    for path in MACHINE_ID_PATHS:
+        try:
+            with open(path, 'r') as f:
+                value = f.read().strip()
+            if value:
+                return value
+        except OSError:
+            continue
+    return socket.gethostname()
+
+
+def jitter_offset(window: float, username: str = "", host_id: Optional[str] = None) -> float:
+    """Deterministic offset in [0, window) seconds for this host and user"""
+    if window <= 0:
+        return 0.0
+    host_id = machine_id() if host_id is None else host_id
+    digest = hashlib.sha256(f"{host_id}:{username}".encode()).digest()
+    fraction = int.from_bytes(digest[:8], 'big') / 2 ** 64
+    return fraction * window
+
+
+def jittered_times(schedule_type: str, window: float, username: str = "",
+                   host_id: Optional[str] = None) -> List[str]:
+    """Login times for a schedule option, shifted by this host's offset"""
+    offset = jitter_offset(window, username, host_id)
+    return [shift_time(at, offset) for at in login_times(schedule_type)]
+
+
+def retry_delay(attempt: int, base: float = 30, cap: float = 600,
+                rng: Optional[random.Random] = None) -> float:
+    """Randomized delay before retry number attempt (1-based)
+
+    Exponential backoff with "full jitter": uniform between base and
+    min(cap, base * 2 ** (attempt - 1)), so clients that failed together
+    do not come back together.
+    """
+    rng = rng or random
+    upper = min(cap, base * 2 ** max(0, attempt - 1))
+    return rng.uniform(base, max(base, upper))
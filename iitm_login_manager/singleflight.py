@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Single-flight login coordination
+
+Makes sure only one login runs at a time. Inside a process, concurrent
+callers join the attempt that is already in flight and receive its result.
+Across processes (tray, CLI, scheduler), an flock-based lock file serializes
+logins and carries the result of the last run so a waiting process can report
+it instead of starting its own.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Non-POSIX platform: fall back to in-process coordination only
+    fcntl = None
+
+from .paths import runtime_path
+
+
+class _Call:
+    """One in-flight invocation shared by the leader and its waiters"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Collapse concurrent calls into a single execution
+
+    The first caller runs the function; callers arriving while it runs block
+    until it finishes and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._call = None
+
+    def in_flight(self) -> bool:
+        """Whether a call is currently running"""
+        with self._lock:
+            return self._call is not None
+
+    def run(self, func: Callable[..., Any], *args, on_join: Callable[[], None] = None, **kwargs) -> Any:
+        """Run func, or join the call already in flight"""
+        with self._lock:
+            call = self._call
+            leader = call is None
+            if leader:
+                call = self._call = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            if on_join:
+                on_join()
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._call = None
+            call.event.set()
+
+
+class LoginLock:
+    """Cross-process login lock backed by flock(2)
+
+    Usage::
+
+        lock = LoginLock()
+        joined = lock.acquire()
+        if joined is not None:
+            return joined          # another process just finished a login
+        try:
+            result = do_login()
+            lock.record(result)
+        finally:
+            lock.release()
+
+    The lock file doubles as the result record: the owner writes the outcome
+    before releasing, and a process that had to wait reads it back.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or runtime_path("login.lock")
+        self._fd = None
+
+    def acquire(self, on_wait: Callable[[], None] = None,
+                timeout: Optional[float] = None,
+                should_stop: Callable[[], bool] = None) -> Optional[bool]:
+        """Take the lock
+
+        Returns None when this process now owns the lock and should log in.
+        Returns the other process's result (True/False) when a login was
+        already running and finished while we waited; the lock is released
+        again in that case. Raises TimeoutError if the other login is still
+        running after timeout seconds, and InterruptedError as soon as
+        should_stop() returns True while waiting.
+        """
+        if fcntl is None:
+            return None
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return None
+        except BlockingIOError:
+            pass
+
+        # Someone else is logging in - wait for them instead of racing
+        if on_wait:
+            on_wait()
+        wait_started = time.time()
+        if timeout is None and should_stop is None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        else:
+            self._wait_for_lock(timeout, should_stop)
+
+        record = self._read_record()
+        if record and record.get('finished', 0) >= wait_started:
+            self.release()
+            return bool(record.get('result'))
+
+        # The holder went away without recording a result; our turn
+        return None
+
+    def _wait_for_lock(self, timeout: Optional[float], should_stop: Callable[[], bool] = None):
+        """Poll for the lock; flock(2) itself has no timeout"""
+        give_up = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except BlockingIOError:
+                if give_up is not None and time.monotonic() >= give_up:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise TimeoutError("Timed out waiting for the other login")
+                if should_stop is not None and should_stop():
+                    os.close(self._fd)
+                    self._fd = None
+                    raise InterruptedError("Stopped waiting for the other login")
+                time.sleep(0.05)
+
+    def record(self, result: bool):
+        """Store the outcome of the login for processes waiting on us"""
+        if self._fd is None:
+            return
+        data = json.dumps({
+            'result': bool(result),
+            'pid': os.getpid(),
+            'finished': time.time(),
+        }).encode()
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, data, 0)
+
+    def release(self):
+        """Release the lock"""
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_record(self) -> Optional[dict]:
+        try:
+            size = os.fstat(self._fd).st_size
+            if not size:
+                return None
+            return json.loads(os.pread(self._fd, size, 0).decode())
+        except (OSError, ValueError):
+            return None
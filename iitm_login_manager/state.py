@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Warm-start state snapshot
+
+The tray used to start as "Status: Unknown" with the offline icon and only
+learn the truth after a probe. It now keeps a small JSON snapshot of what
+it last knew (status, when, last login, approval lease, next planned
+logins) and reads it before anything slow happens at startup, so the icon
+is right from the first frame; a background probe then revalidates it.
+
+This module only uses the standard library so loading the snapshot costs
+well under a millisecond.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .paths import cache_path
+
+# The portal approval the automator selects lasts one day
+APPROVAL_LEASE = 24 * 3600
+
+FIELDS = ('status', 'message', 'updated', 'last_login', 'lease_expiry', 'next_login', 'prediction')
+
+
+class StateSnapshot:
+    """What the tray last knew, with epoch timestamps"""
+
+    def __init__(self, status: str = "unknown", message: str = "", updated: Optional[float] = None,
+                 last_login: Optional[float] = None, lease_expiry: Optional[float] = None,
+                 next_login: Optional[float] = None, prediction: Optional[Dict[str, Any]] = None):
+        self.status = status  # a LoginStatus value
+        self.message = message
+        self.updated = updated
+        self.last_login = last_login
+        self.lease_expiry = lease_expiry
+        self.next_login = next_login
+        self.prediction = prediction
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StateSnapshot":
+        return cls(**{k: data[k] for k in FIELDS if k in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in FIELDS}
+
+    def warm_status(self, now: Optional[float] = None, max_age: float = 1800):
+        """(status, message) to show before revalidation
+
+        A snapshot older than max_age, a login that was still in progress
+        when the last process exited, or an online status whose approval
+        lease has run out, is shown as unknown.
+        """
+        now = time.time() if now is None else now
+        if self.updated is None or now - self.updated > max_age or self.status in ("in_progress", "cancelled"):
+            return "unknown", "Checking..."
+        if self.status == "success" and self.lease_expiry is not None and now >= self.lease_expiry:
+            return "unknown", "Approval expired"
+        as_of = time.strftime("%H:%M", time.localtime(self.updated))
+        message = f"{self.message} (as of {as_of})" if self.message else f"as of {as_of}"
+        return self.status, message
+
+
+class StateStore:
+    """Load and atomically rewrite the snapshot file
+
+    mirror, if given, gets every change as publish(**changes) too; the tray
+    uses it to keep the memory-mapped status for status bars current.
+    """
+
+    def __init__(self, path: Optional[str] = None, mirror=None):
+        self.path = path or cache_path("state.json")
+        self.mirror = mirror
+        self.snapshot = StateSnapshot()
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> StateSnapshot:
+        try:
+            with open(self.path, 'r') as f:
+                self.snapshot = StateSnapshot.from_dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self.snapshot = StateSnapshot()
+        return self.snapshot
+
+    def update(self, **changes):
+        """Apply changes and write the file if anything actually changed"""
+        unknown = set(changes) - set(FIELDS)
+        if unknown:
+            raise TypeError(f"Unknown state fields: {', '.join(sorted(unknown))}")
+        with self._lock:
+            current = self.snapshot.to_dict()
+            if all(current[k] == v for k, v in changes.items()):
+                return
+            current.update(changes)
+            self.snapshot = StateSnapshot.from_dict(current)
+            self._write(current)
+            if self.mirror is not None:
+                self.mirror.publish(**changes)
+
+    def record_status(self, status: str, message: str = ""):
+        self.update(status=status, message=message, updated=time.time())
+
+    def record_login(self, when: Optional[float] = None, lease: float = APPROVAL_LEASE):
+        when = time.time() if when is None else when
+        self.update(last_login=when, lease_expiry=when + lease)
+
+    def _write(self, data: Dict[str, Any]):
+        tmp = None
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".state-")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+            self.writes += 1
+        except OSError as e:
+            print(f"Warning: Could not save state snapshot: {e}")
+            if tmp and os.path.exists(tmp):
+                os.unlink(tmp)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Memory-mapped status for status bars
+
+waybar, polybar, i3blocks and tmux poll every second or two; running
+`iitm-login-manager --status` that often costs a Python start-up and a
+live probe each time. The tray instead publishes what it knows into a
+256-byte file, $XDG_RUNTIME_DIR/iitm-login-manager/status.map, which
+readers map and copy without probing and without taking a lock.
+
+Layout (little-endian, version 1):
+
+    offset  size  field
+         0     8  magic "IITMSTAT"
+         8     4  u32 layout version (1)
+        12     4  u32 sequence: odd while the writer is updating
+        16    16  status, a LoginStatus value (ASCII, NUL-padded)
+        32    16  connectivity of the last probe: online, captive, offline
+        48     8  f64 updated: epoch of the last status change (0 = never)
+        56     8  f64 probed: epoch of the last probe (0 = never)
+        64     8  f64 last_login (0 = none)
+        72     8  f64 lease_expiry: when the portal approval runs out
+        80     8  f64 next_login: next scheduled login
+        88     4  f32 latency of the last probe in seconds
+        92     4  i32 pid of the writer, 0 once it has exited
+        96     2  u16 length of message in bytes
+        98    30  reserved (zero)
+       128   128  message, UTF-8
+
+A consistent read takes the sequence, copies the record and takes the
+sequence again: the copy is good when both are equal and even, otherwise
+retry. Writers serialize with flock on the file, so readers never need
+it. Shell readers can do the same with od, see the Technical Guide.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+MAGIC = b"IITMSTAT"
+VERSION = 1
+SIZE = 256
+SEQ_OFFSET = 12
+MESSAGE_OFFSET = 128
+MESSAGE_MAX = SIZE - MESSAGE_OFFSET
+
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<16s16sdddddfiH')
+RECORD_OFFSET = HEADER.size
+SEQ = struct.Struct('<I')
+
+FIELDS = ('status', 'connectivity', 'updated', 'probed', 'last_login', 'lease_expiry',
+          'next_login', 'latency', 'pid', 'message')
+_TIMES = ('updated', 'probed', 'last_login', 'lease_expiry', 'next_login')
+
+
+def default_path() -> str:
+    from .paths import runtime_path
+    return runtime_path("status.map")
+
+
+def _text(value: bytes) -> str:
+    return value.rstrip(b'\0').decode('utf-8', errors='replace')
+
+
+def _truncate(text: str, limit: int) -> bytes:
+    """UTF-8 encode text, cut at a character boundary to fit limit bytes"""
+    data = text.encode('utf-8')
+    if len(data) <= limit:
+        return data
+    return data[:limit].decode('utf-8', errors='ignore').encode('utf-8')
+
+
+class StatusMap:
+    """Writer side: one long-running process publishes, any number read"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_path()
+        self.values: Dict[str, Any] = {
+            'status': 'unknown', 'connectivity': '', 'latency': 0.0, 'message': '',
+            **{name: None for name in _TIMES},
+        }
+        self.publishes = 0
+        self._fd = None
+        self._map = None
+        self._lock = threading.Lock()  # flock only excludes other processes
+
+    def open(self) -> "StatusMap":
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size != SIZE:
+                    os.ftruncate(fd, SIZE)
+                self._map = mmap.mmap(fd, SIZE)
+                if self._map[:len(MAGIC)] != MAGIC:
+                    HEADER.pack_into(self._map, 0, MAGIC, VERSION, 0)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return self
+
+    def publish(self, **changes):
+        """Merge changes into the record and write it under the seqlock
+
+        Fields the layout has no room for (e.g. a drop prediction) are
+        ignored, so a StateStore can hand over its updates as they are.
+        """
+        with self._lock:
+            self.values.update((k, v) for k, v in changes.items() if k in FIELDS and k != 'pid')
+            if self._map is not None:
+                self._write(os.getpid())
+
+    def _write(self, pid: int):
+        v = self.values
+        message = _truncate(v['message'] or '', MESSAGE_MAX)
+        record = RECORD.pack(
+            _truncate(v['status'] or '', 16), _truncate(v['connectivity'] or '', 16),
+            *(float(v[name] or 0) for name in _TIMES),
+            float(v['latency'] or 0), pid, len(message),
+        )
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # Odd while writing; also moves past an odd value left by a crashed writer
+            writing = (SEQ.unpack_from(self._map, SEQ_OFFSET)[0] + 1) | 1
+            SEQ.pack_into(self._map, SEQ_OFFSET, writing)
+            self._map[RECORD_OFFSET:RECORD_OFFSET + RECORD.size] = record
+            self._map[MESSAGE_OFFSET:SIZE] = message.ljust(MESSAGE_MAX, b'\0')
+            SEQ.pack_into(self._map, SEQ_OFFSET, (writing + 1) & 0xFFFFFFFF)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self.publishes += 1
+
+    def close(self):
+        """Mark the record as having no live writer and unmap it"""
+        with self._lock:
+            if self._map is None:
+                return
+            try:
+                self._write(0)
+            finally:
+                self._map.close()
+                os.close(self._fd)
+                self._map = self._fd = None
+
+
+def read_status(path: Optional[str] = None, retries: int = 100) -> Optional[Dict[str, Any]]:
+    """Consistent copy of the published record, or None if there is none
+
+    The result has every FIELDS entry (times as epoch floats or None) plus
+    'alive', whether the writer process is still running.
+    """
+    try:
+        fd = os.open(path or default_path(), os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        if os.fstat(fd).st_size < SIZE:
+            return None
+        with mmap.mmap(fd, SIZE, access=mmap.ACCESS_READ) as view:
+            for _ in range(retries):
+                magic, version, seq = HEADER.unpack_from(view, 0)
+                if magic != MAGIC or version != VERSION:
+                    return None
+                if seq & 1:
+                    time.sleep(0)  # let the writer finish
+                    continue
+                data = view[:SIZE]
+                if SEQ.unpack_from(view, SEQ_OFFSET)[0] == seq:
+                    break
+            else:
+                return None
+    finally:
+        os.close(fd)
+
+    status, connectivity, *times, latency, pid, length = RECORD.unpack_from(data, RECORD_OFFSET)
+    result = {
+        'status': _text(status),
+        'connectivity': _text(connectivity),
+        'latency': latency,
+        'pid': pid,
+        'message': data[MESSAGE_OFFSET:MESSAGE_OFFSET + min(length, MESSAGE_MAX)].decode('utf-8', errors='replace'),
+    }
+    result.update((name, value or None) for name, value in zip(_TIMES, times))
+    result['alive'] = _pid_alive(pid)
+    return result
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def describe(record: Optional[Dict[str, Any]], now: Optional[float] = None) -> str:
+    """One line for a status bar, e.g. "success - Connected (probed 4s ago, 12ms)" """
+    if record is None:
+        return "unknown - nothing published (is the tray running?)"
+    now = time.time() if now is None else now
+    line = record['status']
+    if record['message']:
+        line += f" - {record['message']}"
+    details = []
+    if record['probed']:
+        details.append(f"{record['connectivity'] or 'probed'} {max(0, now - record['probed']):.0f}s ago")
+        if record['latency']:
+            details.append(f"{record['latency'] * 1000:.0f}ms")
+    if record['lease_expiry'] and record['lease_expiry'] > now:
+        details.append(f"lease until {time.strftime('%H:%M', time.localtime(record['lease_expiry']))}")
+    if not record['alive']:
+        details.append("stale: tray not running")
+    return f"{line} ({', '.join(details)})" if details else line
+
+
+def exit_code(record: Optional[Dict[str, Any]]) -> int:
+    """0 online, 1 not online, 2 unknown (nothing published or writer gone)"""
+    if record is None or not record['alive']:
+        return 2
+    online = record['connectivity'] == 'online' or (not record['connectivity'] and record['status'] == 'success')
+    return 0 if online else 1
+
+
+def main(argv=None) -> int:
+    """Smallest possible reader: python -m iitm_login_manager.statusmap [path]"""
+    argv = sys.argv[1:] if argv is None else argv
+    record = read_status(argv[0] if argv else None)
+    print(describe(record))
+    return exit_code(record)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -88,7 +88,7 @@ except (ImportError, ValueError) as e:
 
 import os
 import sys
-import json
+import sqlite3
 import threading
 import time
 from datetime import datetime, timedelta
@@ -108,6 +108,22 @@ except ImportError:
     keyring = None
 
 from .automator import IITMNetAccessAutomator, LoginStatus
+from .workers import TaskPool, MainLoopDispatcher, QueueFull, future_result
+from .heartbeat import HeartbeatMonitor
+from .probe import ProbeState
+from .scheduling import jittered_times, retry_delay, shift_time
+from .location import LocationDetector
+from .interfaces import MultiInterfaceManager
+from .cooperative import CooperativeStatus
+from .history import HistoryStore
+from .predict import DropPredictor
+from .instance import SingleInstance
+from .state import StateStore
+from .statusmap import StatusMap
+from .config import get_config, apply_probe_settings, apply_rtt_settings
+from .ui_state import UIStateStore, NotificationDebouncer
+from .memory import MB, MemoryBudget, memory_report
+from .aioloop import AsyncProber, ScheduleRunner, install_glib_loop
 
 class SettingsDialog(Gtk.Dialog):
     def __init__(self, parent, current_username="", current_schedule="daily"):
@@ -229,43 +245,173 @@ class SettingsDialog(Gtk.Dialog):
     def get_autostart(self):
         return self.autostart_check.get_active()
 
+STATUS_TEXT = {
+    LoginStatus.SUCCESS: "Online",
+    LoginStatus.FAILED: "Login Failed", 
+    LoginStatus.IN_PROGRESS: "Connecting...",
+    LoginStatus.NETWORK_ERROR: "Network Error",
+    LoginStatus.AUTH_ERROR: "Auth Error",
+    LoginStatus.TIMEOUT: "Timed Out",
+    LoginStatus.OFF_CAMPUS: "Off Campus",
+    LoginStatus.CANCELLED: "Cancelled",
+    LoginStatus.UNKNOWN: "Unknown"
+}
+
+STATUS_ICONS = {
+    LoginStatus.SUCCESS: "online",
+    LoginStatus.FAILED: "error",
+    LoginStatus.IN_PROGRESS: "connecting", 
+    LoginStatus.NETWORK_ERROR: "error",
+    LoginStatus.AUTH_ERROR: "error",
+    LoginStatus.TIMEOUT: "error",
+    LoginStatus.OFF_CAMPUS: "offline",
+    LoginStatus.CANCELLED: "offline",
+    LoginStatus.UNKNOWN: "offline"
+}
+
 class IITMTrayApp:
-    def __init__(self):
+    def __init__(self, instance=None, loop=None):
+        # With an asyncio loop on the GLib main context (config "event_loop":
+        # "asyncio"), scheduling and probes run as coroutines on this thread
+        self.loop = loop
+        self.main_loop = None
+        self.schedule_runner = None
+        
         # Initialize notifications
         Notify.init("IITM Login Manager")
         
         # Load configuration
-        self.config_file = os.path.expanduser("~/.config/iitm-login-manager/config.json")
-        self.config = self.load_config()
-        
-        # Initialize automator
-        self.automator = IITMNetAccessAutomator(
-            username=self.config.get('username'),
-            password=self.get_password_from_keyring(),
-            callback=self.on_status_change
-        )
-        
-        # Status tracking
-        self.current_status = LoginStatus.UNKNOWN
-        self.last_status_message = ""
+        self.config = get_config()
+        
+        # Show the last known status right away; a probe revalidates it below
+        self.status_map = self.open_status_map()
+        self.state = StateStore(mirror=self.status_map)
+        snapshot = self.state.load()
+        self.current_status, self.last_status_message = snapshot.warm_status(
+            max_age=self.config.get('warm_start_max_age'))
+        if self.status_map:
+            self.status_map.publish(**dict(snapshot.to_dict(), status=self.current_status,
+                                           message=self.last_status_message))
         
         # Create indicator
         self.indicator = AppIndicator3.Indicator.new(
             "iitm-login-manager",
-            self.get_icon_path("offline"),
+            self.get_icon_path(self.status_icon(self.current_status)),
             AppIndicator3.IndicatorCategory.APPLICATION_STATUS
         )
         self.indicator.set_status(AppIndicator3.IndicatorStatus.ACTIVE)
         
         # Create menu
         self.create_menu()
+        self.update_ui_status()
+        
+        # Bursts of status events become one redraw and at most one popup per window
+        timeout_add = lambda seconds, func: GLib.timeout_add(int(seconds * 1000), func)
+        self.ui = UIStateStore(self.render_status, timeout_add,
+                               interval=self.config.get('ui_interval'))
+        self.notifier = NotificationDebouncer(self.show_notification, timeout_add,
+                                              window=self.config.get('notify_window'))
+        
+        # Initialize automator
+        self.automator = IITMNetAccessAutomator(
+            username=self.config.get('username'),
+            password=self.get_password_from_keyring(),
+            callback=self.on_status_change
+        )
+        self.automator.location = LocationDetector(self.config.get('campus_fingerprints'))
+        # Every automator and the scheduler publish here; --watch subscribes
+        self.events = self.automator.events
+        
+        # Login attempts and heartbeat probes are kept for --history/--stats
+        try:
+            self.history = HistoryStore()
+        except sqlite3.Error as e:
+            print(f"Login history unavailable: {e}")
+            self.history = None
+        self.automator.history = self.history
+        self.automator.pipelined = self.config.get('pipelined_login')
+        apply_probe_settings(self.config, self.automator.prober)
+        apply_rtt_settings(self.config, self.automator.rtt)
+        
+        # Optional: log in on every configured interface, not just the default route
+        self.interfaces = None
+        if self.config.get('interfaces'):
+            self.interfaces = MultiInterfaceManager(
+                self.automator.username, self.automator.password, self.config['interfaces'],
+                callback=lambda name, status, message: self.on_status_change(status, f"{name}: {message}"),
+                configure=self.configure_automator
+            )
+        
+        # Background work: a few reusable workers, results delivered on the main loop.
+        # In the integrated loop only logins and pre-warming need a worker.
+        self.dispatcher = MainLoopDispatcher(GLib.idle_add)
+        self.pool = TaskPool(max_workers=1 if self.loop else 2, max_pending=4, dispatcher=self.dispatcher)
         
         # Start scheduler
         self.setup_scheduler()
-        self.start_scheduler_thread()
+        if self.loop:
+            self.schedule_runner = ScheduleRunner(schedule.default_scheduler)
+            self.loop.create_task(self.schedule_runner.run())
+        else:
+            self.start_scheduler_thread()
+        
+        # Revalidate the warm-start status as soon as the main loop runs
+        GLib.idle_add(self.check_initial_status)
         
-        # Initial status check
-        GLib.timeout_add(2000, self.check_initial_status)
+        # Opt-in sharing of probe results with other instances on the subnet
+        self.cooperative = None
+        if self.config.get('cooperative') and self.config.get('coop_key'):
+            try:
+                self.cooperative = CooperativeStatus(self.config['coop_key'])
+                self.cooperative.start()
+            except OSError as e:
+                print(f"Cooperative mode unavailable: {e}")
+                self.cooperative = None
+        
+        # Background heartbeat to notice sessions dropping mid-day
+        self.heartbeat = HeartbeatMonitor(
+            self.automator.prober,
+            min_interval=self.config.get('heartbeat_min_interval'),
+            max_interval=self.config.get('heartbeat_max_interval'),
+            on_result=self.on_heartbeat_probe,
+            on_captive=self.on_captive_detected,
+            should_probe=lambda: not self.automator.location.detect().skip,
+            peer_source=self.cooperative.fresh_observation if self.cooperative else None
+        )
+        self.async_prober = AsyncProber(self.automator.prober) if self.loop else None
+        if self.config.get('heartbeat'):
+            if self.loop:
+                self.loop.create_task(self.heartbeat.run_async(self.async_prober.probe_any))
+            else:
+                self.heartbeat.start()
+        
+        # Extra logins ahead of drops the login history says are likely
+        self.prediction = None
+        self._preemptive_source = None
+        self._preempted_drop = None  # drop the last pre-emptive login was for
+        GLib.timeout_add(5000, self.plan_preemptive_login)
+        
+        # The tray runs for weeks: check RSS against the budget now and then
+        self.memory_budget = MemoryBudget(self.config.get('memory_budget_mb'), trim=self.trim_caches)
+        GLib.timeout_add_seconds(300, self.check_memory)
+        
+        # Later launches hand their intent to us instead of starting another tray
+        self.instance = instance
+        if self.instance:
+            self.instance.serve(lambda intent: self.dispatcher.call(self.handle_intent, intent),
+                                events=self.events, memory=self.get_memory_report)
+        
+        # Pick up changes made with the CLI or an editor without a restart
+        self.config.watch(lambda changed: self.dispatcher.call(self.on_config_changed, changed))
+    
+    def configure_automator(self, automator):
+        """Share location detection, history and probe settings with per-interface automators"""
+        automator.location = self.automator.location
+        automator.history = self.history
+        automator.events = self.events
+        automator.pipelined = self.config.get('pipelined_login')
+        apply_probe_settings(self.config, automator.prober)
+        apply_rtt_settings(self.config, automator.rtt)
     
     def get_icon_path(self, status):
         """Get icon path based on status"""
@@ -277,33 +423,40 @@ class IITMTrayApp:
         }
         return icons.get(status, "network-offline")
     
-    def load_config(self):
-        """Load configuration from file"""
-        try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            print(f"Error loading config: {e}")
-        
-        # Return default config
-        return {
-            'username': '',
-            'schedule': 'daily',
-            'last_login': None,
-            'autostart': False
-        }
-    
     def save_config(self):
         """Save configuration to file"""
         try:
-            os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-        except Exception as e:
+            self.config.save()
+        except OSError as e:
             print(f"Error saving config: {e}")
     
+    def on_config_changed(self, changed):
+        """Apply settings changed on disk (e.g. by the CLI) while we run"""
+        print(f"Config changed: {', '.join(sorted(changed))}")
+        if 'username' in changed:
+            self.cancel_logins("Account changed")
+            username = self.config.get('username')
+            password = self.get_password_from_keyring()
+            self.automator.set_credentials(username, password)
+            if self.interfaces:
+                self.interfaces.set_credentials(username, password)
+        if changed & {'probe_targets', 'probe_timeout', 'rtt_floor', 'rtt_ceiling', 'pipelined_login'}:
+            self.configure_automator(self.automator)
+            if self.interfaces:
+                self.interfaces.reconfigure()
+        if changed & {'heartbeat_min_interval', 'heartbeat_max_interval'}:
+            self.heartbeat.min_interval = self.config.get('heartbeat_min_interval')
+            self.heartbeat.max_interval = self.config.get('heartbeat_max_interval')
+            self.heartbeat.poke()
+        self.ui.interval = self.config.get('ui_interval')
+        self.notifier.window = self.config.get('notify_window')
+        self.memory_budget.limit = int(self.config.get('memory_budget_mb') * MB)
+        if changed & {'schedule', 'schedule_window', 'prewarm_seconds', 'username'}:
+            self.setup_scheduler()
+        if changed & {'interfaces', 'cooperative', 'coop_key', 'heartbeat', 'event_loop'}:
+            self.show_notification("Settings Changed", "Restart the tray to apply the new network settings")
+        return False
+    
     def get_password_from_keyring(self):
         """Get password from system keyring"""
         username = self.config.get('username')
@@ -332,6 +485,11 @@ class IITMTrayApp:
         self.status_item.set_sensitive(False)
         menu.append(self.status_item)
         
+        # Next predicted session drop
+        self.prediction_item = Gtk.MenuItem("Next drop: not predicted")
+        self.prediction_item.set_sensitive(False)
+        menu.append(self.prediction_item)
+        
         # Separator
         menu.append(Gtk.SeparatorMenuItem())
         
@@ -373,51 +531,70 @@ class IITMTrayApp:
         """Handle status change from automator"""
         self.current_status = status
         self.last_status_message = message
+        self.state.record_status(status, message)
         
-        # Update UI in main thread
-        GLib.idle_add(self.update_ui_status)
+        # Redraw on the main loop, once per burst
+        self.ui.set(status, message)
         
         # Show notification for important status changes
         if status == LoginStatus.SUCCESS:
-            self.show_notification("Login Successful", "Internet access has been activated!")
+            self.dispatcher.call(self.notifier.notify, 'success', "Login Successful",
+                                 "Internet access has been activated!", False)
         elif status == LoginStatus.FAILED:
-            self.show_notification("Login Failed", f"Could not login: {message}", urgent=True)
+            self.dispatcher.call(self.notifier.notify, 'failure', "Login Failed",
+                                 f"Could not login: {message}", True)
         elif status == LoginStatus.AUTH_ERROR:
-            self.show_notification("Authentication Error", "Please check your credentials", urgent=True)
+            self.dispatcher.call(self.notifier.notify, 'failure', "Authentication Error",
+                                 "Please check your credentials", True)
+        elif status == LoginStatus.TIMEOUT:
+            self.dispatcher.call(self.notifier.notify, 'failure', "Login Timed Out", message, True)
     
     def update_ui_status(self):
-        """Update UI elements based on current status"""
-        status_text = {
-            LoginStatus.SUCCESS: "Online",
-            LoginStatus.FAILED: "Login Failed", 
-            LoginStatus.IN_PROGRESS: "Connecting...",
-            LoginStatus.NETWORK_ERROR: "Network Error",
-            LoginStatus.AUTH_ERROR: "Auth Error",
-            LoginStatus.UNKNOWN: "Unknown"
-        }
-        
-        icon_status = {
-            LoginStatus.SUCCESS: "online",
-            LoginStatus.FAILED: "error",
-            LoginStatus.IN_PROGRESS: "connecting", 
-            LoginStatus.NETWORK_ERROR: "error",
-            LoginStatus.AUTH_ERROR: "error",
-            LoginStatus.UNKNOWN: "offline"
-        }
-        
-        # Update status text
-        status_msg = status_text.get(self.current_status, "Unknown")
-        if self.last_status_message:
-            status_msg += f" - {self.last_status_message}"
-        
-        self.status_item.set_label(f"Status: {status_msg}")
-        
-        # Update icon
-        icon = icon_status.get(self.current_status, "offline")
-        self.indicator.set_icon(self.get_icon_path(icon))
-        
+        """Update UI elements based on current status right away"""
+        self.render_status(self.current_status, self.last_status_message)
         return False  # Don't repeat this timeout
     
+    def render_status(self, status, message):
+        """Draw a status in the menu and the icon"""
+        status_msg = STATUS_TEXT.get(status, "Unknown")
+        if message:
+            status_msg += f" - {message}"
+        self.status_item.set_label(f"Status: {status_msg}")
+        self.indicator.set_icon(self.get_icon_path(self.status_icon(status)))
+    
+    @staticmethod
+    def status_icon(status):
+        """Icon name for a LoginStatus value"""
+        return STATUS_ICONS.get(status, "offline")
+    
+    def get_ui_stats(self):
+        """Counters for coalesced redraws and held-back notifications"""
+        return {'ui': self.ui.get_stats(), 'notifications': self.notifier.get_stats()}
+    
+    def get_memory_report(self, top=0):
+        """Answer --memory: RSS, live objects and how full the bounded caches are"""
+        report = memory_report(top)
+        report['budget'] = self.memory_budget.limit
+        report['caches'] = {
+            'dns_entries': self.automator.resolver.stats()['entries'],
+            'rtt_hosts': len(self.automator.rtt.stats()),
+            'event_subscribers': self.events.get_stats()['subscribers'],
+            'notifications_held': self.notifier.get_stats()['held'],
+        }
+        return report
+    
+    def check_memory(self):
+        """Periodic memory budget check (GLib timeout)"""
+        rss = self.memory_budget.check()
+        if self.memory_budget.over:
+            self.events.publish('memory', rss=rss, budget=self.memory_budget.limit,
+                                trims=self.memory_budget.trims)
+        return True  # keep checking
+    
+    def trim_caches(self):
+        """Drop what is cheap to rebuild when over the memory budget"""
+        self.automator.resolver.clear()
+    
     def show_notification(self, title, message, urgent=False):
         """Show desktop notification"""
         try:
@@ -434,26 +611,63 @@ class IITMTrayApp:
             self.show_notification("No Credentials", "Please configure username and password in Settings", urgent=True)
             return
         
+        if self.pool.is_busy('login'):
+            self.show_notification("Login In Progress", "A login is already running")
+            return
+        
         self.show_notification("Login Started", "Attempting to login...")
-        self.automator.automate_login_async()
+        self.submit_task('login', self.run_login)
     
     def on_check_status(self, widget):
         """Check current internet status"""
-        def check_in_thread():
-            has_internet = self.automator.check_internet_access()
+        def on_done(has_internet):
             status_msg = "Internet access is working!" if has_internet else "No internet access detected"
-            GLib.idle_add(lambda: self.show_notification("Internet Status", status_msg))
+            self.show_notification("Internet Status", status_msg)
         
-        thread = threading.Thread(target=check_in_thread)
-        thread.daemon = True
-        thread.start()
+        self.probe_now(on_done)
+    
+    def probe_now(self, on_done):
+        """Check connectivity and call on_done(online) on the main loop"""
+        if not self.loop:
+            self.submit_task('probe', self.automator.check_internet_access,
+                             on_done=lambda future: on_done(future_result(future, False)))
+            return
+        
+        def done(task):
+            on_done(not task.cancelled() and task.exception() is None and task.result().online)
+        
+        self.loop.create_task(self.async_prober.probe_any()).add_done_callback(done)
+    
+    def run_login(self):
+        """Run one login job within the configured time budget"""
+        budget = self.config.get('login_budget')
+        if self.interfaces:
+            self.interfaces.probe_all()
+            ok = any(self.interfaces.login_all(timeout=budget).values())
+        else:
+            ok = self.automator.automate_login(timeout=budget)
+        if ok:
+            self.state.record_login(lease=self.config.get('lease_hours') * 3600)
+            self.config['last_login'] = datetime.now().isoformat()
+            self.dispatcher.call(self.save_config)
+            # A fresh session moves the next expected drop
+            self.dispatcher.call(self.plan_preemptive_login)
+        return ok
+    
+    def submit_task(self, key, func, on_done=None):
+        """Queue background work on the tray's worker pool"""
+        try:
+            return self.pool.submit(key, func, on_done=on_done)
+        except (QueueFull, RuntimeError) as e:
+            print(f"Background task '{key}' not queued: {e}")
+            return None
     
     def on_settings(self, widget):
         """Show settings dialog"""
         dialog = SettingsDialog(
             None, 
-            current_username=self.config.get('username', ''),
-            current_schedule=self.config.get('schedule', 'daily')
+            current_username=self.config.get('username'),
+            current_schedule=self.config.get('schedule')
         )
         
         response = dialog.run()
@@ -474,8 +688,11 @@ class IITMTrayApp:
             if new_username and new_password:
                 self.save_password_to_keyring(new_username, new_password)
             
-            # Update automator
+            # Update automator; a login still using the old account is stopped
+            self.cancel_logins("Settings changed")
             self.automator.set_credentials(new_username, new_password)
+            if self.interfaces:
+                self.interfaces.set_credentials(new_username, new_password)
             
             # Save config
             self.save_config()
@@ -538,38 +755,210 @@ X-GNOME-Autostart-enabled=true
         dialog.run()
         dialog.destroy()
     
+    def on_heartbeat_probe(self, result):
+        """Called on the heartbeat thread (or the loop, when integrated) after every probe"""
+        if self.status_map:
+            self.status_map.publish(connectivity=result.state, probed=time.time(), latency=result.latency)
+        self.events.publish('probe', **result.to_dict())
+        if self.cooperative:
+            self.cooperative.announce(result)
+        if self.history:
+            try:
+                self.history.record_probe(result)
+            except sqlite3.Error as e:
+                print(f"Could not record probe: {e}")
+        if self.loop:
+            self.on_heartbeat_result(result)  # already on the main loop
+        else:
+            self.dispatcher.call(self.on_heartbeat_result, result)
+    
+    def on_heartbeat_result(self, result):
+        """Reflect heartbeat probe results in the UI when the state changes"""
+        if result.state == ProbeState.ONLINE:
+            if self.current_status != LoginStatus.SUCCESS:
+                self.on_status_change(LoginStatus.SUCCESS, "Connected")
+        elif self.current_status == LoginStatus.IN_PROGRESS:
+            return  # A login is running; let it report
+        elif result.state == ProbeState.CAPTIVE:
+            if self.last_status_message != "Captive portal":
+                self.on_status_change(LoginStatus.UNKNOWN, "Captive portal")
+        elif self.current_status != LoginStatus.NETWORK_ERROR:
+            self.on_status_change(LoginStatus.NETWORK_ERROR, "Offline")
+    
+    def on_captive_detected(self, result):
+        """Re-login automatically when the heartbeat confirms a captive state"""
+        if not (self.automator.username and self.automator.password):
+            return
+        print(f"Captive portal detected ({result.detail}), logging in again")
+        self.events.publish('schedule', action='captive_login', detail=result.detail)
+        future = self.submit_task('login', self.run_login)
+        if future:
+            future.add_done_callback(lambda f: self.heartbeat.poke())
+    
+    def handle_intent(self, intent):
+        """Act on an intent handed over by a second launch"""
+        if intent == 'login':
+            self.on_login_now(None)
+        elif intent == 'status':
+            self.on_check_status(None)
+        elif intent == 'quit':
+            self.on_quit(None)
+        else:  # 'activate': the user launched us again, show where we are
+            self.update_ui_status()
+            self.show_notification("IITM Login Manager", self.status_item.get_label())
+        return False
+    
+    @staticmethod
+    def open_status_map():
+        """The memory-mapped status read by --status --cached and status bars"""
+        try:
+            return StatusMap().open()
+        except OSError as e:
+            print(f"Warning: Could not publish status for status bars: {e}")
+            return None
+    
+    def cancel_logins(self, reason: str):
+        """Stop logins in progress, closing their connections"""
+        cancelled = self.automator.cancel(reason)
+        if self.interfaces:
+            cancelled = self.interfaces.cancel(reason) or cancelled
+        if cancelled:
+            print(f"Cancelled login in progress: {reason}")
+    
     def on_quit(self, widget):
         """Quit the application"""
+        if self.instance:
+            self.instance.close()
+        self.config.stop_watching()
+        self.heartbeat.stop()
+        if self.schedule_runner:
+            self.schedule_runner.stop()
+        if self.cooperative:
+            self.cooperative.stop()
+        # Cancelled logins unwind within milliseconds; don't wait on anything else
+        self.cancel_logins("Quitting")
+        self.pool.shutdown(cancel_pending=True, wait=0.3)
+        print(f"UI stats: {self.get_ui_stats()}")
+        if self.status_map:
+            self.status_map.close()
         Notify.uninit()
-        Gtk.main_quit()
+        if self.main_loop:
+            self.main_loop.quit()
+        else:
+            Gtk.main_quit()
     
     def setup_scheduler(self):
         """Setup scheduled login tasks"""
         schedule.clear()
         
-        schedule_type = self.config.get('schedule', 'daily')
-        
-        if schedule_type == 'daily':
-            schedule.every().day.at("08:00").do(self.scheduled_login)
-        elif schedule_type == 'twice':
-            schedule.every().day.at("08:00").do(self.scheduled_login)
-            schedule.every().day.at("20:00").do(self.scheduled_login)
-        # 'manual' - no scheduled tasks
+        schedule_type = self.config.get('schedule')
+        prewarm_seconds = self.config.get('prewarm_seconds')
+        # Spread installations over this many seconds after the nominal time
+        window = self.config.get('schedule_window')
+        if self.schedule_runner:
+            self.schedule_runner.wake()  # sleep until the new first job instead
+        
+        # 'manual' has no login times
+        for at in jittered_times(schedule_type, window, self.config.get('username')):
+            schedule.every().day.at(at).do(self.scheduled_login)
+            if prewarm_seconds:
+                schedule.every().day.at(shift_time(at, -prewarm_seconds)).do(self.scheduled_prewarm)
+        self.save_schedule_plan()
+    
+    def save_schedule_plan(self):
+        """Keep the next planned login in the state snapshot"""
+        logins = [job.next_run for job in schedule.jobs
+                  if job.job_func.func == self.scheduled_login and job.next_run]
+        next_login = min(logins).timestamp() if logins else None
+        self.state.update(next_login=next_login)
+        self.events.publish('schedule', action='plan', schedule=self.config.get('schedule'),
+                            next_login=next_login)
+    
+    def scheduled_prewarm(self):
+        """Warm DNS and the portal connection just before a scheduled login"""
+        if self.automator.username and self.automator.password:
+            prefetch = self.config.get('prewarm_prefetch')
+            self.submit_task('prewarm', lambda: self.automator.prewarm(prefetch=prefetch))
     
-    def scheduled_login(self):
-        """Perform scheduled login"""
+    def scheduled_login(self, attempt=0):
+        """Perform scheduled login, retrying after a randomized delay on failure"""
+        self.save_schedule_plan()
         if self.automator.username and self.automator.password:
             print(f"Performing scheduled login at {datetime.now()}")
-            self.automator.automate_login_async()
+            self.events.publish('schedule', action='login', attempt=attempt)
+            
+            def on_done(future):
+                if future_result(future, True):
+                    return
+                attempt_next = attempt + 1
+                if attempt_next > self.config.get('schedule_retries'):
+                    return
+                delay = retry_delay(attempt_next)
+                print(f"Scheduled login failed, retrying in {delay:.0f}s")
+                self.events.publish('schedule', action='retry', attempt=attempt_next, delay=delay)
+                GLib.timeout_add(int(delay * 1000), self.scheduled_login, attempt_next)
+            
+            self.submit_task('login', self.run_login, on_done=on_done)
         else:
             print("Scheduled login skipped - no credentials configured")
+            self.events.publish('schedule', action='skip', reason="no credentials")
+        return False  # Don't repeat when run as a GLib timeout
+    
+    def plan_preemptive_login(self):
+        """Refit the drop predictor and schedule a login just before the next likely drop"""
+        if self._preemptive_source:
+            GLib.source_remove(self._preemptive_source)
+            self._preemptive_source = None
+        if not self.history or not self.config.get('predictive_relogin'):
+            return False
+        
+        now = time.time()
+        try:
+            predictor = DropPredictor.from_history(
+                self.history, now=now,
+                min_confidence=self.config.get('predict_min_confidence'),
+                lead=self.config.get('predict_lead')
+            )
+            logins = self.history.login_times(since=now - predictor.max_session)
+        except sqlite3.Error as e:
+            print(f"Could not plan pre-emptive login: {e}")
+            return False
+        
+        self.prediction = predictor.next_drop(now, logins[-1] if logins else None)
+        self.state.update(prediction=self.prediction.to_dict() if self.prediction else None)
+        self.events.publish('schedule', action='predict',
+                            prediction=self.prediction.to_dict() if self.prediction else None)
+        if self.prediction is None:
+            self.prediction_item.set_label("Next drop: not predicted")
+            return False
+        
+        when = datetime.fromtimestamp(self.prediction.drop_at).strftime("%H:%M")
+        self.prediction_item.set_label(f"Next drop: ~{when} ({self.prediction.confidence:.0%} likely)")
+        if self.prediction.drop_at == self._preempted_drop:
+            return False  # already tried for this one
+        delay = max(1, self.prediction.login_at - now)
+        self._preemptive_source = GLib.timeout_add(int(delay * 1000), self.preemptive_login)
+        return False
+    
+    def preemptive_login(self):
+        """Log in ahead of a predicted drop"""
+        self._preemptive_source = None
+        self._preempted_drop = self.prediction.drop_at
+        if self.automator.username and self.automator.password:
+            print(f"Pre-emptive login before predicted drop: {self.prediction}")
+            self.events.publish('schedule', action='preempt', drop_at=self.prediction.drop_at)
+            self.submit_task('login', self.run_login,
+                             on_done=lambda future: self.plan_preemptive_login())
+        return False  # Don't repeat this timeout
     
     def start_scheduler_thread(self):
         """Start the scheduler in a background thread"""
         def scheduler_loop():
             while True:
                 schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                # Wake up for the next job (pre-warm jobs are seconds before logins)
+                idle = schedule.idle_seconds()
+                time.sleep(60 if idle is None else min(60, max(1, idle)))
         
         scheduler_thread = threading.Thread(target=scheduler_loop)
         scheduler_thread.daemon = True
@@ -577,29 +966,47 @@ X-GNOME-Autostart-enabled=true
     
     def check_initial_status(self):
         """Check initial internet status"""
-        def check_in_thread():
-            has_internet = self.automator.check_internet_access()
+        def on_done(has_internet):
             if has_internet:
-                GLib.idle_add(lambda: self.on_status_change(LoginStatus.SUCCESS, "Already connected"))
+                self.on_status_change(LoginStatus.SUCCESS, "Already connected")
             else:
-                GLib.idle_add(lambda: self.on_status_change(LoginStatus.UNKNOWN, "Not connected"))
+                self.on_status_change(LoginStatus.UNKNOWN, "Not connected")
         
-        thread = threading.Thread(target=check_in_thread)
-        thread.daemon = True
-        thread.start()
+        self.probe_now(on_done)
         
         return False  # Don't repeat this timeout
     
     def run(self):
         """Start the GTK main loop"""
         try:
-            Gtk.main()
+            if self.loop:
+                # asyncio runs while a GLib.MainLoop does, but not under Gtk.main()
+                self.main_loop = GLib.MainLoop()
+                self.main_loop.run()
+            else:
+                Gtk.main()
         except KeyboardInterrupt:
             self.on_quit(None)
 
-def main():
-    """Main entry point"""
-    app = IITMTrayApp()
+def main(instance=None, intent='activate'):
+    """Main entry point
+
+    Without an instance (started as `python -m iitm_login_manager.tray`),
+    the single-instance check happens here, after GTK has been loaded.
+    """
+    if instance is None:
+        instance = SingleInstance()
+        if not instance.acquire():
+            instance.send(intent)
+            return
+    loop = None
+    if get_config().get('event_loop') == 'asyncio':
+        loop = install_glib_loop()
+        if loop is None:
+            print("Warning: The asyncio event loop needs PyGObject 3.50 or newer, using threads")
+    app = IITMTrayApp(instance=instance, loop=loop)
+    if intent != 'activate':
+        GLib.idle_add(app.handle_intent, intent)
     app.run()
 
 if __name__ == "__main__":
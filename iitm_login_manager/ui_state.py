@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Coalesced tray updates and debounced notifications
+
+Every status event used to queue its own redraw and could pop up its own
+notification, so a flapping link or the retry loop flooded both the main
+loop and the notification daemon. UIStateStore keeps only the latest
+status and redraws at most once per interval. NotificationDebouncer shows
+the first notification of a kind right away, then holds the rest for a
+window and shows one summary such as "3 failures in the last minute";
+repeats of the text already on screen are dropped.
+
+Neither class imports GTK: timers go through a timeout_add-style callable
+(seconds, callback), so they can be driven by a fake loop in tests.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# What a summary of several notifications of a kind counts
+SUMMARY_NOUNS = {
+    'failure': 'failures',
+    'success': 'logins',
+    'status': 'status updates',
+}
+
+
+def describe_window(seconds: float) -> str:
+    """60 -> "minute", 300 -> "5 minutes", 30 -> "30 seconds" """
+    if seconds % 60 == 0:
+        minutes = int(seconds // 60)
+        return "minute" if minutes == 1 else f"{minutes} minutes"
+    return f"{seconds:g} seconds"
+
+
+class UIStateStore:
+    """Latest status for the tray, rendered at most once per interval
+
+    set() may be called from any thread; render(status, message) always
+    runs from the timer callback, i.e. on the main loop.
+    """
+
+    def __init__(self, render: Callable[[str, str], Any],
+                 timeout_add: Callable[[float, Callable[[], bool]], Any],
+                 interval: float = 0.1):
+        self.render = render
+        self.timeout_add = timeout_add
+        self.interval = interval
+        self.status = None
+        self.message = ""
+        self.updates = 0
+        self.renders = 0
+        self.unchanged = 0  # flushes that found nothing new to draw
+        self._rendered = None
+        self._scheduled = False
+        self._lock = threading.Lock()
+
+    def set(self, status: str, message: str = ""):
+        with self._lock:
+            self.status, self.message = status, message
+            self.updates += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.timeout_add(self.interval, self.flush)
+
+    def flush(self) -> bool:
+        """Draw the latest status if it differs from what is on screen"""
+        with self._lock:
+            self._scheduled = False
+            current = (self.status, self.message)
+        if current == self._rendered:
+            self.unchanged += 1
+            return False
+        self._rendered = current
+        self.renders += 1
+        try:
+            self.render(*current)
+        except Exception as e:
+            print(f"Error updating tray: {e}")
+        return False  # Don't repeat this timeout
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'updates': self.updates,
+            'renders': self.renders,
+            'coalesced': self.updates - self.renders,
+            'unchanged': self.unchanged,
+        }
+
+
+class NotificationDebouncer:
+    """Rate-limit notifications per kind, summarizing bursts
+
+    Call notify() on the main loop. show(title, message, urgent) is the
+    real notification function.
+    """
+
+    def __init__(self, show: Callable[[str, str, bool], Any],
+                 timeout_add: Callable[[float, Callable[[], bool]], Any],
+                 window: float = 60, clock: Callable[[], float] = time.monotonic):
+        self.show = show
+        self.timeout_add = timeout_add
+        self.window = window
+        self.clock = clock
+        self.shown = 0
+        self.summarized = 0  # notifications folded into a summary
+        self.duplicates = 0
+        self._last_shown: Dict[str, float] = {}
+        self._last_text: Dict[str, Tuple[str, str]] = {}
+        # kind -> (count, latest title, latest message, any urgent): a burst costs O(1)
+        self._held: Dict[str, Tuple[int, str, str, bool]] = {}
+
+    def notify(self, kind: str, title: str, message: str = "", urgent: bool = False):
+        now = self.clock()
+        if (title, message) == self._last_text.get(kind) and now - self._last_shown[kind] < self.window:
+            self.duplicates += 1
+            return
+        held = self._held.get(kind)
+        if held is not None:
+            self._held[kind] = (held[0] + 1, title, message, held[3] or urgent)
+            return
+        last = self._last_shown.get(kind)
+        if last is None or now - last >= self.window:
+            self._show(kind, title, message, urgent)
+            return
+        # Shown recently: hold this one until the window is over
+        self._held[kind] = (1, title, message, urgent)
+        self.timeout_add(last + self.window - now, lambda: self.flush(kind))
+
+    def flush(self, kind: str) -> bool:
+        """Show what was held for a kind: the notification itself or a summary"""
+        held = self._held.pop(kind, None)
+        if not held:
+            return False
+        count, title, message, urgent = held
+        if count == 1:
+            self._show(kind, title, message, urgent)
+        else:
+            noun = SUMMARY_NOUNS.get(kind, 'notifications')
+            summary = f"{count} {noun} in the last {describe_window(self.window)}"
+            self._show(kind, summary, f"Latest: {title} - {message}" if message else f"Latest: {title}", urgent)
+            self.summarized += count
+        return False  # Don't repeat this timeout
+
+    def _show(self, kind: str, title: str, message: str, urgent: bool):
+        self._last_shown[kind] = self.clock()
+        self._last_text[kind] = (title, message)
+        self.shown += 1
+        self.show(title, message, urgent)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            'shown': self.shown,
+            'summarized': self.summarized,
+            'duplicates': self.duplicates,
+            'held': sum(h[0] for h in self._held.values()),
+        }
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+IITM Login Manager - Managed worker pool for background tasks
+
+The tray used to start a fresh thread for every probe and login. TaskPool
+replaces that with a fixed set of workers and a bounded queue. Identical
+pending tasks are coalesced, and completion callbacks are delivered to the
+GTK main loop through a single idle dispatcher.
+"""
+
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import Future, CancelledError
+from typing import Any, Callable, Optional
+
+
+class MainLoopDispatcher:
+    """Run callables on the main loop through one pending idle callback
+
+    Calls made from any thread are queued; at most one idle source is
+    scheduled at a time, and it drains everything queued so far.
+    """
+
+    def __init__(self, idle_add: Callable[[Callable[[], bool]], Any]):
+        self._idle_add = idle_add
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._scheduled = False
+
+    def call(self, func: Callable, *args):
+        """Schedule func(*args) on the main loop"""
+        with self._lock:
+            self._pending.append((func, args))
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._idle_add(self._drain)
+
+    def _drain(self) -> bool:
+        with self._lock:
+            items = list(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+        for func, args in items:
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error in main loop callback: {e}")
+        return False  # Don't repeat this idle callback
+
+
+class QueueFull(Exception):
+    """Raised when the pool cannot accept more pending tasks"""
+
+
+class _Task:
+    def __init__(self, key: str, func: Callable, args: tuple, kwargs: dict):
+        self.key = key
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class TaskPool:
+    """Fixed-size worker pool with a bounded, coalescing queue
+
+    Tasks are identified by a key. Submitting a key that is already waiting
+    in the queue returns the existing future instead of queueing a duplicate,
+    so mashing "Check Internet Status" results in one probe.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8,
+                 dispatcher: Optional[MainLoopDispatcher] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.dispatcher = dispatcher
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # key -> _Task, in submission order
+        self._running = {}  # key -> _Task
+        self._shutdown = False
+        self._threads = []
+        self.stats = {'submitted': 0, 'coalesced': 0, 'rejected': 0, 'completed': 0}
+
+        for i in range(max_workers):
+            thread = threading.Thread(target=self._worker, name=f"iitm-worker-{i}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key: str, func: Callable, *args,
+               on_done: Callable[[Future], Any] = None, **kwargs) -> Future:
+        """Queue func(*args, **kwargs) under key and return its future
+
+        on_done, if given, is called with the finished future on the main
+        loop (or directly on the worker when there is no dispatcher).
+        Raises QueueFull when max_pending tasks are already waiting.
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("TaskPool has been shut down")
+
+            task = self._pending.get(key)
+            if task is not None:
+                self.stats['coalesced'] += 1
+            else:
+                if len(self._pending) >= self.max_pending:
+                    self.stats['rejected'] += 1
+                    raise QueueFull(f"Too many pending tasks ({self.max_pending})")
+                task = _Task(key, func, args, kwargs)
+                self._pending[key] = task
+                self.stats['submitted'] += 1
+                self._cond.notify()
+
+        if on_done:
+            task.future.add_done_callback(self._wrap_callback(on_done))
+        return task.future
+
+    def is_busy(self, key: str) -> bool:
+        """Whether a task with this key is queued or running"""
+        with self._cond:
+            return key in self._pending or key in self._running
+
+    def shutdown(self, cancel_pending: bool = True, wait: float = 0):
+        """Stop accepting work, cancel queued tasks and let workers exit
+
+        Running tasks are not interrupted; wait bounds how long to join the
+        worker threads for (0 = don't wait).
+        """
+        with self._cond:
+            self._shutdown = True
+            cancelled = []
+            if cancel_pending:
+                cancelled = list(self._pending.values())
+                self._pending.clear()
+            self._cond.notify_all()
+
+        for task in cancelled:
+            task.future.cancel()
+
+        if wait:
+            for thread in self._threads:
+                thread.join(wait)
+
+    def _wrap_callback(self, on_done: Callable[[Future], Any]) -> Callable[[Future], None]:
+        def callback(future: Future):
+            if future.cancelled():
+                return
+            if self.dispatcher:
+                self.dispatcher.call(on_done, future)
+            else:
+                on_done(future)
+        return callback
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._shutdown:
+                    self._cond.wait()
+                if not self._pending:
+                    return  # Shut down and nothing left to run
+                key, task = self._pending.popitem(last=False)
+                self._running[key] = task
+
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.func(*task.args, **task.kwargs))
+                except BaseException as e:
+                    task.future.set_exception(e)
+
+            with self._cond:
+                self._running.pop(key, None)
+                self.stats['completed'] += 1
+
+
+def future_result(future: Future, default: Any = None) -> Any:
+    """Result of a finished future, or default if it failed or was cancelled"""
+    try:
+        return future.result(timeout=0)
+    except CancelledError:
+        return default
+    except Exception as e:
+        print(f"Background task failed: {e}")
+        return default
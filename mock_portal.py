@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Local mock of the netaccess portal for offline tests and simulations
+
+Serves the same page flow the automator walks through: login form, a page
+with the approve link, the approval form and the final "authorized" page.
+Also answers /generate_204 so it can stand in for the connectivity probe.
+
+Run it standalone with: python mock_portal.py [port]
+"""
+
+import ssl
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+from iitm_login_manager.rtt import RTTEstimator
+
+LOGIN_PAGE = """<html><body>
+<form method="post" action="/account/login">
+{hidden}
+<input type="text" name="userLogin">
+<input type="password" name="userPassword">
+<input type="submit" name="submit" value="">
+</form></body></html>"""
+
+OPTIONS_PAGE = """<html><body>
+<p>Welcome {user}</p>
+<a href="/account/approve">Approve</a>
+<a href="/account/logout">Logout</a>
+</body></html>"""
+
+APPROVE_PAGE = """<html><body>
+<form method="post" action="/account/approve">
+<label><input type="radio" name="duration" value="1"> 1 day</label>
+<label><input type="radio" name="duration" value="2"> 1 week</label>
+<input type="hidden" name="approveBtn" value="">
+</form></body></html>"""
+
+AUTHORIZED_PAGE = "<html><body>Machine authorized</body></html>"
+INVALID_PAGE = "<html><body>Invalid username or password</body></html>"
+
+
+class MockPortal:
+    """Threaded mock portal server with request and connection counters"""
+
+    def __init__(self, port: int = 0, username: str = "test_user", password: str = "test_pass",
+                 hidden_fields: dict = None, delay: float = 0.0, capacity: int = 0,
+                 approve_delay: float = 0.0, record: bool = True):
+        self.username = username
+        self.password = password
+        self.hidden_fields = hidden_fields or {}
+        self.delay = delay
+        self.capacity = capacity  # concurrent requests before answering 503 (0 = unlimited)
+        self.approve_delay = approve_delay  # authorize at once, answer the approval this much later
+        self.active = 0
+        self.peak_active = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.record = record  # False keeps no per-request log (soak tests)
+        self.requests = []  # (monotonic time, method, path)
+        self.connections = set()
+        self.served = 0
+        self.authorized_ips = set()
+
+        portal = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this every
+            # keep-alive response waits out the client's delayed ACK (~40ms)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _record(self):
+                """Log the request; False if the portal is over capacity"""
+                with portal.lock:
+                    portal.served += 1
+                    if portal.record:
+                        portal.requests.append((time.monotonic(), self.command, self.path))
+                        portal.connections.add(self.client_address)
+                    portal.active += 1
+                    portal.peak_active = max(portal.peak_active, portal.active)
+                    if portal.capacity and portal.active > portal.capacity:
+                        portal.rejected += 1
+                        return False
+                if portal.delay:
+                    time.sleep(portal.delay)
+                return True
+
+            def _send(self, status, body="", headers=None):
+                with portal.lock:
+                    portal.active -= 1
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                try:
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client gave up (e.g. a cancelled login)
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                if not self._record():
+                    self._send(503, "busy")
+                elif self.path == "/generate_204":
+                    if self.client_address[0] in portal.authorized_ips:
+                        self._send(204)
+                    else:
+                        self._send(302, headers={"Location": "https://netaccess.iitm.ac.in/account/login"})
+                elif self.path == "/account/login":
+                    hidden = "\n".join(f'<input type="hidden" name="{k}" value="{v}">'
+                                       for k, v in portal.hidden_fields.items())
+                    self._send(200, LOGIN_PAGE.format(hidden=hidden))
+                elif self.path == "/account/approve":
+                    self._send(200, APPROVE_PAGE)
+                else:
+                    self._send(404, "not found")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode(),
+                                                     keep_blank_values=True).items()}
+                if not self._record():
+                    self._send(503, "busy")
+                elif self.path == "/account/login":
+                    if form.get("userLogin") == portal.username and form.get("userPassword") == portal.password:
+                        self._send(200, OPTIONS_PAGE.format(user=portal.username))
+                    else:
+                        self._send(200, INVALID_PAGE)
+                elif self.path == "/account/approve":
+                    with portal.lock:
+                        portal.authorized_ips.add(self.client_address[0])
+                    if portal.approve_delay:
+                        time.sleep(portal.approve_delay)
+                    self._send(200, AUTHORIZED_PAGE)
+                else:
+                    self._send(404, "not found")
+
+        # Loopback only; clients may still connect from any 127.x source address
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_port
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self._thread = None
+
+    @property
+    def authorized(self) -> bool:
+        return bool(self.authorized_ips)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def use_tls(self, certfile: str, keyfile: str = None):
+        """Serve HTTPS with this certificate (call before start)"""
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(certfile, keyfile)
+        self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+        self.base_url = f"https://127.0.0.1:{self.port}"
+        return self
+
+    def count(self, method: str = None, path: str = None) -> int:
+        with self.lock:
+            return sum(1 for _, m, p in self.requests
+                       if (method is None or m == method) and (path is None or p == path))
+
+    def point_automator(self, automator):
+        """Aim an IITMNetAccessAutomator (and its prober) at this server"""
+        return point_automator(automator, self.base_url)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_automator(automator, base_url: str):
+    """Aim an automator (and its prober) at a portal served from base_url"""
+    automator.base_url = base_url
+    automator.login_url = f"{base_url}/account/login"
+    automator.prober.targets = [f"{base_url}/generate_204"]
+    return automator
+
+
+def make_automator(portal, engine, username: str = "test_user", password: str = "test_pass",
+                   fast: bool = False, **settings):
+    """An automator for tests, aimed at a MockPortal or a base URL
+
+    It gets its own RTT estimator, so the user's cache is neither read nor
+    written, and skips the campus check (the mock portal is on loopback).
+    fast drops the activation wait and verifies access against the portal
+    itself; other settings are set as attributes.
+    """
+    base_url = getattr(portal, 'base_url', portal)
+    automator = point_automator(engine(username, password), base_url)
+    automator.rtt = automator.prober.rtt = RTTEstimator()
+    automator.skip_off_campus = False
+    if fast:
+        automator.activation_wait = 0
+        automator.internet_test_urls = [f"{base_url}/account/login"]
+    for name, value in settings.items():
+        setattr(automator, name, value)
+    return automator
+
+
+if __name__ == "__main__":
+    portal = MockPortal(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8080).start()
+    print(f"Mock portal listening on {portal.base_url} (user: {portal.username} / {portal.password})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        portal.stop()
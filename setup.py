@@ -56,7 +56,7 @@ setup(
     entry_points={
         "console_scripts": [
             "iitm-login-manager=iitm_login_manager.main:main",
-            "iitm-login-tray=iitm_login_manager.tray:main",
+            "iitm-login-tray=iitm_login_manager.instance:main",
         ],
     },
     data_files=[
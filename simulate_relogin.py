@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Replay simulator for predictive pre-emptive re-login
+
+Trains a DropPredictor on the first part of a login history and replays the
+rest, comparing the captive minutes per day that were recorded (the fixed
+schedule) with what the extra pre-emptive logins would have left.
+
+Replay rules, per recorded drop:
+- if the predictor attributes it to session age and a pre-emptive login
+  happened during that session before the drop, the session was renewed in
+  time and the drop is averted
+- otherwise the machine is captive from the drop until the recorded
+  recovery, or until an earlier pre-emptive login
+
+Run against your own history or a synthetic one:
+    python simulate_relogin.py [--history PATH] [--train-days 21]
+    python simulate_relogin.py --synthetic 28
+"""
+
+import argparse
+import bisect
+import random
+import time
+from datetime import datetime, timedelta
+
+from iitm_login_manager.history import HistoryStore
+from iitm_login_manager.predict import DropPredictor, DAY
+
+
+def plan_logins(predictor, logins, start, end):
+    """Pre-emptive login times the predictor would have scheduled in [start, end)"""
+    extra = []
+    index = bisect.bisect_left(logins, start)
+    last_login = logins[index - 1] if index else None
+    now = start
+    while now < end:
+        prediction = predictor.next_drop(now, last_login)
+        if prediction is None or prediction.login_at >= end:
+            break
+        # A recorded login before the planned one changes what we would predict
+        if index < len(logins) and logins[index] < prediction.login_at:
+            now = last_login = logins[index]
+            index += 1
+            continue
+        extra.append(prediction.login_at)
+        last_login = prediction.login_at
+        now = max(prediction.drop_at, prediction.login_at) + 1
+    return extra
+
+
+def replay(predictor, drops, logins, start, end):
+    """Compare recorded captive time with the pre-emptive policy over [start, end)
+
+    drops are (drop time, recovery time or None) pairs, logins successful
+    login times (both sorted).
+    """
+    extra = plan_logins(predictor, logins, start, end)
+    recorded = predictive = 0.0
+    averted = 0
+    for ts, recovered in drops:
+        if not start <= ts < end:
+            continue
+        recovered = min(recovered or end, end)
+        recorded += recovered - ts
+
+        index = bisect.bisect_left(logins, ts)
+        session_start = logins[index - 1] if index else None
+        age = ts - session_start if session_start is not None else None
+        renewed = session_start is not None and any(session_start < t < ts for t in extra)
+        if renewed and predictor.explains_age(age):
+            averted += 1
+            continue
+
+        later = bisect.bisect_left(extra, ts)
+        if later < len(extra) and extra[later] < recovered:
+            recovered = extra[later]
+        predictive += recovered - ts
+
+    days = max(1e-9, (end - start) / DAY)
+    return {
+        'days': days,
+        'drops': sum(1 for ts, _ in drops if start <= ts < end),
+        'averted': averted,
+        'extra_logins': len(extra),
+        'recorded_captive_min_per_day': recorded / 60 / days,
+        'predictive_captive_min_per_day': predictive / 60 / days,
+    }
+
+
+def generate_history(history, days=28, seed=0, session_hours=6, login_times=("08:00", "20:00"),
+                     maintenance="23:00", maintenance_minutes=10):
+    """Write a synthetic history: twice-daily logins, sessions expiring after
+    session_hours, and a nightly maintenance outage, probed every minute"""
+    rng = random.Random(seed)
+    first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    start = first_day.timestamp()
+
+    def at(day, hhmm, jitter=0):
+        hour, minute = map(int, hhmm.split(":"))
+        return (first_day + timedelta(days=day, hours=hour, minutes=minute)).timestamp() + rng.uniform(0, jitter)
+
+    logins = sorted(at(day, hhmm, 60) for day in range(-1, days) for hhmm in login_times)
+    outages = []
+    for i, login in enumerate(logins):
+        next_login = logins[i + 1] if i + 1 < len(logins) else start + (days + 1) * DAY
+        expiry = login + session_hours * 3600 + rng.uniform(-120, 120)
+        if expiry < next_login:
+            outages.append((expiry, next_login))
+    for day in range(days):
+        down = at(day, maintenance, 180)
+        outages.append((down, down + maintenance_minutes * 60))
+    outages.sort()
+
+    rows = []
+    for minute in range(days * 1440):
+        ts = start + minute * 60
+        state = 'online'
+        for down, up in outages:
+            if down <= ts < up:
+                state = 'captive'
+                break
+            if down > ts:
+                break
+        rows.append((ts, state, 0.05, None, 'local'))
+    history.record_probes(rows)
+    for login in logins:
+        if login >= start:
+            history.record_login('success', 3.0, ts=login)
+    return start, start + days * DAY
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay login history with predictive re-login")
+    parser.add_argument("--history", help="history database (default: your own)")
+    parser.add_argument("--synthetic", type=int, metavar="DAYS", help="generate a synthetic history instead")
+    parser.add_argument("--train-days", type=float, default=21)
+    parser.add_argument("--min-confidence", type=float, default=0.6)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        history = HistoryStore(":memory:")
+        start, end = generate_history(history, days=args.synthetic)
+    else:
+        history = HistoryStore(args.history)
+        end = time.time()
+        start = end - (args.train_days + 7) * DAY
+
+    split = start + args.train_days * DAY
+    drops = history.drop_events(start, end)
+    logins = history.login_times(start, end)
+    predictor = DropPredictor(min_confidence=args.min_confidence)
+    predictor.fit([ts for ts, _ in drops], logins, start, split)
+
+    result = replay(predictor, drops, logins, split, end)
+    print(f"Trained on {args.train_days:g} days ({predictor.drop_count} drops), "
+          f"replayed {result['days']:.1f} days ({result['drops']} drops)")
+    print(f"Pre-emptive logins: {result['extra_logins']}, drops averted: {result['averted']}")
+    print(f"Captive minutes/day: fixed schedule {result['recorded_captive_min_per_day']:.1f}, "
+          f"with prediction {result['predictive_captive_min_per_day']:.1f}")
+    prediction = predictor.next_drop(end, logins[-1] if logins else None)
+    print(f"Next likely drop: {prediction.to_dict() if prediction else 'none predicted'}")
+
+
+if __name__ == "__main__":
+    main()
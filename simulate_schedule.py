@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Load simulation for scheduled logins against the mock portal
+
+Starts N clients that all have a login scheduled at the same nominal time,
+once without jitter (everyone fires at once) and once with the per-host
+jitter from iitm_login_manager.scheduling, and prints the portal's request
+rate over time. Time is compressed by --scale, so a 900 s window with
+--scale 0.01 plays out in 9 s.
+
+Run with: python simulate_schedule.py [--clients 100] [--window 900] [--scale 0.01]
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from iitm_login_manager.automator import IITMNetAccessAutomator
+from iitm_login_manager.rtt import RTTEstimator
+from iitm_login_manager.scheduling import jitter_offset, retry_delay
+from mock_portal import MockPortal
+
+
+def make_client(portal):
+    automator = portal.point_automator(IITMNetAccessAutomator(portal.username, portal.password))
+    automator.rtt = automator.prober.rtt = RTTEstimator()
+    automator.log = lambda message: None
+    return automator
+
+
+def login_once(automator) -> bool:
+    """The portal-facing part of a login (no activation wait or internet check)"""
+    response = automator.perform_login()
+    if not response:
+        return False
+    final = automator.handle_access_options(response)
+    return final is not None and final.status_code == 200 and 'authorized' in final.text.lower()
+
+
+def run_client(portal, offset, scale, retries, rng, results, index):
+    automator = make_client(portal)
+    time.sleep(offset * scale)
+    attempts = 0
+    ok = False
+    while not ok and attempts <= retries:
+        if attempts:
+            time.sleep(retry_delay(attempts, rng=rng) * scale)
+        attempts += 1
+        ok = login_once(automator)
+    results[index] = (ok, attempts, time.monotonic())
+
+
+def simulate(clients, window, scale, retries, capacity, delay, jitter, seed=0):
+    """Run one scenario and return (portal, per-client results, start time)"""
+    rng = random.Random(seed)
+    portal = MockPortal(capacity=capacity, delay=delay).start()
+    results = [None] * clients
+    threads = []
+    start = time.monotonic()
+    try:
+        for i in range(clients):
+            offset = jitter_offset(window, portal.username, host_id=f"host-{i}") if jitter else 0.0
+            thread = threading.Thread(target=run_client, daemon=True,
+                                      args=(portal, offset, scale, retries,
+                                            random.Random(rng.random()), results, i))
+            threads.append(thread)
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        portal.stop()
+    return portal, results, start
+
+
+def load_curve(portal, start, bucket):
+    """Requests per bucket (in compressed seconds) from the portal's log"""
+    counts = {}
+    for at, _, _ in portal.requests:
+        index = int((at - start) / bucket)
+        counts[index] = counts.get(index, 0) + 1
+    return [counts.get(i, 0) for i in range(max(counts) + 1)] if counts else []
+
+
+def report(name, portal, results, start, scale, bucket):
+    finished = [r for r in results if r]
+    ok = sum(1 for r in finished if r[0])
+    attempts = sum(r[1] for r in finished)
+    duration = max(r[2] for r in finished) - start if finished else 0
+    bucket *= scale
+    curve = load_curve(portal, start, bucket)
+
+    print(f"\n{name}")
+    print(f"  logins ok: {ok}/{len(results)}  attempts: {attempts}  "
+          f"503s: {portal.rejected}  peak concurrency: {portal.peak_active}")
+    print(f"  all done after {duration / scale:.0f}s (simulated)")
+    peak = max(curve) if curve else 0
+    for i, count in enumerate(curve):
+        bar = "#" * int(round(40 * count / peak)) if peak else ""
+        print(f"  {i * bucket / scale:7.0f}s {count:5d} {bar}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate scheduled-login load on the mock portal")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--window", type=float, default=900, help="jitter window in seconds")
+    parser.add_argument("--scale", type=float, default=0.01, help="real seconds per simulated second")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--capacity", type=int, default=8, help="concurrent requests before 503")
+    parser.add_argument("--delay", type=float, default=0.02, help="portal service time per request")
+    parser.add_argument("--bucket", type=float, default=60, help="histogram bucket in simulated seconds")
+    args = parser.parse_args()
+
+    for name, jitter in (("Synchronized (no jitter)", False), ("Per-host jitter", True)):
+        portal, results, start = simulate(args.clients, args.window, args.scale, args.retries,
+                                          args.capacity, args.delay, jitter)
+        report(name, portal, results, start, args.scale, args.bucket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the coroutine services of the integrated event loop
+"""
+
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+import schedule
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.aioloop import AsyncProber, ScheduleRunner
+from iitm_login_manager.heartbeat import HeartbeatMonitor
+from iitm_login_manager.probe import ConnectivityProber, ProbeState
+from iitm_login_manager.resolver import Resolver
+from mock_portal import MockPortal
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/generate_204"
+
+
+def test_async_probe_matches_sync_probe():
+    print("🧪 Testing coroutine probes against the mock portal...")
+    with MockPortal() as portal:
+        prober = ConnectivityProber(targets=[f"{portal.base_url}/generate_204"], timeout=2)
+        aprober = AsyncProber(prober)
+
+        captive = asyncio.run(aprober.probe())
+        assert captive.state == ProbeState.CAPTIVE == prober.probe().state
+        assert "netaccess.iitm.ac.in" in captive.detail
+
+        portal.authorized_ips.add("127.0.0.1")
+        online = asyncio.run(aprober.probe())
+        assert online.state == ProbeState.ONLINE == prober.probe().state
+        assert online.bytes_used > prober.REQUEST_OVERHEAD
+
+        prober.targets = [closed_port_url(), f"{portal.base_url}/generate_204"]
+        offline = asyncio.run(aprober.probe(prober.targets[0]))
+        assert offline.state == ProbeState.OFFLINE
+        fallback = asyncio.run(aprober.probe_any())
+        assert fallback.state == ProbeState.ONLINE  # falls through to the next target
+        assert fallback.probes == 2 and fallback.bytes_used > offline.bytes_used + prober.REQUEST_OVERHEAD
+        assert prober.probe_any().probes == 2
+    print(f"   ✅ online in {online.latency * 1000:.1f}ms, captive and offline recognised")
+
+
+def test_async_probe_uses_resolver_and_source_address():
+    """Coroutine probes share the DNS cache and interface binding of the sync prober"""
+    with MockPortal() as portal:
+        resolver = Resolver()
+        prober = ConnectivityProber(targets=[f"http://localhost:{portal.port}/generate_204"], timeout=2,
+                                    resolver=resolver, source_address="127.0.0.2")
+        aprober = AsyncProber(prober)
+        assert prober.probe().state == ProbeState.CAPTIVE
+        assert asyncio.run(aprober.probe()).state == ProbeState.CAPTIVE
+        stats = resolver.stats()
+        assert stats['connects'] == 2 and stats['misses'] == 1 and stats['hits'] == 1
+        assert {address for address, _ in portal.connections} == {"127.0.0.2"}
+
+
+def test_heartbeat_runs_on_the_loop():
+    """Probes happen on the loop thread; poke() from another thread wakes it"""
+    with MockPortal() as portal:
+        portal.authorized_ips.add("127.0.0.1")
+        prober = ConnectivityProber(targets=[f"{portal.base_url}/generate_204"], timeout=2)
+        results = []
+        monitor = HeartbeatMonitor(prober, min_interval=30, max_interval=60,
+                                   on_result=lambda result: results.append((result, threading.get_ident())))
+        threads_before = threading.active_count()
+
+        async def main():
+            task = asyncio.get_running_loop().create_task(monitor.run_async(AsyncProber(prober).probe_any))
+            await asyncio.sleep(0.2)
+            assert len(results) == 1  # the next probe is 60s away...
+            threading.Thread(target=monitor.poke).start()
+            await asyncio.sleep(0.3)
+            assert len(results) == 2  # ...unless poked
+            assert threading.active_count() <= threads_before + 1  # only the short-lived poke thread
+            monitor.stop()
+            await asyncio.wait_for(task, 1)
+
+        asyncio.run(main())
+        assert all(ident == threading.get_ident() for _, ident in results)
+        assert all(result.state == ProbeState.ONLINE for result, _ in results)
+
+
+def test_schedule_runner_sleeps_until_the_next_job():
+    scheduler = schedule.Scheduler()
+    runs = []
+
+    async def main():
+        runner = ScheduleRunner(scheduler, max_idle=60)
+        task = asyncio.get_running_loop().create_task(runner.run())
+        await asyncio.sleep(0.1)
+        assert runner.wakeups == 1  # no jobs: sleeps for max_idle
+
+        scheduler.every(1).seconds.do(lambda: runs.append(time.monotonic()))
+        runner.wake()
+        await asyncio.sleep(2.5)
+        runner.stop()
+        await asyncio.wait_for(task, 1)
+        return runner.wakeups
+
+    wakeups = asyncio.run(main())
+    assert len(runs) == 2
+    assert wakeups <= 5  # woken for the jobs, not polling
+
+
+if __name__ == "__main__":
+    test_async_probe_matches_sync_probe()
+    test_async_probe_uses_resolver_and_source_address()
+    test_heartbeat_runs_on_the_loop()
+    test_schedule_runner_sleeps_until_the_next_job()
+    print("✅ All event loop tests passed!")
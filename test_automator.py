@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the automator against the local mock portal
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator, LoginStatus
+from iitm_login_manager.history import HistoryStore
+from mock_portal import MockPortal, make_automator
+
+
+def test_prewarm_reuses_connection_and_prefetched_page():
+    """Login after prewarm(prefetch=True) skips the page GET and reuses the connection"""
+    print("🧪 Testing pre-warm...")
+    with MockPortal() as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator)
+        timings = automator.prewarm(prefetch=True)
+        assert set(timings) == {'dns', 'connect', 'prefetch'}
+        assert automator.portal_addresses
+
+        response = automator.perform_login()
+        assert response is not None
+        assert portal.count('GET', '/account/login') == 1  # only the prefetch
+        assert len(portal.connections) == 1
+    print("   ✅ One connection, one login page fetch")
+
+
+def test_prewarm_skips_prefetch_with_volatile_tokens():
+    """A login page carrying hidden tokens is not cached"""
+    with MockPortal(hidden_fields={'csrf': 'abc'}) as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator)
+        automator.prewarm(prefetch=True)
+        automator.perform_login()
+        assert portal.count('GET', '/account/login') == 2
+
+
+def test_budget_aborts_in_named_phase():
+    """A run that outlives its budget stops with the phase that overran"""
+    print("🧪 Testing login time budget...")
+    with MockPortal() as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator)
+        automator.history = HistoryStore(":memory:")
+        start = time.monotonic()
+        assert automator.automate_login(timeout=1.0) is False
+        elapsed = time.monotonic() - start
+
+        assert automator.status == LoginStatus.TIMEOUT
+        assert elapsed < 1.5
+        timings = automator.last_phase_timings
+        assert {'login_page', 'login', 'approve', 'approval_form', 'activation_wait'} <= set(timings)
+        assert portal.authorized
+
+        recorded = automator.history.recent_logins()[0]
+        assert recorded['outcome'] == LoginStatus.TIMEOUT
+        assert recorded['phases'] == timings
+    print(f"   ✅ Aborted in activation_wait after {elapsed:.2f}s")
+
+
+def test_slow_portal_request_timeout_follows_budget():
+    """Request timeouts shrink to the remaining budget"""
+    with MockPortal(delay=2) as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator)
+        statuses = []
+        automator.callback = lambda status, message: statuses.append((status, message))
+
+        start = time.monotonic()
+        assert automator.automate_login(timeout=0.5) is False
+        assert time.monotonic() - start < 1.5
+        assert statuses[-1][0] == LoginStatus.TIMEOUT
+        assert "'login_page'" in statuses[-1][1]
+
+
+if __name__ == "__main__":
+    test_prewarm_reuses_connection_and_prefetched_page()
+    test_prewarm_skips_prefetch_with_volatile_tokens()
+    test_budget_aborts_in_named_phase()
+    test_slow_portal_request_timeout_follows_budget()
+    print("✅ All automator tests passed!")
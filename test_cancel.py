@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Tests for cancelling logins: tokens, deadlines and in-flight requests
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator
+from iitm_login_manager.cancel import CancelToken, Cancelled
+from iitm_login_manager.deadline import Deadline
+from iitm_login_manager.engine import LoginStatus
+from iitm_login_manager.lite import LiteAutomator
+from iitm_login_manager.singleflight import LoginLock
+from mock_portal import MockPortal, make_automator
+
+
+def test_token_callbacks():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append('first'))
+    token.check('login')  # not cancelled yet
+    token.cancel("Stop")
+    token.cancel("Again")  # only the first reason counts
+    token.on_cancel(lambda: calls.append('late'))  # runs right away
+    assert calls == ['first', 'late']
+    assert token.reason == "Stop"
+    try:
+        token.check('approve')
+        assert False, "check() should raise once cancelled"
+    except Cancelled as e:
+        assert e.phase == 'approve'
+
+
+def test_sleep_wakes_on_cancel():
+    print("🧪 Testing cancelled sleep...")
+    token = CancelToken()
+    deadline = Deadline(30, token)
+    threading.Timer(0.05, token.cancel).start()
+    start = time.monotonic()
+    try:
+        deadline.sleep(10)
+        assert False, "sleep() should raise Cancelled"
+    except Cancelled:
+        pass
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.5
+    print(f"   ✅ 10s sleep interrupted after {elapsed * 1000:.0f}ms")
+
+
+def test_lock_wait_stops():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "login.lock")
+        holder = LoginLock(path)
+        assert holder.acquire() is None
+        stop = threading.Event()
+        threading.Timer(0.1, stop.set).start()
+        try:
+            LoginLock(path).acquire(should_stop=stop.is_set)
+            assert False, "acquire() should give up when asked to stop"
+        except InterruptedError:
+            pass
+        finally:
+            holder.release()
+
+
+def test_cancel_in_flight_login():
+    """A login blocked on a slow portal stops at once and sends nothing more"""
+    for engine in (IITMNetAccessAutomator, LiteAutomator):
+        print(f"🧪 Testing cancel during a slow request ({engine.__name__})...")
+        with MockPortal(delay=2) as portal:
+            automator = make_automator(portal, engine, fast=True)
+            statuses = []
+            automator.callback = lambda status, message: statuses.append(status)
+            result = []
+            thread = threading.Thread(target=lambda: result.append(automator.automate_login(timeout=30)))
+            thread.start()
+            time.sleep(0.3)  # the login page request is now waiting on the portal
+            start = time.monotonic()
+            assert automator.cancel("Quitting")
+            thread.join(5)
+            elapsed = time.monotonic() - start
+            assert not thread.is_alive()
+            assert result == [False]
+            assert statuses[-1] == LoginStatus.CANCELLED
+            assert elapsed < 0.3, f"cancel took {elapsed:.2f}s"
+            assert portal.count('POST') == 0
+            assert not automator.cancel()  # nothing left to cancel
+        print(f"   ✅ Stopped after {elapsed * 1000:.0f}ms, no POST sent")
+
+
+def test_cancel_in_flight_https_login():
+    """The TLS socket, not the TCP one it wrapped, is what a cancel shuts down"""
+    print("🧪 Testing cancel during a slow HTTPS request...")
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = os.path.join(tmp, "cert.pem"), os.path.join(tmp, "key.pem")
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key, "-out", cert],
+                       check=True, capture_output=True)
+        with MockPortal(delay=2).use_tls(cert, key) as portal:
+            automator = make_automator(portal, IITMNetAccessAutomator, fast=True)
+            automator.session.trust_env = False  # or REQUESTS_CA_BUNDLE overrides verify
+            automator.session.verify = cert
+            adapter = automator.session.get_adapter(portal.base_url)
+            abort, aborted = adapter.abort, []
+            adapter.abort = lambda: aborted.append(abort()) or aborted[-1]
+            result = []
+            thread = threading.Thread(target=lambda: result.append(automator.automate_login(timeout=30)))
+            thread.start()
+            time.sleep(0.5)  # past the handshake, waiting on the login page
+            start = time.monotonic()
+            automator.cancel("Quitting")
+            thread.join(5)
+            elapsed = time.monotonic() - start
+            assert not thread.is_alive()
+            assert result == [False] and automator.status == LoginStatus.CANCELLED
+            assert aborted and aborted[0] >= 1
+            assert elapsed < 0.3, f"cancel took {elapsed:.2f}s"
+            assert portal.count('POST') == 0
+    print(f"   ✅ Stopped after {elapsed * 1000:.0f}ms")
+
+
+def test_no_new_connection_after_cancel():
+    with MockPortal() as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator, fast=True)
+        token = CancelToken()
+        token.cancel()
+        automator._bind_transport(token)
+        try:
+            automator.session.get(portal.base_url + "/account/login", timeout=5)
+            assert False, "a cancelled adapter should refuse to connect"
+        except requests.ConnectionError:
+            pass
+        automator._bind_transport(None)
+        assert automator.session.get(portal.base_url + "/account/login", timeout=5).ok
+        assert portal.count() == 1
+
+
+if __name__ == "__main__":
+    test_token_callbacks()
+    test_sleep_wakes_on_cancel()
+    test_lock_wait_stops()
+    test_cancel_in_flight_login()
+    test_cancel_in_flight_https_login()
+    test_no_new_connection_after_cancel()
+    print("✅ All cancellation tests passed!")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script for record/replay HTTP cassettes
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator, LoginStatus
+from iitm_login_manager.cassette import Cassette, CassetteMiss, use_cassette
+from mock_portal import MockPortal, make_automator
+
+CASSETTE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes", "mock_portal_login.json")
+BASE_URL = "http://127.0.0.1:47480"  # the port the bundled cassette was recorded on
+
+
+def record(path, port=0, delay=0.0):
+    with MockPortal(port=port, delay=delay) as portal:
+        automator = make_automator(portal.base_url, IITMNetAccessAutomator, fast=True)
+        cassette = use_cassette(automator, Cassette(path), mode='record')
+        assert automator.automate_login(timeout=30)
+        cassette.save()
+    return cassette, portal.base_url
+
+
+def test_recording_redacts_credentials():
+    path = os.path.join(tempfile.mkdtemp(), "login.json")
+    cassette, base_url = record(path)
+    with open(path) as f:
+        text = f.read()
+    assert "test_pass" not in text
+    assert "test_user" not in text
+    methods = [(i['request']['method'], i['request']['url'].rsplit('/', 2)[-2:]) for i in cassette.interactions]
+    assert ('POST', ['account', 'login']) in methods
+    assert all(i['request']['url'].startswith(base_url) for i in cassette.interactions)  # never left the sandbox
+
+
+def test_full_login_replays_offline():
+    """automate_login against the bundled cassette, no server running"""
+    print("🧪 Replaying a recorded login...")
+    statuses = []
+    automator = make_automator(BASE_URL, IITMNetAccessAutomator, fast=True)
+    automator.callback = lambda status, message: statuses.append(status)
+    cassette = use_cassette(automator, Cassette.load(CASSETTE))
+    assert all(i['request']['url'].startswith(BASE_URL) for i in cassette.interactions)
+    verified = []
+    check = automator.check_internet_access
+    automator.check_internet_access = lambda deadline=None: verified.append(check(deadline)) or verified[-1]
+
+    start = time.perf_counter()
+    assert automator.automate_login(timeout=10)
+    elapsed = time.perf_counter() - start
+    assert statuses[-1] == LoginStatus.SUCCESS
+    assert verified == [True]  # the verification step is replayed too
+    assert cassette.misses == 0
+    assert elapsed < 0.5
+    print(f"   ✅ Full login replayed in {elapsed * 1000:.0f}ms")
+
+
+def test_replay_misses_raise_connection_errors():
+    automator = make_automator("http://127.0.0.1:1", IITMNetAccessAutomator)
+    use_cassette(automator, Cassette.load(CASSETTE))
+    try:
+        automator.session.get("http://127.0.0.1:1/account/login", timeout=1)
+        assert False, "expected a miss"
+    except CassetteMiss:
+        pass
+    assert automator.get_login_page() is None
+
+
+def test_realtime_replay_keeps_original_timing():
+    path = os.path.join(tempfile.mkdtemp(), "slow.json")
+    _, base_url = record(path, delay=0.1)  # the portal is gone afterwards
+
+    automator = make_automator(base_url, IITMNetAccessAutomator, fast=True)
+    use_cassette(automator, Cassette.load(path, realtime=True))
+
+    start = time.perf_counter()
+    assert automator.get_login_page() is not None
+    assert time.perf_counter() - start >= 0.1
+
+
+if __name__ == "__main__":
+    if "--record" in sys.argv:
+        record(CASSETTE, port=int(BASE_URL.rsplit(':', 1)[1]))
+        print(f"Recorded {CASSETTE}")
+        sys.exit(0)
+    test_recording_redacts_credentials()
+    test_full_login_replays_offline()
+    test_replay_misses_raise_connection_errors()
+    test_realtime_replay_keeps_original_timing()
+    print("✅ All cassette tests passed!")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the cached, validated and watched configuration
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.config import Config, SCHEMA, apply_rtt_settings, validate
+from iitm_login_manager.rtt import RTTEstimator
+
+
+def write(path, data):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+def test_parsed_once_and_defaults():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        write(path, {'username': 'ee20b001', 'schedule_window': 120})
+        config = Config(path)
+        for _ in range(100):
+            config.load()
+        assert config.parses == 1
+        assert config.get('username') == 'ee20b001'
+        assert config.get('schedule_window') == 120
+        assert config.get('probe_timeout') == SCHEMA['probe_timeout'].default
+        assert config.get('probe_timeout', 1) == 1
+        assert config.to_dict()['schedule'] == 'daily'
+
+        assert Config(os.path.join(directory, "missing.json")).get('heartbeat') is True
+
+
+def test_schema_rejects_bad_values():
+    clean, problems = validate({'schedule': 'hourly', 'login_budget': -5, 'heartbeat': 'yes',
+                                'schedule_retries': True, 'probe_targets': ['http://a/generate_204'],
+                                'from_the_future': 1})
+    assert set(clean) == {'probe_targets', 'from_the_future'}
+    assert len(problems) == 4
+
+    config = Config(os.path.join(tempfile.gettempdir(), f"iitm-none-{os.getpid()}.json"))
+    try:
+        config['probe_timeout'] = 0
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a zero timeout should be rejected")
+    config['probe_timeout'] = 2.5
+    assert config['probe_timeout'] == 2.5
+
+
+def test_rtt_bounds_applied():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        write(path, {'rtt_floor': 2, 'rtt_ceiling': 1})
+        rtt = RTTEstimator()
+        apply_rtt_settings(Config(path), rtt)
+        assert (rtt.floor, rtt.ceiling) == (2, 2)  # a ceiling below the floor is raised to it
+
+
+def test_saves_are_atomic():
+    """A reader running alongside a writer only ever sees whole files"""
+    print("🧪 Testing atomic config writes...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        config = Config(path)
+        config['campus_fingerprints'] = [{'gateway': ['10.0.0.1']}] * 200  # a few KB per write
+        config.save()
+        stop = threading.Event()
+        errors = []
+
+        def read():
+            while not stop.is_set():
+                try:
+                    with open(path) as f:
+                        json.load(f)
+                except ValueError as e:
+                    errors.append(e)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        for i in range(200):
+            config['schedule_retries'] = i
+            config.save()
+        stop.set()
+        reader.join()
+        assert not errors, errors[0]
+        assert os.listdir(directory) == ["config.json"]
+        assert Config(path).get('schedule_retries') == 199
+    print("   ✅ 200 writes, no partial reads")
+
+
+def test_watch_picks_up_other_writers():
+    print("🧪 Testing config reload on change...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        tray = Config(path)
+        changes = []
+        changed = threading.Event()
+        assert tray.watch(lambda keys: changes.append(keys) or changed.set())
+        try:
+            tray['notify_window'] = 30
+            tray.save()  # our own write is not reported
+            time.sleep(0.2)
+            assert not changes
+
+            start = time.monotonic()
+            cli = Config(path)
+            cli['username'] = 'ee20b001'
+            cli['probe_targets'] = ['http://example.com/generate_204']
+            cli.save()
+            assert changed.wait(2)
+            elapsed = time.monotonic() - start
+            assert changes == [{'username', 'probe_targets'}]
+            assert tray.get('username') == 'ee20b001'
+            assert tray.get('notify_window') == 30
+        finally:
+            tray.stop_watching()
+    print(f"   ✅ Reloaded {elapsed * 1000:.1f}ms after the other process saved")
+
+
+if __name__ == "__main__":
+    test_parsed_once_and_defaults()
+    test_schema_rejects_bad_values()
+    test_rtt_bounds_applied()
+    test_saves_are_atomic()
+    test_watch_picks_up_other_writers()
+    print("✅ All config tests passed!")
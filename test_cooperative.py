@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test script for LAN-cooperative status sharing over loopback multicast
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.cooperative import CooperativeStatus
+from iitm_login_manager.heartbeat import HeartbeatMonitor
+from iitm_login_manager.probe import ProbeResult, ProbeState
+
+
+class CountingProber:
+    def __init__(self):
+        self.probes = 0
+
+    def probe_any(self, timeout=None):
+        self.probes += 1
+        return ProbeResult(ProbeState.ONLINE, 0.01, 300, "fake")
+
+
+def make_node(port, key=b"lab-secret"):
+    node = CooperativeStatus(key, port=port, interface_address="127.0.0.1",
+                             gateway=lambda: "10.24.0.1")
+    node.start()
+    return node
+
+
+def wait_for(condition, timeout=2):
+    give_up = time.monotonic() + timeout
+    while time.monotonic() < give_up:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_peer_observation_is_shared():
+    """An announcement from one node is visible to the others"""
+    print("🧪 Testing multicast sharing...")
+    port = random.randint(40000, 60000)
+    a, b = make_node(port), make_node(port)
+    try:
+        a.announce(ProbeResult(ProbeState.CAPTIVE, 0.02, 300, "probe"))
+        assert wait_for(lambda: b.fresh_observation() is not None)
+        shared = b.fresh_observation()
+        assert shared.state == ProbeState.CAPTIVE
+        assert shared.source == "peer"
+        assert a.fresh_observation() is None  # own messages are ignored
+    finally:
+        a.stop()
+        b.stop()
+    print("   ✅ Observation received over loopback multicast")
+
+
+def test_forged_stale_and_replayed_messages_are_rejected():
+    node = CooperativeStatus(b"lab-secret", gateway=lambda: "10.24.0.1")
+    other = CooperativeStatus(b"wrong-key", gateway=lambda: "10.24.0.1")
+
+    def packet(signer, seq, ts=None, gateway="10.24.0.1"):
+        payload = json.dumps({'v': 1, 'node': 'peer', 'seq': seq, 'ts': ts or time.time(),
+                              'state': 'online', 'gateway': gateway})
+        return json.dumps({'p': payload, 's': signer._sign(payload)}).encode()
+
+    assert node.handle_packet(packet(other, 1)) is None
+    assert node.handle_packet(packet(node, 1, ts=time.time() - 600)) is None
+    assert node.handle_packet(packet(node, 1, gateway="192.168.1.1")) is None
+    assert node.handle_packet(packet(node, 1)) is not None
+    assert node.handle_packet(packet(node, 1)) is None
+    assert node.handle_packet(b"garbage") is None
+
+    stats = node.get_stats()
+    assert stats['bad_signature'] == 1
+    assert stats['stale'] == 1
+    assert stats['other_gateway'] == 1
+    assert stats['replayed'] == 1
+    assert stats['accepted'] == 1
+
+
+def test_probe_volume_is_constant_per_subnet():
+    """With 10 cooperating nodes only one keeps probing the internet"""
+    print("🧪 Testing probe volume across 10 nodes...")
+    port = random.randint(40000, 60000)
+    nodes = [make_node(port) for _ in range(10)]
+    probers = [CountingProber() for _ in nodes]
+    monitors = []
+    for node, prober in zip(nodes, probers):
+        monitors.append(HeartbeatMonitor(prober, on_result=node.announce,
+                                         peer_source=node.fresh_observation))
+    try:
+        for _ in range(5):
+            for monitor in monitors:
+                monitor.tick()
+                time.sleep(0.02)  # let the announcement arrive
+        total = sum(p.probes for p in probers)
+        assert total == 5, [p.probes for p in probers]
+        assert sum(m.peer_skips for m in monitors) == 45
+    finally:
+        for node in nodes:
+            node.stop()
+    print(f"   ✅ {total} probes for 50 heartbeat ticks")
+
+
+if __name__ == "__main__":
+    test_peer_observation_is_shared()
+    test_forged_stale_and_replayed_messages_are_rejected()
+    test_probe_volume_is_constant_per_subnet()
+    print("✅ All cooperative tests passed!")
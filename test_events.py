@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the event bus and the --watch NDJSON stream
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.events import EventBus
+from iitm_login_manager.instance import SingleInstance
+from iitm_login_manager.lite import LiteAutomator
+from iitm_login_manager.main import watch_events
+from mock_portal import MockPortal, make_automator
+
+
+def unique_name():
+    return f"iitm-test-{os.getpid()}-{time.monotonic_ns()}"
+
+
+def test_slow_subscriber_gets_a_drop_summary():
+    bus = EventBus()
+    assert bus.publish('log', message="nobody listening") is None
+    fast, slow = bus.subscribe(), bus.subscribe(maxsize=3)
+    only_status = bus.subscribe(types=['status'])
+    for i in range(5):
+        bus.publish('log', message=f"line {i}")
+    bus.publish('status', status="success", message="")
+
+    assert [e.get('message') for e in iter(lambda: fast.get(timeout=0), None)] == \
+        [f"line {i}" for i in range(5)] + [""]
+    dropped = slow.get(timeout=0)
+    assert dropped['type'] == 'dropped'
+    assert dropped['count'] == 3 and dropped['types'] == {'log': 3}
+    assert [slow.get(timeout=0)['message'] for _ in range(2)] == ["line 3", "line 4"]
+    assert slow.get(timeout=0)['type'] == 'status'
+    assert slow.get(timeout=0) is None
+    assert only_status.get(timeout=0)['status'] == "success"
+    assert only_status.get(timeout=0) is None
+    assert bus.get_stats() == {'published': 6, 'subscribers': 3, 'dropped': 3}
+
+    slow.close()
+    assert slow.get() is None  # returns at once once closed
+    assert bus.get_stats()['subscribers'] == 2
+
+
+def test_login_publishes_status_log_and_timings():
+    with MockPortal() as portal:
+        automator = make_automator(portal, LiteAutomator, fast=True)
+        events = automator.events.subscribe(maxsize=1000)
+        assert automator.automate_login(timeout=10)
+        received = list(iter(lambda: events.get(timeout=0), None))
+    types = {event['type'] for event in received}
+    assert {'status', 'log', 'login'} <= types
+    login = [event for event in received if event['type'] == 'login'][-1]
+    assert login['status'] == "success"
+    assert 'approve' in login['phases'] and login['duration'] > 0
+    json.dumps(received)  # every event is plain JSON
+
+
+def test_watchers_stream_ndjson():
+    print("🧪 Testing --watch over the instance socket...")
+    name = unique_name()
+    bus = EventBus()
+    primary = SingleInstance(name)
+    assert primary.acquire()
+    primary.serve(lambda intent: None, events=bus)
+    try:
+        lines, statuses = [], []
+        watchers = [
+            threading.Thread(target=lambda: lines.extend(SingleInstance(name).watch())),
+            threading.Thread(target=lambda: statuses.extend(SingleInstance(name).watch(types=['status']))),
+        ]
+        for watcher in watchers:
+            watcher.start()
+        deadline = time.monotonic() + 5
+        while bus.get_stats()['subscribers'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        bus.publish('probe', state="online", latency=0.012)
+        bus.publish('status', status="success", message="Connected")
+        time.sleep(0.2)
+        assert SingleInstance(name).send('login') == "ok"  # intents still work alongside
+    finally:
+        primary.close()  # ends the streams
+    for watcher in watchers:
+        watcher.join(5)
+        assert not watcher.is_alive()
+    events = [json.loads(line) for line in lines]
+    assert [e['type'] for e in events] == ['probe', 'status']
+    assert events[0]['latency'] == 0.012
+    assert [json.loads(line)['status'] for line in statuses] == ["success"]
+    print(f"   ✅ {len(lines)} events to one watcher, {len(statuses)} to a filtered one")
+
+
+def test_watch_cli_without_tray():
+    output = io.StringIO()
+    with redirect_stdout(output):
+        assert watch_events(name=unique_name()) == 1
+    assert output.getvalue() == ""
+
+
+if __name__ == "__main__":
+    test_slow_subscriber_gets_a_drop_summary()
+    test_login_publishes_status_log_and_timings()
+    test_watchers_stream_ndjson()
+    test_watch_cli_without_tray()
+    print("✅ All event stream tests passed!")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for the connectivity probe and adaptive heartbeat
+"""
+
+import os
+import sys
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.probe import ConnectivityProber, ProbeResult, ProbeState
+from iitm_login_manager.heartbeat import HeartbeatMonitor, ProbeBudget
+
+
+class FakeProber:
+    """Returns a scripted sequence of probe states"""
+
+    def __init__(self, states):
+        self.states = list(states)
+
+    def probe_any(self, timeout=None):
+        return ProbeResult(self.states.pop(0), 0.01, 300, "fake")
+
+
+def test_interval_backs_off_and_tightens():
+    """Stable results back off; a failure or flap resets to the minimum"""
+    print("🧪 Testing adaptive interval...")
+    prober = FakeProber([ProbeState.ONLINE] * 4 + [ProbeState.OFFLINE, ProbeState.ONLINE])
+    monitor = HeartbeatMonitor(prober, min_interval=5, max_interval=30)
+
+    intervals = [(monitor.tick(), monitor.interval)[1] for _ in range(6)]
+    assert intervals == [10, 20, 30, 30, 5, 5]
+    print(f"   ✅ Intervals: {intervals}")
+
+
+def test_confirmed_captive_triggers_relogin():
+    """Two captive results in a row trigger a re-login, retried with back-off while still captive"""
+    prober = FakeProber([ProbeState.CAPTIVE] * 20 + [ProbeState.ONLINE] + [ProbeState.CAPTIVE] * 2)
+    logins = []
+    monitor = HeartbeatMonitor(prober, on_captive=logins.append, captive_confirmations=2, max_relogin_gap=4)
+    fired_at = []
+    for i in range(1, 21):
+        monitor.tick()
+        if len(logins) > len(fired_at):
+            fired_at.append(i)
+    assert fired_at == [2, 4, 8, 12, 16, 20]  # gap 2, 4, then capped at 4
+    monitor.tick()  # online again
+    monitor.tick()
+    monitor.tick()
+    assert len(logins) == len(fired_at) + 1  # a fresh capture is confirmed as quickly as the first
+
+
+def test_budget_caps_probes():
+    """No probes run once the hourly budget is spent"""
+    prober = FakeProber([ProbeState.ONLINE] * 10)
+    monitor = HeartbeatMonitor(prober, budget=ProbeBudget(max_probes_per_hour=3))
+    results = [monitor.tick() for _ in range(5)]
+    assert sum(r is not None for r in results) == 3
+    assert monitor.budget.wait_time() > 3000
+
+    daily = ProbeBudget(max_bytes_per_day=500)
+    daily.record(600)
+    assert daily.wait_time() > 0
+
+
+def test_budget_counts_every_target_tried():
+    """A probe_any that fell through to a second target spends two probes"""
+    class FallbackProber:
+        def probe_any(self, timeout=None):
+            return ProbeResult(ProbeState.ONLINE, 0.01, 500, "fake", probes=2)
+
+    monitor = HeartbeatMonitor(FallbackProber(), budget=ProbeBudget(max_probes_per_hour=5))
+    results = [monitor.tick() for _ in range(4)]
+    assert sum(r is not None for r in results) == 3  # 2 + 2 + 2 probes, then over the limit
+    assert monitor.budget.bytes_today == 1500
+
+
+class PortalHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/generate_204':
+            self.send_response(204)
+            self.end_headers()
+        else:
+            self.send_response(302)
+            self.send_header('Location', 'https://netaccess.iitm.ac.in/account/login')
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_probe_classifies_responses():
+    """204 is online, a redirect is captive, a closed port is offline"""
+    print("🧪 Testing probe classification...")
+    server = HTTPServer(('127.0.0.1', 0), PortalHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    prober = ConnectivityProber(timeout=2)
+    try:
+        assert prober.probe(f"{base}/generate_204").state == ProbeState.ONLINE
+        captive = prober.probe(f"{base}/other")
+        assert captive.state == ProbeState.CAPTIVE
+        assert 'netaccess' in captive.detail
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert prober.probe(base + "/generate_204", timeout=1).state == ProbeState.OFFLINE
+    print("   ✅ online / captive / offline")
+
+
+if __name__ == "__main__":
+    test_interval_backs_off_and_tightens()
+    test_confirmed_captive_triggers_relogin()
+    test_budget_caps_probes()
+    test_budget_counts_every_target_tried()
+    test_probe_classifies_responses()
+    print("✅ All heartbeat tests passed!")
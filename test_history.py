@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for the login history store and its analytics
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.history import HistoryStore, percentile
+from iitm_login_manager.main import parse_time
+from iitm_login_manager.probe import ProbeResult, ProbeState
+
+
+def test_percentiles_and_success_rate():
+    history = HistoryStore(":memory:")
+    for i in range(1, 101):
+        history.record_login("success", float(i), {'login_page': 0.1}, ts=1000 + i)
+    history.record_login("timeout", 90.0, ts=1200)
+
+    stats = history.stats(since=0, until=2000)
+    assert stats['login_attempts'] == 101
+    assert abs(stats['success_rate'] - 100 / 101) < 1e-9
+    assert abs(stats['latency_p50'] - 50.5) < 1e-9
+    assert abs(stats['latency_p95'] - 95.05) < 1e-9
+    assert stats['latency_p99'] <= 100
+    assert history.recent_logins(limit=1)[0]['outcome'] == "timeout"
+    assert history.recent_logins(limit=1, until=1150)[0]['phases'] == {'login_page': 0.1}
+    assert percentile([], 0.5) is None
+
+
+def test_uptime_is_time_weighted_and_caps_gaps():
+    history = HistoryStore(":memory:", max_gap=600)
+    online = ProbeResult(ProbeState.ONLINE, 0.05, 300, "probe")
+    captive = ProbeResult(ProbeState.CAPTIVE, 0.05, 300, "probe")
+    history.record_probe(online, ts=0)
+    history.record_probe(online, ts=300)
+    history.record_probe(captive, ts=600)   # online for 0..600
+    history.record_probe(online, ts=700)    # captive for 600..700
+    history.record_probe(online, ts=5000)   # asleep: only 600 s of the gap count
+
+    stats = history.stats(since=0, until=6000)
+    assert stats['probes'] == 5
+    assert stats['observed_seconds'] == 700 + 600 + 0
+    assert abs(stats['uptime'] - 1200 / 1300) < 1e-9
+
+    # Windows clip spans
+    assert history.stats(since=500, until=700)['uptime'] == 0.5
+
+
+def test_history_survives_reopen():
+    path = os.path.join(tempfile.mkdtemp(), "history.sqlite3")
+    history = HistoryStore(path)
+    history.record_probes([(0, 'online', 0.1, None, 'local'), (60, 'online', 0.1, None, 'local')])
+    history.close()
+
+    history = HistoryStore(path)
+    history.record_probes([(120, 'online', 0.1, None, 'local')])
+    stats = history.stats(since=0, until=1000)
+    assert stats['observed_seconds'] == 120
+    assert history._db.execute("SELECT COUNT(*) FROM spans").fetchone()[0] == 1
+
+
+def test_year_of_probes_summarizes_quickly():
+    print("🧪 Summarizing a year of one-minute probes...")
+    history = HistoryStore(":memory:")
+    rng = random.Random(7)
+    start = time.time() - 365 * 86400
+    history.record_probes([(start + i * 60, 'online' if rng.random() < 0.99 else 'captive', 0.05, None, 'local')
+                           for i in range(365 * 1440)])
+
+    began = time.perf_counter()
+    stats = history.stats()
+    elapsed = time.perf_counter() - began
+    assert stats['probes'] == 365 * 1440
+    assert 0.97 < stats['uptime'] < 1.0
+    assert elapsed < 0.5, elapsed
+    print(f"   ✅ {stats['probes']} probes in {elapsed * 1000:.0f}ms")
+
+
+def test_parse_time():
+    now = 1_000_000
+    assert parse_time("7d", now) == now - 7 * 86400
+    assert parse_time("90m", now) == now - 5400
+    assert parse_time("2026-01-01") > 0
+
+
+if __name__ == "__main__":
+    test_percentiles_and_success_rate()
+    test_uptime_is_time_weighted_and_caps_gaps()
+    test_history_survives_reopen()
+    test_year_of_probes_summarizes_quickly()
+    test_parse_time()
+    print("✅ All history tests passed!")
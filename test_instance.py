@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test script for single-instance enforcement and intent handoff
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.instance import SingleInstance
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def unique_name():
+    return f"iitm-test-{os.getpid()}-{time.monotonic_ns()}"
+
+
+def test_second_instance_is_refused():
+    name = unique_name()
+    first, second = SingleInstance(name), SingleInstance(name)
+    try:
+        assert first.acquire()
+        assert not second.acquire()
+    finally:
+        first.close()
+    assert second.acquire()  # the name is free again once the first one quits
+    second.close()
+
+
+def test_intents_reach_running_instance():
+    name = unique_name()
+    received = []
+    primary = SingleInstance(name)
+    assert primary.acquire()
+    primary.serve(received.append)
+    try:
+        assert SingleInstance(name).send('login') == "ok"
+        assert SingleInstance(name).send('status') == "ok"
+        assert SingleInstance(name).send('format-disk').startswith("error")
+        assert received == ['login', 'status']
+    finally:
+        primary.close()
+    assert SingleInstance(name).send('login') is None  # nobody listening
+
+
+def test_handoff_is_fast_and_skips_gtk():
+    """A second launch exits quickly without loading GTK or requests"""
+    print("🧪 Timing the second-launch handoff...")
+    name = unique_name()
+    received = threading.Event()
+    primary = SingleInstance(name)
+    assert primary.acquire()
+    primary.serve(lambda intent: intent == 'login' and received.set())
+
+    script = ("import sys, time; start = time.perf_counter()\n"
+              "from iitm_login_manager.instance import main\n"
+              f"code = main(['--login-now'], name={name!r})\n"
+              "print(time.perf_counter() - start, 'gi' in sys.modules, 'requests' in sys.modules)\n"
+              "sys.exit(code)\n")
+    try:
+        result = subprocess.run([sys.executable, "-c", script], cwd=HERE,
+                                capture_output=True, text=True, timeout=30)
+    finally:
+        primary.close()
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    elapsed, gi_loaded, requests_loaded = result.stdout.split()
+    assert received.is_set()
+    assert gi_loaded == "False" and requests_loaded == "False"
+    assert float(elapsed) < 0.05, elapsed
+    print(f"   ✅ Handed off in {float(elapsed) * 1000:.1f}ms (after interpreter start)")
+
+
+if __name__ == "__main__":
+    test_second_instance_is_refused()
+    test_intents_reach_running_instance()
+    test_handoff_is_fast_and_skips_gtk()
+    print("✅ All single-instance tests passed!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script for multi-interface probing and login on loopback aliases
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.interfaces import MultiInterfaceManager
+from iitm_login_manager.location import Location, LocationDetector
+from iitm_login_manager.probe import ProbeState
+from iitm_login_manager.rtt import RTTEstimator
+from mock_portal import MockPortal
+
+
+def make_manager(portal):
+    def configure(automator):
+        portal.point_automator(automator)
+        automator.rtt = automator.prober.rtt = RTTEstimator()
+        automator.skip_off_campus = False
+        automator.activation_wait = 0
+
+    interfaces = [
+        {'name': 'lo-a', 'address': '127.0.0.2'},
+        {'name': 'lo-b', 'address': '127.0.0.3'},
+    ]
+    return MultiInterfaceManager("test_user", "test_pass", interfaces, configure=configure)
+
+
+def test_sessions_are_bound_per_interface():
+    """Each interface's traffic leaves from its own source address"""
+    print("🧪 Testing per-interface source binding...")
+    with MockPortal() as portal:
+        manager = make_manager(portal)
+        results = manager.probe_all()
+        assert set(results) == {'lo-a', 'lo-b'}
+        assert {addr for addr, _ in portal.connections} == {'127.0.0.2', '127.0.0.3'}
+    print("   ✅ Probes left from 127.0.0.2 and 127.0.0.3")
+
+
+def test_location_is_judged_per_interface():
+    """A detector shared by configure() is narrowed to each automator's own link"""
+    with MockPortal() as portal:
+        manager = make_manager(portal)
+        shared = LocationDetector([{'subnets': ['127.0.0.2/32']}])
+        configure = manager.configure
+
+        def share_location(automator):
+            configure(automator)
+            automator.location = shared
+
+        manager.configure = share_location
+        a, b = (manager.automator_for(iface) for iface in manager.interfaces)
+        assert a.location.detect().location == Location.CAMPUS
+        assert b.location.detect().location == Location.OFF_CAMPUS
+        manager.reconfigure()
+        assert (a.location.interface, b.location.address) == ('lo-a', '127.0.0.3')
+
+
+def test_only_captive_interface_logs_in():
+    """A healthy second link is left alone while the captive one logs in"""
+    print("🧪 Testing per-interface login...")
+    with MockPortal() as portal:
+        portal.authorized_ips.add('127.0.0.3')
+        manager = make_manager(portal)
+
+        results = manager.probe_all()
+        assert results['lo-a'].state == ProbeState.CAPTIVE
+        assert results['lo-b'].state == ProbeState.ONLINE
+
+        assert manager.login_all(timeout=10) == {'lo-a': True, 'lo-b': True}
+        assert portal.count('POST', '/account/login') == 1
+        assert portal.authorized_ips == {'127.0.0.2', '127.0.0.3'}
+        assert sorted(manager.online_interfaces()) == ['lo-a', 'lo-b']
+        assert manager.get_status_info()['lo-a']['last_login_ok'] is True
+    print("   ✅ Logged in on lo-a only")
+
+
+if __name__ == "__main__":
+    test_sessions_are_bound_per_interface()
+    test_location_is_judged_per_interface()
+    test_only_captive_interface_logs_in()
+    print("✅ All interface tests passed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script for scheduled-login jitter and the load simulation
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.scheduling import jitter_offset, jittered_times, retry_delay
+
+
+def test_offset_is_deterministic_and_in_window():
+    first = jitter_offset(900, "ee20b001", host_id="abc")
+    assert first == jitter_offset(900, "ee20b001", host_id="abc")
+    assert first != jitter_offset(900, "ee20b002", host_id="abc")
+    assert 0 <= first < 900
+    assert jitter_offset(0, "ee20b001", host_id="abc") == 0
+
+
+def test_offsets_spread_across_window():
+    """1000 hosts land roughly uniformly in ten 90 s slots"""
+    slots = [0] * 10
+    for i in range(1000):
+        slots[int(jitter_offset(900, "user", host_id=f"host-{i}") // 90)] += 1
+    assert min(slots) > 60 and max(slots) < 140, slots
+
+
+def test_jittered_times():
+    times = jittered_times('twice', 900, "user", host_id="abc")
+    assert len(times) == 2
+    assert "08:00:00" <= times[0] < "08:15:00"
+    assert "20:00:00" <= times[1] < "20:15:00"
+    assert jittered_times('manual', 900, "user", host_id="abc") == []
+
+
+def test_retry_delay_is_bounded_and_random():
+    rng = random.Random(1)
+    delays = [retry_delay(3, base=30, cap=600, rng=rng) for _ in range(50)]
+    assert all(30 <= d <= 120 for d in delays)
+    assert len(set(delays)) > 40
+    assert retry_delay(20, base=30, cap=600, rng=rng) <= 600
+
+
+def test_jitter_flattens_portal_load():
+    """Simulated herd of 30 clients against a portal that sheds load"""
+    from simulate_schedule import simulate
+
+    herd, herd_results, _ = simulate(30, 900, 0.002, 3, capacity=4, delay=0.01, jitter=False)
+    spread, spread_results, _ = simulate(30, 900, 0.002, 3, capacity=4, delay=0.01, jitter=True)
+
+    assert all(ok for ok, _, _ in spread_results)
+    assert spread.rejected < herd.rejected
+    assert spread.peak_active <= herd.peak_active
+    print(f"   peak concurrency {herd.peak_active} -> {spread.peak_active}, "
+          f"503s {herd.rejected} -> {spread.rejected}")
+
+
+if __name__ == "__main__":
+    test_offset_is_deterministic_and_in_window()
+    test_offsets_spread_across_window()
+    test_jittered_times()
+    test_retry_delay_is_bounded_and_random()
+    test_jitter_flattens_portal_load()
+    print("✅ All jitter tests passed!")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the standard-library login engine against the mock portal
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.engine import LoginStatus
+from iitm_login_manager.lite import LiteAutomator, FormExtractor, approval_form_data, select_engine
+from mock_portal import MockPortal, APPROVE_PAGE, make_automator
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_form_extractor_picks_one_day():
+    page = FormExtractor.parse(APPROVE_PAGE)
+    assert len(page.forms) == 1
+    assert page.forms[0]['action'] == "/account/approve"
+    assert approval_form_data(page.forms[0]) == {'duration': '1', 'approveBtn': ''}
+
+
+def test_login_over_one_connection():
+    print("🧪 Testing lite engine login...")
+    with MockPortal(hidden_fields={'csrf': 'abc'}) as portal:
+        automator = make_automator(portal, LiteAutomator, fast=True)
+        statuses = []
+        automator.callback = lambda status, message: statuses.append(status)
+        assert automator.automate_login(timeout=10)
+        assert portal.authorized
+        assert statuses[-1] == LoginStatus.SUCCESS
+        assert automator.session.connections_opened == 1
+        assert len(portal.connections) == 1
+        assert {'login_page', 'login', 'approve', 'approval_form', 'verify'} <= set(automator.last_phase_timings)
+    print(f"   ✅ Authorized in {automator.last_phase_timings['total'] * 1000:.0f}ms over one connection")
+
+
+def test_same_outcomes_as_default_engine():
+    """Both engines end in the same status for good and bad credentials"""
+    for password, expected in (("test_pass", LoginStatus.SUCCESS), ("wrong", LoginStatus.FAILED)):
+        outcomes = []
+        for engine in (LiteAutomator, select_engine('requests')):
+            with MockPortal() as portal:
+                automator = make_automator(portal, engine, password=password, fast=True)
+                statuses = []
+                automator.callback = lambda status, message: statuses.append(status)
+                automator.automate_login(timeout=10)
+                outcomes.append((statuses, portal.authorized))
+        assert outcomes[0] == outcomes[1], outcomes
+        assert outcomes[0][0][-1] == expected
+        if password == "wrong":
+            assert LoginStatus.AUTH_ERROR in outcomes[0][0]
+
+
+def test_network_error_is_reported():
+    with MockPortal() as portal:
+        automator = make_automator(portal, LiteAutomator, fast=True)
+    # The portal is gone now
+    assert automator.automate_login(timeout=5) is False
+    assert automator.status == LoginStatus.FAILED
+
+
+def test_cli_lite_engine_skips_heavy_imports():
+    script = ("import sys\n"
+              "from iitm_login_manager.main import main\n"
+              "sys.argv = ['iitm-login-manager', '--engine', 'lite', '--status', '--timeout', '0.5']\n"
+              "main()\n"
+              "print(sorted(m for m in ('requests', 'bs4', 'keyring', 'urllib3') if m in sys.modules))\n")
+    result = subprocess.run([sys.executable, "-c", script], cwd=HERE, capture_output=True, text=True, timeout=60)
+    assert result.stdout.strip().splitlines()[-1] == "[]", result.stdout + result.stderr
+
+
+if __name__ == "__main__":
+    test_form_extractor_picks_one_day()
+    test_login_over_one_connection()
+    test_same_outcomes_as_default_engine()
+    test_network_error_is_reported()
+    test_cli_lite_engine_skips_heavy_imports()
+    print("✅ All lite engine tests passed!")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test script for network location detection
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator, LoginStatus
+from iitm_login_manager.location import LocationDetector, Location, read_default_route
+
+ROUTE_HEADER = "Iface\tDestination\tGateway \tFlags\tRefCnt\tUse\tMetric\tMask\t\tMTU\tWindow\tIRTT\n"
+
+
+def write_files(tmp, routes, resolv):
+    route_path = os.path.join(tmp, 'route')
+    resolv_path = os.path.join(tmp, 'resolv.conf')
+    with open(route_path, 'w') as f:
+        f.write(ROUTE_HEADER + "".join(routes))
+    with open(resolv_path, 'w') as f:
+        f.write(resolv)
+    return route_path, resolv_path
+
+
+def test_default_route_parsing():
+    """The lowest-metric default route wins"""
+    with tempfile.TemporaryDirectory() as tmp:
+        route_path, _ = write_files(tmp, [
+            "wlan0\t00000000\t0101A8C0\t0003\t0\t0\t600\t00000000\t0\t0\t0\n",
+            "eth0\t00000000\t0100180A\t0003\t0\t0\t100\t00000000\t0\t0\t0\n",
+            "eth0\t0000180A\t00000000\t0001\t0\t0\t100\t0000FFFF\t0\t0\t0\n",
+        ], "")
+        assert read_default_route(route_path) == ('eth0', '10.24.0.1')
+
+
+def test_fingerprint_matching():
+    print("🧪 Testing location fingerprints...")
+    with tempfile.TemporaryDirectory() as tmp:
+        route_path, resolv_path = write_files(tmp, [
+            "eth0\t00000000\t0100180A\t0003\t0\t0\t100\t00000000\t0\t0\t0\n",
+        ], "search iitm.ac.in\nnameserver 10.24.0.1\n")
+
+        campus = LocationDetector([{'gateways': ['10.24.0.1'], 'search_domains': ['iitm.ac.in']}],
+                                  route_path=route_path, resolv_path=resolv_path)
+        result = campus.detect()
+        assert result.location == Location.CAMPUS
+        assert not result.skip
+
+        home = LocationDetector([{'gateways': ['10.42.0.1']}],
+                                route_path=route_path, resolv_path=resolv_path)
+        assert home.detect().location == Location.OFF_CAMPUS
+        assert home.detect().skip
+
+        # Built-in defaults only say "campus" on a match, never "off campus"
+        default = LocationDetector(route_path=route_path, resolv_path=resolv_path)
+        assert default.detect().location == Location.CAMPUS
+        write_files(tmp, ["eth0\t00000000\t0100180A\t0003\t0\t0\t100\t00000000\t0\t0\t0\n"], "")
+        assert default.detect().location == Location.UNKNOWN
+    print("   ✅ campus / off campus / unknown")
+
+
+def test_each_interface_judged_on_its_own():
+    """A campus wired link and a home Wi-Fi link on the same machine"""
+    with tempfile.TemporaryDirectory() as tmp:
+        route_path, resolv_path = write_files(tmp, [
+            "wlan0\t00000000\t0101A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n",
+            "eth0\t00000000\t0100180A\t0003\t0\t0\t600\t00000000\t0\t0\t0\n",
+        ], "")
+        detector = LocationDetector([{'gateways': ['10.24.0.1']}, {'subnets': ['10.42.0.0/16']}],
+                                    route_path=route_path, resolv_path=resolv_path)
+        assert detector.detect().location == Location.OFF_CAMPUS  # the default route is wlan0's
+        assert detector.for_interface('eth0').detect().location == Location.CAMPUS
+        wlan = detector.for_interface('wlan0', '192.168.1.5').detect()
+        assert wlan.location == Location.OFF_CAMPUS and wlan.snapshot.gateway == '192.168.1.1'
+        assert detector.for_interface('usb0', '10.42.3.4').detect().location == Location.CAMPUS
+        assert detector.for_interface('usb0').detect().location == Location.NO_NETWORK
+        assert detector.interface is None
+
+
+def test_detection_is_fast():
+    """Detection on the real machine stays well under a millisecond"""
+    detector = LocationDetector([{'subnets': ['10.0.0.0/8'], 'search_domains': ['iitm.ac.in']}])
+    detector.detect()
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        detector.detect()
+    per_call = (time.perf_counter() - start) / runs
+    assert per_call < 0.001
+    print(f"   ✅ {per_call * 1e6:.0f}us per detection")
+
+
+def test_login_short_circuits_off_campus():
+    """Off campus, a login returns at once without touching the portal"""
+    with tempfile.TemporaryDirectory() as tmp:
+        route_path, resolv_path = write_files(tmp, [
+            "eth0\t00000000\t0101A8C0\t0003\t0\t0\t100\t00000000\t0\t0\t0\n",
+        ], "")
+        automator = IITMNetAccessAutomator("test_user", "test_pass")
+        automator.base_url = automator.login_url = "http://192.0.2.1"  # would hang if contacted
+        automator.location = LocationDetector([{'gateways': ['10.24.0.1']}],
+                                               route_path=route_path, resolv_path=resolv_path)
+        start = time.monotonic()
+        assert automator.automate_login() is False
+        assert time.monotonic() - start < 0.1
+        assert automator.status == LoginStatus.OFF_CAMPUS
+
+
+if __name__ == "__main__":
+    test_default_route_parsing()
+    test_fingerprint_matching()
+    test_each_interface_judged_on_its_own()
+    test_detection_is_fast()
+    test_login_short_circuits_off_campus()
+    print("✅ All location tests passed!")
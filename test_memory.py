@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory budget, memory telemetry and a login soak test
+"""
+
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator
+from iitm_login_manager import memory
+from iitm_login_manager.instance import SingleInstance
+from iitm_login_manager.lite import LiteAutomator, LiteSession
+from iitm_login_manager.memory import MB, MemoryBudget, memory_report, object_counts, rss_bytes
+from mock_portal import MockPortal, make_automator
+
+# IITM_SOAK_LOGINS=10000 for the long soak before a release
+SOAK_LOGINS = int(os.environ.get('IITM_SOAK_LOGINS', 500))
+
+
+def test_report_over_the_instance_socket():
+    print("🧪 Testing the memory report...")
+    session = LiteSession()
+    assert object_counts()['LiteSession'] >= 1
+    assert memory_report()['rss'] > 0
+    del session
+
+    name = f"iitm-test-{os.getpid()}-{time.monotonic_ns()}"
+    primary = SingleInstance(name)
+    assert primary.acquire()
+    primary.serve(lambda intent: None, memory=memory_report)
+    was_tracing = tracemalloc.is_tracing()
+    try:
+        client = SingleInstance(name)
+        report = client.memory_report()
+        assert report['rss'] > 0 and 'BeautifulSoup' in report['objects']
+        assert 'top' not in report
+        first = client.memory_report(top=5)  # starts tracing
+        assert was_tracing or first['top'] == []
+        allocations = [bytearray(1000) for _ in range(100)]
+        second = client.memory_report(top=5)
+        assert second['tracing'] and second['top'] and second['traced'] > 0
+        del allocations
+    finally:
+        primary.close()
+        if not was_tracing:
+            tracemalloc.stop()
+    assert SingleInstance(name).memory_report() is None
+    print(f"   ✅ RSS {report['rss'] / MB:.1f} MB, top allocator: {second['top'][0]['where']}")
+
+
+def test_budget_trims_and_warns_once():
+    trims = []
+    budget = MemoryBudget(1, trim=lambda: trims.append(True))  # surely over 1 MB
+    was_tracing = tracemalloc.is_tracing()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            assert budget.check() > MB
+            budget.check()
+        assert budget.over and budget.trims == 2 and len(trims) == 2
+        assert output.getvalue().count("over the 1 MB budget") == 1
+        assert tracemalloc.is_tracing()  # so a report shows where it went
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    unlimited = MemoryBudget(0, trim=lambda: trims.append(True))
+    unlimited.check()
+    assert not unlimited.over and len(trims) == 2
+
+    # /proc readable before the trim but not after it
+    readings = iter([2 * MB, None])
+    budget = MemoryBudget(1, trim=lambda: trims.append(True))
+    original = memory.rss_bytes
+    memory.rss_bytes = lambda: next(readings)
+    try:
+        assert budget.check() is None
+    finally:
+        memory.rss_bytes = original
+    assert not budget.over and budget.trims == 1
+
+
+def test_parsed_pages_are_released():
+    """No parsed page outlives a login, even with the cycle collector off"""
+    with MockPortal() as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator, fast=True)
+        gc.collect()
+        gc.disable()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                assert automator.automate_login(timeout=10)
+                login_info = automator.get_login_page()
+            counts = object_counts()
+        finally:
+            gc.enable()
+    assert counts['BeautifulSoup'] == 0, counts
+    assert type(login_info['cookies']) is dict
+
+
+def test_soak_rss_stays_flat():
+    """Thousands of logins on long-lived automators: RSS levels off after warm-up"""
+    print(f"🧪 Soak test: {SOAK_LOGINS} logins...")
+    samples = []
+    start = time.monotonic()
+    with MockPortal(record=False) as portal, contextlib.redirect_stdout(open(os.devnull, 'w')) as devnull:
+        automators = [make_automator(portal, LiteAutomator, fast=True), make_automator(portal, IITMNetAccessAutomator, fast=True)]
+        warmup = min(500, SOAK_LOGINS // 10)
+        for i in range(SOAK_LOGINS):
+            assert automators[i % 2].automate_login(timeout=10)
+            if i + 1 == warmup or (i + 1) % (SOAK_LOGINS // 10) == 0:
+                samples.append(rss_bytes())
+        devnull.close()
+    elapsed = time.monotonic() - start
+    baseline = samples[0]
+    growth = max(samples) - baseline
+    late_growth = samples[-1] - samples[len(samples) // 2]
+    assert growth < 4 * MB, [s // 1024 for s in samples]
+    assert late_growth < 1 * MB, [s // 1024 for s in samples]
+    print(f"   ✅ {SOAK_LOGINS} logins in {elapsed:.0f}s, RSS {baseline / MB:.1f} MB "
+          f"after warm-up, +{growth / 1024:.0f} KiB at most")
+
+
+if __name__ == "__main__":
+    test_report_over_the_instance_socket()
+    test_budget_trims_and_warns_once()
+    test_parsed_pages_are_released()
+    test_soak_rss_stays_flat()
+    print("✅ All memory tests passed!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for pipelined logins: probes raced against the approval step
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator
+from iitm_login_manager.engine import LoginStatus
+from iitm_login_manager.lite import LiteAutomator
+from mock_portal import MockPortal, make_automator
+
+
+def pipelined_automator(portal, engine):
+    return make_automator(portal, engine, pipelined=True,
+                          internet_test_urls=[f"{portal.base_url}/account/login"])
+
+
+def race_threads():
+    return [t for t in threading.enumerate() if t.name == "verification-race"]
+
+
+def test_probe_beats_slow_approval_answer():
+    """Access is on before the approval answer: the probe ends the run and the POST is abandoned"""
+    print("🧪 Testing probes racing a slow approval answer...")
+    for engine in (IITMNetAccessAutomator, LiteAutomator):
+        with MockPortal(approve_delay=3) as portal:
+            automator = pipelined_automator(portal, engine)
+            start = time.monotonic()
+            assert automator.automate_login(timeout=30)
+            elapsed = time.monotonic() - start
+
+            assert automator.status == LoginStatus.SUCCESS
+            assert elapsed < 1.5, elapsed  # not the 3s answer, nor the 10s activation wait
+            timings = automator.last_phase_timings
+            assert 'activation_wait' not in timings and 'verify' not in timings
+            assert timings['pipeline_saved'] >= automator.activation_wait
+            assert portal.count('GET', '/generate_204') >= 1
+            assert portal.count('GET', '/account/login') == 1  # no verification requests
+        assert not race_threads()
+        print(f"   ✅ {engine.__name__}: done in {elapsed:.2f}s, "
+              f"saved at least {timings['pipeline_saved']:.1f}s")
+
+
+def test_authorized_answer_ends_the_race():
+    """An 'authorized' approval answer confirms access without waiting or verifying"""
+    with MockPortal() as portal:
+        automator = pipelined_automator(portal, IITMNetAccessAutomator)
+        automator.prober.targets = [f"{portal.base_url}/captive"]  # probes never see access
+        start = time.monotonic()
+        assert automator.automate_login(timeout=30)
+        assert time.monotonic() - start < 1.5
+        timings = automator.last_phase_timings
+        assert automator.activation_wait <= timings['pipeline_saved'] < automator.activation_wait + 1
+        assert 'activation_wait' not in timings
+    assert not race_threads()
+
+
+def test_unconfirmed_race_falls_back_to_verification():
+    """Without a confirmation the run waits and verifies as in the sequential flow"""
+    with MockPortal() as portal:
+        automator = pipelined_automator(portal, LiteAutomator)
+        automator.activation_wait = 0.5
+        automator.prober.targets = [f"{portal.base_url}/captive"]
+        portal.approve_delay = 0.1
+        original = automator.handle_access_options
+
+        def unclear_answer(response, deadline=None):
+            final = original(response, deadline)
+            final.text = "Request received"
+            return final
+
+        automator.handle_access_options = unclear_answer
+        assert automator.automate_login(timeout=30)
+        timings = automator.last_phase_timings
+        assert 'pipeline_saved' not in timings
+        assert {'activation_wait', 'verify'} <= set(timings)
+        assert portal.count('GET', '/captive') >= 2  # probed throughout the activation wait
+    assert not race_threads()
+
+
+def test_cancel_during_race():
+    with MockPortal(approve_delay=3) as portal:
+        automator = pipelined_automator(portal, LiteAutomator)
+        automator.prober.targets = [f"{portal.base_url}/captive"]
+        threading.Timer(0.5, automator.cancel, args=("Quit",)).start()
+        start = time.monotonic()
+        assert automator.automate_login(timeout=30) is False
+        assert time.monotonic() - start < 1.5
+        assert automator.status == LoginStatus.CANCELLED
+        assert 'pipeline_saved' not in automator.last_phase_timings
+    assert not race_threads()
+
+
+if __name__ == "__main__":
+    test_probe_beats_slow_approval_answer()
+    test_authorized_answer_ends_the_race()
+    test_unconfirmed_race_falls_back_to_verification()
+    test_cancel_during_race()
+    print("✅ All pipelined login tests passed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script for drop prediction and the pre-emptive re-login replay
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.history import HistoryStore
+from iitm_login_manager.predict import DropPredictor, DAY
+from simulate_relogin import generate_history, replay
+
+
+def test_drop_events_from_probe_history():
+    history = HistoryStore(":memory:")
+    states = ['online'] * 5 + ['captive'] * 3 + ['online'] * 2 + ['offline']
+    history.record_probes([(i * 60.0, state, 0.05, None, 'local') for i, state in enumerate(states)])
+    assert history.drop_events(0, 1000) == [(300.0, 480.0), (600.0, None)]
+
+
+def test_learns_session_expiry_and_maintenance():
+    history = HistoryStore(":memory:")
+    start, end = generate_history(history, days=21)
+    predictor = DropPredictor.from_history(history, days=21, now=end)
+
+    assert predictor.explains_age(6 * 3600)
+    assert not predictor.explains_age(2 * 3600)
+
+    # Shortly after a morning login the next drop is the session expiry
+    morning = datetime.fromtimestamp(end).replace(hour=8, minute=1).timestamp()
+    prediction = predictor.next_drop(morning, last_login=morning - 60)
+    assert prediction.confidence >= 0.9
+    assert 5.5 * 3600 < prediction.drop_at - morning < 6 * 3600
+    assert prediction.login_at == prediction.drop_at - predictor.lead
+
+    # A login at an unusual time moves the expiry; only the session age knows
+    odd = datetime.fromtimestamp(end).replace(hour=15, minute=0).timestamp()
+    prediction = predictor.next_drop(odd + 60, last_login=odd)
+    assert prediction.basis == 'since_login'
+    assert 5.5 * 3600 < prediction.drop_at - odd < 6 * 3600
+
+    # Late in the evening it is the nightly maintenance window
+    evening = datetime.fromtimestamp(end).replace(hour=22, minute=0).timestamp()
+    prediction = predictor.next_drop(evening, last_login=evening - 7200)
+    assert prediction.basis == 'time_of_day'
+    assert datetime.fromtimestamp(prediction.drop_at).strftime("%H") == "22"
+
+
+def test_no_prediction_without_history():
+    predictor = DropPredictor.from_history(HistoryStore(":memory:"))
+    assert predictor.next_drop(0, last_login=0) is None
+
+
+def test_replay_reduces_captive_minutes():
+    print("🧪 Replaying 7 days after 21 days of training...")
+    history = HistoryStore(":memory:")
+    start, end = generate_history(history, days=28)
+    split = start + 21 * DAY
+    drops = history.drop_events(start, end)
+    logins = history.login_times(start, end)
+    predictor = DropPredictor()
+    predictor.fit([ts for ts, _ in drops], logins, start, split)
+
+    result = replay(predictor, drops, logins, split, end)
+    assert result['averted'] >= 12
+    assert result['predictive_captive_min_per_day'] < result['recorded_captive_min_per_day'] / 10
+    print(f"   ✅ {result['recorded_captive_min_per_day']:.0f} -> "
+          f"{result['predictive_captive_min_per_day']:.0f} captive minutes/day")
+
+
+if __name__ == "__main__":
+    test_drop_events_from_probe_history()
+    test_learns_session_expiry_and_maintenance()
+    test_no_prediction_without_history()
+    test_replay_reduces_captive_minutes()
+    print("✅ All prediction tests passed!")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test script for the caching resolver and Happy Eyeballs connects
+"""
+
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from iitm_login_manager.resolver import Resolver, install_resolver, interleave
+from mock_portal import MockPortal
+
+
+def fake_answer(resolver, host, port, addrs):
+    """Seed the cache with addrinfos for (host, port)"""
+    infos = []
+    for addr in addrs:
+        family = socket.AF_INET6 if ':' in addr else socket.AF_INET
+        sockaddr = (addr, port, 0, 0) if family == socket.AF_INET6 else (addr, port)
+        infos.append((family, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', sockaddr))
+    resolver._store((host, port), infos, resolver.ttl)
+
+
+def test_cache_hits_and_negative_caching():
+    """Answers and failures are cached and counted"""
+    print("🧪 Testing DNS cache...")
+    resolver = Resolver()
+    first = resolver.resolve('localhost', 80)
+    assert resolver.resolve('localhost', 80) == first
+
+    for _ in range(2):
+        try:
+            resolver.resolve('no-such-host.invalid', 80)
+            assert False, "expected gaierror"
+        except socket.gaierror:
+            pass
+
+    stats = resolver.stats()
+    assert stats['misses'] == 2
+    assert stats['hits'] == 1
+    assert stats['negative_hits'] == 1
+    print(f"   ✅ {stats}")
+
+
+def test_cache_is_bounded():
+    resolver = Resolver(max_entries=2)
+    for i in range(4):
+        fake_answer(resolver, f'host{i}.test', 80, ['127.0.0.1'])
+    assert resolver.stats()['entries'] == 2
+    assert resolver.stats()['evictions'] == 2
+
+
+def test_interleave_alternates_families():
+    assert interleave(['a6', 'b6', 'c6'], ['a4']) == ['a6', 'a4', 'b6', 'c6']
+
+
+def test_dead_ipv6_falls_back_to_ipv4_fast():
+    """A refused or unreachable first address doesn't cost a full timeout"""
+    print("🧪 Testing dual-stack connection racing...")
+    with MockPortal() as portal:
+        resolver = Resolver()
+        fake_answer(resolver, 'portal.test', portal.port, ['::1', '127.0.0.1'])
+
+        start = time.monotonic()
+        sock = resolver.create_connection(('portal.test', portal.port), timeout=5)
+        elapsed = time.monotonic() - start
+        assert sock.family == socket.AF_INET
+        sock.close()
+        assert elapsed < 1
+        assert resolver.stats()['ipv4_wins'] == 1
+    print(f"   ✅ Fell back to IPv4 in {elapsed * 1000:.0f}ms")
+
+
+def test_session_uses_resolver():
+    """requests sessions with the adapter connect through the cache"""
+    with MockPortal() as portal:
+        resolver = Resolver()
+        fake_answer(resolver, 'portal.test', portal.port, ['127.0.0.1'])
+        session = requests.Session()
+        install_resolver(session, resolver)
+
+        response = session.get(f'http://portal.test:{portal.port}/generate_204', timeout=5,
+                               allow_redirects=False)
+        assert response.status_code == 302
+        assert resolver.stats()['hits'] == 1
+        assert resolver.stats()['connects'] == 1
+
+
+if __name__ == "__main__":
+    test_cache_hits_and_negative_caching()
+    test_cache_is_bounded()
+    test_interleave_alternates_families()
+    test_dead_ipv6_falls_back_to_ipv4_fast()
+    test_session_uses_resolver()
+    print("✅ All resolver tests passed!")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test script for RTT-based adaptive timeouts
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.automator import IITMNetAccessAutomator
+from iitm_login_manager.lite import LiteAutomator
+from iitm_login_manager.rtt import RTTEstimator
+from mock_portal import MockPortal, make_automator
+
+
+def test_timeout_tracks_observed_rtt():
+    """Steady fast samples give a timeout near the floor"""
+    print("🧪 Testing RTT estimator...")
+    rtt = RTTEstimator(floor=0.2, ceiling=15)
+    assert rtt.timeout('portal', 10) == 10  # no history: old fixed timeout
+
+    for _ in range(20):
+        rtt.observe('portal', 0.02)
+    assert rtt.timeout('portal', 10) == 0.2
+
+    for sample in (0.5, 1.5, 0.8, 2.0):
+        rtt.observe('slow', sample)
+    assert 2 < rtt.timeout('slow', 10) < 10
+    print(f"   ✅ fast {rtt.timeout('portal', 10):.2f}s, jittery {rtt.timeout('slow', 10):.2f}s")
+
+
+def test_timeouts_back_off_and_clamp():
+    rtt = RTTEstimator(floor=0.2, ceiling=3)
+    rtt.observe('portal', 1.0)
+    base = rtt.timeout('portal', 10)
+    assert base == 3  # clamped to the ceiling
+    rtt.on_timeout('portal')
+    assert rtt.timeout('portal', 10) == 6
+    rtt.observe('portal', 1.0)
+    assert rtt.timeout('portal', 10) <= 3  # a fresh sample ends the back-off
+
+
+def test_login_phases_have_their_own_estimates():
+    """Fast page loads and probes don't shrink the timeout of a slow POST"""
+    with MockPortal(approve_delay=1) as portal:
+        automator = make_automator(portal, IITMNetAccessAutomator, fast=True)
+        for _ in range(10):
+            automator.rtt.observe('127.0.0.1', 0.005)  # probes
+        assert automator.automate_login(timeout=10)
+        assert automator.automate_login(timeout=10)  # the second run uses what the first learned
+        assert automator.rtt.timeout('127.0.0.1', 10) == automator.rtt.floor
+        assert automator.rtt.timeout('127.0.0.1', 10, 'approval_form') > 1
+    stats = automator.rtt.stats()
+    assert {'127.0.0.1 login_page', '127.0.0.1 login', '127.0.0.1 approval_form'} <= set(stats)
+
+
+def test_verification_learns_its_own_estimate():
+    for engine in (IITMNetAccessAutomator, LiteAutomator):
+        with MockPortal() as portal:
+            automator = make_automator(portal, engine, fast=True)
+            assert automator.automate_login(timeout=10)
+            assert automator.automate_login(timeout=10)
+        assert automator.rtt.stats()['127.0.0.1 verify']['samples'] == 2, engine.__name__
+        assert automator.rtt.timeout('127.0.0.1', 10, 'verify') < 10
+
+
+def test_estimates_persist_between_runs():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rtt.json')
+        rtt = RTTEstimator.load(path)
+        rtt.observe('portal', 0.05)
+        rtt.save()
+
+        restored = RTTEstimator.load(path)
+        assert restored.stats()['portal']['samples'] == 1
+        assert restored.timeout('portal', 10) == rtt.timeout('portal', 10)
+
+
+def test_dead_portal_detected_quickly_on_fast_network():
+    """With a fast history, a portal that stops answering fails in well under a second"""
+    print("🧪 Testing fast failure detection...")
+    with MockPortal(delay=3) as portal:
+        automator = portal.point_automator(IITMNetAccessAutomator("test_user", "test_pass"))
+        automator.rtt = RTTEstimator(floor=0.3)
+        for _ in range(10):
+            automator.rtt.observe('127.0.0.1', 0.005, 'login_page')
+
+        start = time.monotonic()
+        assert automator.get_login_page() is None
+        elapsed = time.monotonic() - start
+        assert elapsed < 1
+    print(f"   ✅ Gave up after {elapsed * 1000:.0f}ms instead of 10s")
+
+
+if __name__ == "__main__":
+    test_timeout_tracks_observed_rtt()
+    test_timeouts_back_off_and_clamp()
+    test_login_phases_have_their_own_estimates()
+    test_verification_learns_its_own_estimate()
+    test_estimates_persist_between_runs()
+    test_dead_portal_detected_quickly_on_fast_network()
+    print("✅ All RTT tests passed!")
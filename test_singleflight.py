@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight login coordination
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.singleflight import SingleFlight, LoginLock
+
+
+def test_concurrent_calls_share_one_run():
+    """Threads calling at the same time get the result of a single run"""
+    print("🧪 Testing in-process single-flight...")
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_login():
+        calls.append(1)
+        time.sleep(0.2)
+        return True
+
+    threads = [threading.Thread(target=lambda: results.append(flight.run(slow_login))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [True] * 5
+    assert not flight.in_flight()
+    print("   ✅ 5 callers, 1 login")
+
+
+def test_errors_propagate_to_waiters():
+    """An exception in the leader is raised in every joined caller"""
+    flight = SingleFlight()
+    errors = []
+
+    def failing():
+        time.sleep(0.1)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            flight.run(failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["boom"] * 3
+
+
+def test_waiting_process_gets_holder_result():
+    """A second process waits for the lock holder and reports its result"""
+    print("🧪 Testing cross-process login lock...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "login.lock")
+        holder = subprocess.Popen([sys.executable, "-c", f"""
+import sys, time
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from iitm_login_manager.singleflight import LoginLock
+lock = LoginLock({path!r})
+assert lock.acquire() is None
+print("locked", flush=True)
+time.sleep(0.5)
+lock.record(True)
+lock.release()
+"""], stdout=subprocess.PIPE, text=True)
+        assert holder.stdout.readline().strip() == "locked"
+
+        waited = []
+        lock = LoginLock(path)
+        result = lock.acquire(on_wait=lambda: waited.append(True))
+        holder.wait()
+
+        assert waited == [True]
+        assert result is True
+
+        # No one is holding it now, so we become the owner
+        assert lock.acquire() is None
+        lock.release()
+    print("   ✅ Waiting process reported the holder's result")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_run()
+    test_errors_propagate_to_waiters()
+    test_waiting_process_gets_holder_result()
+    print("✅ All single-flight tests passed!")
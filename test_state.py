@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script for the warm-start state snapshot
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.state import StateSnapshot, StateStore
+
+
+def test_roundtrip_and_noop_writes():
+    with tempfile.TemporaryDirectory() as directory:
+        store = StateStore(os.path.join(directory, "state.json"))
+        assert store.load().status == "unknown"  # no file yet
+
+        store.record_status("success", "Already connected")
+        store.record_login(when=1000.0, lease=60)
+        store.update(next_login=2000.0)
+        assert store.writes == 3
+        store.update(next_login=2000.0)
+        assert store.writes == 3  # unchanged values are not rewritten
+
+        snapshot = StateStore(store.path).load()
+        assert snapshot.status == "success"
+        assert snapshot.message == "Already connected"
+        assert snapshot.lease_expiry == 1060.0
+        assert snapshot.next_login == 2000.0
+        assert os.listdir(directory) == ["state.json"]  # no temp files left behind
+
+        try:
+            store.update(colour="blue")
+        except TypeError:
+            pass
+        else:
+            raise AssertionError("unknown fields should be rejected")
+
+
+def test_corrupt_file_loads_empty():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.json")
+        with open(path, "w") as f:
+            f.write('{"status": "succ')
+        assert StateStore(path).load().updated is None
+
+
+def test_warm_status():
+    now = time.time()
+    fresh = StateSnapshot("success", "Already connected", updated=now - 60, lease_expiry=now + 3600)
+    status, message = fresh.warm_status(now)
+    assert status == "success" and message.startswith("Already connected (as of ")
+
+    assert StateSnapshot("success", updated=now - 7200).warm_status(now)[0] == "unknown"
+    assert StateSnapshot("in_progress", updated=now - 5).warm_status(now)[0] == "unknown"
+    expired = StateSnapshot("success", updated=now - 60, lease_expiry=now - 1)
+    assert expired.warm_status(now) == ("unknown", "Approval expired")
+    assert StateSnapshot("off_campus", updated=now - 60).warm_status(now)[0] == "off_campus"
+
+
+def test_load_is_fast():
+    """Loading the snapshot must not delay the first frame"""
+    print("🧪 Timing snapshot load...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.json")
+        StateStore(path).record_status("success", "Already connected")
+        start = time.perf_counter()
+        for _ in range(100):
+            StateStore(path).load().warm_status()
+        elapsed = (time.perf_counter() - start) / 100
+        with open(path) as f:
+            assert json.load(f)["status"] == "success"
+    assert elapsed < 0.001, elapsed
+    print(f"   ✅ Loaded in {elapsed * 1e6:.0f}µs")
+
+
+if __name__ == "__main__":
+    test_roundtrip_and_noop_writes()
+    test_corrupt_file_loads_empty()
+    test_warm_status()
+    test_load_is_fast()
+    print("✅ All state snapshot tests passed!")
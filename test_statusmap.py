@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped status snapshot read by status bars
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.state import StateStore
+from iitm_login_manager.statusmap import (StatusMap, read_status, describe, exit_code,
+                                          SIZE, MESSAGE_MAX)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_publish_and_read():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "status.map")
+        assert read_status(path) is None  # nothing published yet
+
+        writer = StatusMap(path).open()
+        writer.publish(status="success", message="Connected", last_login=1000.0, prediction={'ignored': 1})
+        writer.publish(connectivity="online", probed=time.time(), latency=0.012)
+        assert os.path.getsize(path) == SIZE
+
+        record = read_status(path)
+        assert record['status'] == "success"
+        assert record['message'] == "Connected"
+        assert record['connectivity'] == "online"
+        assert record['last_login'] == 1000.0
+        assert record['next_login'] is None
+        assert record['pid'] == os.getpid() and record['alive']
+        assert exit_code(record) == 0
+        assert describe(record).startswith("success - Connected (online")
+
+        writer.publish(status="network_error", message="é" * 200, connectivity="offline")
+        record = read_status(path)
+        assert exit_code(record) == 1
+        assert record['message'] == "é" * (MESSAGE_MAX // 2)  # cut at a character boundary
+
+        writer.close()
+        record = read_status(path)
+        assert record['pid'] == 0 and not record['alive']
+        assert exit_code(record) == 2
+        assert "stale" in describe(record)
+
+
+def _flip(path, stop):
+    writer = StatusMap(path).open()
+    a = dict(status="success", connectivity="online", message="A" * 100, latency=0.001)
+    b = dict(status="network_error", connectivity="offline", message="B" * 20, latency=0.002)
+    while not stop.is_set():
+        writer.publish(**a)
+        writer.publish(**b)
+
+
+def test_reader_never_sees_a_torn_record():
+    print("🧪 Testing seqlock reads against a busy writer...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "status.map")
+        StatusMap(path).open().close()
+        stop = multiprocessing.Event()
+        writer = multiprocessing.Process(target=_flip, args=(path, stop))
+        writer.start()
+        try:
+            seen = set()
+            start = time.monotonic()
+            reads = 0
+            while time.monotonic() - start < 1.0:
+                record = read_status(path)
+                if record is None or not record['alive']:
+                    continue
+                reads += 1
+                seen.add((record['status'], record['connectivity'], record['message'], round(record['latency'], 3)))
+            assert seen <= {("success", "online", "A" * 100, 0.001),
+                            ("network_error", "offline", "B" * 20, 0.002)}, seen
+            assert len(seen) == 2
+        finally:
+            stop.set()
+            writer.join(5)
+    print(f"   ✅ {reads} consistent reads ({1e6 / reads:.0f}µs each)")
+
+
+def test_state_store_mirrors_changes():
+    with tempfile.TemporaryDirectory() as directory:
+        writer = StatusMap(os.path.join(directory, "status.map")).open()
+        store = StateStore(os.path.join(directory, "state.json"), mirror=writer)
+        store.record_status("success", "Logged in")
+        store.record_login(when=5000.0, lease=100)
+        store.update(prediction={'confidence': 0.9})
+        record = read_status(writer.path)
+        assert record['status'] == "success"
+        assert record['lease_expiry'] == 5100.0
+        assert writer.publishes == 3
+        writer.close()
+
+
+def test_cli_cached_status():
+    with tempfile.TemporaryDirectory() as runtime:
+        env = dict(os.environ, XDG_RUNTIME_DIR=runtime, PYTHONPATH=HERE)
+        command = [sys.executable, "-m", "iitm_login_manager.main", "--status", "--cached"]
+        result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=30)
+        assert result.returncode == 2
+        assert "nothing published" in result.stdout
+
+        os.makedirs(os.path.join(runtime, "iitm-login-manager"), exist_ok=True)
+        writer = StatusMap(os.path.join(runtime, "iitm-login-manager", "status.map")).open()
+        writer.publish(status="success", message="Connected", connectivity="online", probed=time.time())
+        result = subprocess.run(command, env=env, capture_output=True, text=True, timeout=30)
+        writer.close()
+        assert result.returncode == 0, result.stdout + result.stderr
+        assert result.stdout.startswith("success - Connected")
+
+
+if __name__ == "__main__":
+    test_publish_and_read()
+    test_reader_never_sees_a_torn_record()
+    test_state_store_mirrors_changes()
+    test_cli_cached_status()
+    print("✅ All status map tests passed!")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for coalesced tray updates and debounced notifications
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.ui_state import UIStateStore, NotificationDebouncer, describe_window
+
+
+class FakeClock:
+    """A monotonic clock plus timeout_add that fire when time is advanced"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.timers = []
+
+    def __call__(self):
+        return self.now
+
+    def timeout_add(self, seconds, func):
+        self.timers.append((self.now + seconds, func))
+
+    def advance(self, seconds):
+        self.now += seconds
+        due = [t for t in self.timers if t[0] <= self.now]
+        self.timers = [t for t in self.timers if t[0] > self.now]
+        for _, func in sorted(due, key=lambda t: t[0]):
+            func()
+
+
+def test_burst_renders_once():
+    """A thousand status events from several threads become one redraw"""
+    print("🧪 Testing coalesced redraws...")
+    clock = FakeClock()
+    renders = []
+    ui = UIStateStore(lambda status, message: renders.append((status, message)), clock.timeout_add)
+
+    def flap(n):
+        for i in range(250):
+            ui.set("failed" if i % 2 else "in_progress", f"worker {n}")
+
+    threads = [threading.Thread(target=flap, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    ui.set("success", "Connected")
+    assert len(clock.timers) == 1
+    clock.advance(0.1)
+
+    assert renders == [("success", "Connected")]
+    stats = ui.get_stats()
+    assert stats['updates'] == 1001 and stats['renders'] == 1 and stats['coalesced'] == 1000
+
+    ui.set("success", "Connected")  # nothing new on screen
+    clock.advance(0.1)
+    assert len(renders) == 1 and ui.get_stats()['unchanged'] == 1
+    print(f"   ✅ {stats['updates']} updates, {stats['renders']} redraw")
+
+
+def test_failures_are_summarized():
+    print("🧪 Testing notification debouncing...")
+    clock = FakeClock()
+    shown = []
+    notifier = NotificationDebouncer(lambda *n: shown.append(n), clock.timeout_add, window=60, clock=clock)
+
+    notifier.notify('failure', "Login Failed", "Could not login: 503", True)
+    for seconds in (5, 10, 20):
+        clock.advance(seconds)
+        notifier.notify('failure', "Login Timed Out", f"after {seconds}s", True)
+    assert len(shown) == 1  # the first one only, the rest are held
+
+    clock.advance(30)  # the window since the first one is over
+    assert len(shown) == 2
+    title, message, urgent = shown[1]
+    assert title == "3 failures in the last minute"
+    assert message == "Latest: Login Timed Out - after 20s" and urgent
+
+    # Other kinds are not held back by failures
+    notifier.notify('success', "Login Successful", "Internet access has been activated!")
+    assert shown[-1][0] == "Login Successful"
+    stats = notifier.get_stats()
+    assert stats == {'shown': 3, 'summarized': 3, 'duplicates': 0, 'held': 0}
+    print(f"   ✅ 5 notifications shown as {stats['shown']}")
+
+
+def test_duplicates_are_dropped_and_single_held_is_shown():
+    clock = FakeClock()
+    shown = []
+    notifier = NotificationDebouncer(lambda *n: shown.append(n), clock.timeout_add, window=60, clock=clock)
+
+    notifier.notify('success', "Login Successful", "Internet access has been activated!")
+    clock.advance(10)
+    notifier.notify('success', "Login Successful", "Internet access has been activated!")
+    assert notifier.duplicates == 1 and not clock.timers
+
+    notifier.notify('failure', "Login Failed", "x")
+    clock.advance(1)
+    notifier.notify('failure', "Authentication Error", "Please check your credentials")
+    clock.advance(60)
+    assert [n[0] for n in shown] == ["Login Successful", "Login Failed", "Authentication Error"]
+
+    clock.advance(61)
+    notifier.notify('success', "Login Successful", "Internet access has been activated!")
+    assert len(shown) == 4  # the same text again once the window has passed
+
+
+def test_describe_window():
+    assert describe_window(60) == "minute"
+    assert describe_window(300) == "5 minutes"
+    assert describe_window(30) == "30 seconds"
+
+
+if __name__ == "__main__":
+    test_burst_renders_once()
+    test_failures_are_summarized()
+    test_duplicates_are_dropped_and_single_held_is_shown()
+    test_describe_window()
+    print("✅ All UI state tests passed!")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the tray's managed worker pool
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from iitm_login_manager.workers import TaskPool, MainLoopDispatcher, QueueFull
+
+
+class FakeMainLoop:
+    """Collects idle callbacks the way GLib.idle_add would"""
+
+    def __init__(self):
+        self.sources = []
+
+    def idle_add(self, func):
+        self.sources.append(func)
+
+    def iterate(self):
+        sources, self.sources = self.sources, []
+        for func in sources:
+            func()
+        return len(sources)
+
+
+def test_identical_pending_tasks_are_coalesced():
+    """Repeated submissions of a queued key run once"""
+    print("🧪 Testing task coalescing...")
+    gate = threading.Event()
+    runs = []
+    pool = TaskPool(max_workers=1, max_pending=4)
+
+    pool.submit('blocker', gate.wait)
+    futures = [pool.submit('probe', lambda: runs.append(1) or True) for _ in range(10)]
+    gate.set()
+
+    assert all(f is futures[0] for f in futures)
+    assert futures[0].result(timeout=2) is True
+    assert runs == [1]
+    assert pool.stats['coalesced'] == 9
+    pool.shutdown(wait=1)
+    print("   ✅ 10 clicks, 1 probe")
+
+
+def test_queue_is_bounded():
+    """Submitting past max_pending raises QueueFull"""
+    gate = threading.Event()
+    pool = TaskPool(max_workers=1, max_pending=2)
+    pool.submit('blocker', gate.wait)
+    time.sleep(0.05)  # let the worker pick up the blocker
+
+    pool.submit('a', lambda: None)
+    pool.submit('b', lambda: None)
+    try:
+        pool.submit('c', lambda: None)
+        assert False, "expected QueueFull"
+    except QueueFull:
+        pass
+    gate.set()
+    pool.shutdown(wait=1)
+
+
+def test_callbacks_run_through_single_idle_source():
+    """Completions are batched into one main loop callback"""
+    print("🧪 Testing main loop dispatch...")
+    loop = FakeMainLoop()
+    pool = TaskPool(max_workers=2, dispatcher=MainLoopDispatcher(loop.idle_add))
+    seen = []
+
+    futures = [pool.submit(f'task-{i}', lambda i=i: i, on_done=lambda f: seen.append(f.result()))
+               for i in range(3)]
+    for future in futures:
+        future.result(timeout=2)
+    time.sleep(0.05)
+
+    assert seen == []  # nothing runs off the main loop
+    assert loop.iterate() == 1
+    assert sorted(seen) == [0, 1, 2]
+    pool.shutdown(wait=1)
+    print("   ✅ 3 results, 1 idle callback")
+
+
+def test_shutdown_cancels_pending():
+    """Queued tasks are cancelled on shutdown"""
+    gate = threading.Event()
+    pool = TaskPool(max_workers=1)
+    pool.submit('blocker', gate.wait)
+    time.sleep(0.05)
+    pending = pool.submit('later', lambda: True)
+
+    pool.shutdown(cancel_pending=True)
+    gate.set()
+    assert pending.cancelled()
+
+
+if __name__ == "__main__":
+    test_identical_pending_tasks_are_coalesced()
+    test_queue_is_bounded()
+    test_callbacks_run_through_single_idle_source()
+    test_shutdown_cancels_pending()
+    print("✅ All worker pool tests passed!")